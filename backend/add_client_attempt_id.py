@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Add user_vocabulary_attempts.client_attempt_id to an existing database.
+
+The column lets /vocabulary/submit-attempts recognise retried attempts.
+Afterwards run add_missing_indexes.py to create the unique
+(user_id, client_attempt_id) index that the submission relies on.
+"""
+
+import asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from db import engine
+
+async def add_client_attempt_id():
+    """Add the client_attempt_id column; existing attempts keep NULL"""
+    async with AsyncSession(engine) as session:
+        try:
+            print("Adding client_attempt_id column...")
+            await session.execute(text(
+                "ALTER TABLE user_vocabulary_attempts ADD COLUMN IF NOT EXISTS client_attempt_id VARCHAR"
+            ))
+            await session.commit()
+            print("Successfully added client_attempt_id! Now run: python add_missing_indexes.py")
+
+        except Exception as e:
+            await session.rollback()
+            print(f"Error adding column: {e}")
+            raise
+
+if __name__ == "__main__":
+    asyncio.run(add_client_attempt_id())
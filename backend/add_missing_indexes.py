@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Create any index declared on the models that is missing from an existing database.
+
+Base.metadata.create_all (setup_db.py) only creates indexes together with new
+tables, so indexes added to existing tables need this script.
+"""
+
+import asyncio
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+from db import engine, Base
+
+async def add_missing_indexes():
+    """Create every model-declared index with IF NOT EXISTS, one statement per index"""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            for table in Base.metadata.sorted_tables:
+                for index in sorted(table.indexes, key=lambda index: index.name):
+                    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=engine.dialect))
+                    ddl = ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+                    ddl = ddl.replace("CREATE UNIQUE INDEX", "CREATE UNIQUE INDEX CONCURRENTLY", 1)
+                    print(f"Ensuring {index.name}...")
+                    await conn.execute(text(ddl))
+            print("Successfully added missing indexes!")
+        except Exception as e:
+            print(f"Error adding indexes: {e}")
+            raise
+
+if __name__ == "__main__":
+    asyncio.run(add_missing_indexes())
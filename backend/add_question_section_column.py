@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Add the section column to an existing questions table.
+
+Existing rows are all Reading and Writing questions, which is the column
+default. Run python add_missing_indexes.py afterwards to build ix_questions_section.
+"""
+
+import asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from db import engine
+
+async def add_question_section_column():
+    """Add the section column with its default to the questions table"""
+    async with AsyncSession(engine) as session:
+        try:
+            check_query = text("""
+                SELECT column_name
+                FROM information_schema.columns
+                WHERE table_name = 'questions' AND column_name = 'section'
+            """)
+            result = await session.execute(check_query)
+            if result.first():
+                print("Section column already exists!")
+                return
+
+            print("Adding section column...")
+            # A constant default is stored in the catalog, so this does not rewrite the table
+            await session.execute(text(
+                "ALTER TABLE questions ADD COLUMN IF NOT EXISTS section VARCHAR "
+                "NOT NULL DEFAULT 'Reading and Writing'"
+            ))
+            await session.commit()
+            print("Successfully added section column!")
+
+        except Exception as e:
+            await session.rollback()
+            print(f"Error adding column: {e}")
+            raise
+
+if __name__ == "__main__":
+    asyncio.run(add_question_section_column())
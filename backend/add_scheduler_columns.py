@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Add the spaced repetition scheduler columns to an existing database.
+
+users.vocabulary_scheduler selects each user's scheduler (default: ladder).
+user_card_state and user_vocabulary_attempts gain the scheduler memory state
+(stability, difficulty, scheduler). Existing ladder cards get their current
+rung as stability, so they keep climbing the ladder where they left off,
+and failed cards from before review dates were stored become due today.
+"""
+
+import asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import text
+from db import engine
+
+ALTER_QUERIES = [
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS vocabulary_scheduler VARCHAR NOT NULL DEFAULT 'ladder'",
+    "ALTER TABLE user_card_state ADD COLUMN IF NOT EXISTS stability DOUBLE PRECISION",
+    "ALTER TABLE user_card_state ADD COLUMN IF NOT EXISTS difficulty DOUBLE PRECISION",
+    "ALTER TABLE user_card_state ADD COLUMN IF NOT EXISTS scheduler VARCHAR",
+    "ALTER TABLE user_vocabulary_attempts ADD COLUMN IF NOT EXISTS stability DOUBLE PRECISION",
+    "ALTER TABLE user_vocabulary_attempts ADD COLUMN IF NOT EXISTS difficulty DOUBLE PRECISION",
+    "ALTER TABLE user_vocabulary_attempts ADD COLUMN IF NOT EXISTS scheduler VARCHAR",
+]
+
+# Ladder state before this migration lived in interval_days; "easy" rows are retired and stay NULL
+SEED_QUERIES = [
+    """
+    UPDATE user_card_state SET stability = interval_days, scheduler = 'ladder'
+    WHERE scheduler IS NULL AND result = 'again' AND interval_days > 0
+    """,
+    # Failed cards from before review dates were stored: due now, so /vocabulary/queue sees them
+    """
+    UPDATE user_card_state SET next_review_date = CAST(last_attempted_at AS DATE)
+    WHERE result = 'again' AND next_review_date IS NULL
+    """,
+    """
+    UPDATE user_vocabulary_attempts SET stability = interval_days, scheduler = 'ladder'
+    WHERE scheduler IS NULL AND result = 'again' AND interval_days > 0
+    """,
+]
+
+async def add_scheduler_columns():
+    """Add the scheduler columns and seed ladder stability from interval_days"""
+    async with AsyncSession(engine) as session:
+        try:
+            print("Adding scheduler columns...")
+            for query in ALTER_QUERIES:
+                await session.execute(text(query))
+
+            print("Seeding ladder state for existing cards...")
+            for query in SEED_QUERIES:
+                result = await session.execute(text(query))
+                print(f"  {result.rowcount} rows")
+
+            await session.commit()
+            print("Successfully added scheduler columns!")
+
+        except Exception as e:
+            await session.rollback()
+            print(f"Error adding columns: {e}")
+            raise
+
+if __name__ == "__main__":
+    asyncio.run(add_scheduler_columns())
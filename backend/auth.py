@@ -0,0 +1,233 @@
+"""
+Request identity: session tokens and the cached token -> user id lookup.
+
+/auth/google issues a signed session token (HS256 JWT carrying the Google
+sub and our users.id). Routers depend on get_current_user_id /
+get_optional_user_id and receive the user id directly. Resolved tokens
+are kept in a bounded TTL/LRU cache, so a warm request costs no User
+query and no signature check. A cold one verifies the token and confirms
+the id with a single primary-key lookup. Requests without a token fall
+back to DEFAULT_USER_SUB, the single hardcoded user the app has always
+served.
+
+There is no built-in signing key: without SESSION_SECRET the API refuses
+to start (and these helpers refuse to sign or verify). For local
+development SESSION_DEV_SECRET=true signs with a random per-process key,
+so sessions end whenever the process restarts.
+"""
+
+import hashlib
+import json
+import os
+import secrets
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+import jwt
+from fastapi import Depends, Header, HTTPException
+from sqlalchemy import or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from db import User, env_flag, get_db
+
+DEFAULT_USER_SUB = "102668604194363784471"
+
+SESSION_SECRET = os.getenv("SESSION_SECRET") or (
+    secrets.token_urlsafe(32) if env_flag("SESSION_DEV_SECRET", "false") else None
+)
+SESSION_TTL_SECONDS = int(os.getenv("SESSION_TTL_SECONDS", str(7 * 24 * 3600)))
+SESSION_ALGORITHM = "HS256"
+
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+
+
+def require_session_secret() -> None:
+    """Startup check: refuse to run without a session signing key"""
+    if not SESSION_SECRET:
+        raise RuntimeError(
+            "SESSION_SECRET is not set. Set it to a long random value "
+            "(or SESSION_DEV_SECRET=true for a throwaway key in development)."
+        )
+
+
+def session_secret() -> str:
+    if not SESSION_SECRET:
+        raise HTTPException(status_code=503, detail="Sessions are not configured on this server")
+    return SESSION_SECRET
+
+
+class UserIdCache:
+    """Bounded TTL/LRU map from a session token (or a bare sub) to a user id"""
+
+    def __init__(self, max_size: int = USER_CACHE_SIZE, ttl_seconds: float = USER_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        # key -> (user_id, sub, expires_at), oldest use first
+        self._entries: "OrderedDict[str, Tuple[int, str, float]]" = OrderedDict()
+        self._keys_by_sub: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[int]:
+        entry = self._entries.get(key)
+        if entry is None or entry[2] <= time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key: str, user_id: int, sub: str, expires_at: Optional[float] = None) -> None:
+        """Cache a resolution; expires_at (monotonic) caps the TTL, e.g. at the token's expiry"""
+        deadline = time.monotonic() + self.ttl_seconds
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (user_id, sub, deadline)
+        self._keys_by_sub.setdefault(sub, set()).add(key)
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate_sub(self, sub: str) -> None:
+        """Drop every cached token for a user, e.g. after their row changed"""
+        for key in list(self._keys_by_sub.get(sub, ())):
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys_by_sub.clear()
+
+    def _remove(self, key: str) -> None:
+        _, sub, _ = self._entries.pop(key)
+        keys = self._keys_by_sub.get(sub)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_sub[sub]
+
+
+user_id_cache = UserIdCache()
+
+# sub -> (profile hash, user id) of the last profile this worker wrote, oldest first
+_known_profiles: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+
+
+def profile_hash(user_data: dict) -> str:
+    return hashlib.sha256(json.dumps(user_data, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+async def upsert_google_user(session: AsyncSession, user_data: dict) -> Tuple[int, bool]:
+    """Insert or update the users row for a Google profile; returns (user id, whether it was written).
+
+    A profile identical to the last one this worker wrote for the sub is
+    skipped without touching the database. Otherwise a single
+    INSERT ... ON CONFLICT (sub) DO UPDATE ... RETURNING id writes it, and
+    the WHERE clause leaves the row alone if another worker already did.
+    """
+    sub = user_data["sub"]
+    digest = profile_hash(user_data)
+    known = _known_profiles.get(sub)
+    if known is not None and known[0] == digest:
+        _known_profiles.move_to_end(sub)
+        return known[1], False
+
+    stmt = pg_insert(User).values(**user_data)
+    profile_columns = [key for key in user_data if key != "sub"]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[User.sub],
+        set_={key: stmt.excluded[key] for key in profile_columns},
+        where=or_(*(getattr(User, key).is_distinct_from(stmt.excluded[key]) for key in profile_columns)),
+    ).returning(User.id)
+    user_id = (await session.execute(stmt)).scalar_one_or_none()
+    written = user_id is not None
+    if not written:
+        user_id = (await session.execute(select(User.id).where(User.sub == sub))).scalar_one()
+    await session.commit()
+
+    _known_profiles[sub] = (digest, user_id)
+    _known_profiles.move_to_end(sub)
+    while len(_known_profiles) > USER_CACHE_SIZE:
+        _known_profiles.popitem(last=False)
+    return user_id, written
+
+
+def issue_session_token(user_id: int, sub: str) -> str:
+    """Sign a session token for a logged-in user and pre-warm the cache with it"""
+    now = int(time.time())
+    token = jwt.encode(
+        {"sub": sub, "uid": user_id, "iat": now, "exp": now + SESSION_TTL_SECONDS},
+        session_secret(),
+        algorithm=SESSION_ALGORITHM,
+    )
+    user_id_cache.put(token, user_id, sub, time.monotonic() + SESSION_TTL_SECONDS)
+    return token
+
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        raise HTTPException(status_code=401, detail="Invalid authorization header")
+    return token.strip()
+
+
+async def resolve_token(session: AsyncSession, token: str) -> Optional[int]:
+    """Verify a session token and return its user id, or None if the user no longer exists"""
+    secret = session_secret()
+    try:
+        claims = jwt.decode(token, secret, algorithms=[SESSION_ALGORITHM])
+        user_id, sub = int(claims["uid"]), claims["sub"]
+    except (jwt.InvalidTokenError, KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Invalid or expired session")
+
+    result = await session.execute(select(User.id).where(User.id == user_id, User.sub == sub))
+    if result.scalar_one_or_none() is None:
+        return None
+    remaining = claims["exp"] - time.time()
+    user_id_cache.put(token, user_id, sub, time.monotonic() + remaining)
+    return user_id
+
+
+async def resolve_sub(session: AsyncSession, sub: str) -> Optional[int]:
+    """User id for a Google sub, through the same cache"""
+    key = f"sub:{sub}"
+    user_id = user_id_cache.get(key)
+    if user_id is not None:
+        return user_id
+    result = await session.execute(select(User.id).where(User.sub == sub))
+    user_id = result.scalar_one_or_none()
+    if user_id is not None:
+        user_id_cache.put(key, user_id, sub)
+    return user_id
+
+
+async def get_optional_user_id(
+    authorization: Optional[str] = Header(None),
+    session: AsyncSession = Depends(get_db)
+) -> Optional[int]:
+    """Id of the requesting user, or None if they have no users row"""
+    token = bearer_token(authorization)
+    if token is None:
+        return await resolve_sub(session, DEFAULT_USER_SUB)
+    user_id = user_id_cache.get(token)
+    if user_id is not None:
+        return user_id
+    return await resolve_token(session, token)
+
+
+async def get_current_user_id(user_id: Optional[int] = Depends(get_optional_user_id)) -> int:
+    """Id of the requesting user; 404 if they have no users row"""
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user_id
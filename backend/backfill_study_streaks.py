@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Rebuild daily study sessions and streak counters from existing attempt timestamps.
+
+Question answers and vocabulary reviews both count as study activity. Run
+once after deploying incremental streak tracking (after add_missing_indexes.py
+has created the unique (user_id, session_date) index), or any time the
+rollups are suspected to have drifted.
+Usage: python backfill_study_streaks.py
+"""
+
+import asyncio
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from db import engine
+
+ACTIVITY = """
+    SELECT user_id, CAST(attempted_at AS DATE) AS day, time_elapsed_seconds FROM user_question_attempts
+    UNION ALL
+    SELECT user_id, CAST(attempted_at AS DATE) AS day, time_elapsed_seconds FROM user_vocabulary_attempts
+"""
+
+REBUILD_SESSIONS_QUERY = f"""
+    INSERT INTO user_study_sessions (user_id, session_date, questions_attempted, total_time_seconds, created_at)
+    SELECT user_id, day, COUNT(*), SUM(time_elapsed_seconds), NOW()
+    FROM ({ACTIVITY}) activity
+    GROUP BY user_id, day
+"""
+
+# Gaps and islands: consecutive days share the same (day - row_number) value,
+# so each island is one streak. The latest island is the current streak.
+REBUILD_STREAKS_QUERY = f"""
+    WITH days AS (
+        SELECT DISTINCT user_id, day FROM ({ACTIVITY}) activity
+    ), islands AS (
+        SELECT user_id, day,
+               day - CAST(ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY day) AS INTEGER) AS island
+        FROM days
+    ), streaks AS (
+        SELECT user_id, COUNT(*) AS length, MAX(day) AS last_day
+        FROM islands
+        GROUP BY user_id, island
+    )
+    INSERT INTO user_progress (user_id, current_streak_days, longest_streak_days, last_study_date, updated_at)
+    SELECT user_id,
+           (ARRAY_AGG(length ORDER BY last_day DESC))[1],
+           MAX(length),
+           MAX(last_day),
+           NOW()
+    FROM streaks
+    GROUP BY user_id
+    ON CONFLICT (user_id) DO UPDATE SET
+        current_streak_days = excluded.current_streak_days,
+        longest_streak_days = excluded.longest_streak_days,
+        last_study_date = excluded.last_study_date,
+        updated_at = excluded.updated_at
+"""
+
+
+async def backfill_study_streaks(session: AsyncSession) -> tuple[int, int]:
+    """Replace study sessions and streak counters with values derived from the attempt logs"""
+    await session.execute(text("DELETE FROM user_study_sessions"))
+    sessions = await session.execute(text(REBUILD_SESSIONS_QUERY))
+    streaks = await session.execute(text(REBUILD_STREAKS_QUERY))
+    return sessions.rowcount, streaks.rowcount
+
+
+async def main():
+    async with AsyncSession(engine) as session:
+        try:
+            print("Rebuilding study sessions and streaks...")
+            session_rows, streak_rows = await backfill_study_streaks(session)
+            await session.commit()
+            print(f"Successfully rebuilt {session_rows} study sessions and {streak_rows} user streaks!")
+        except Exception as e:
+            await session.rollback()
+            print(f"Error rebuilding streaks: {e}")
+            raise
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Rebuild the user_card_state table from the user_vocabulary_attempts log.
+
+Run once after creating the table (python setup_db.py), or any time the
+materialized state is suspected to have drifted from the attempt log.
+Usage: python backfill_user_card_state.py [user_id]
+"""
+
+import asyncio
+import sys
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from db import engine
+
+# One pass over the log: the latest attempt per (user, card) becomes the state row
+REBUILD_QUERY = """
+    INSERT INTO user_card_state (
+        user_id, card_id, result, failure_count, interval_days, next_review_date,
+        stability, difficulty, scheduler, first_attempted_at, last_attempted_at
+    )
+    SELECT DISTINCT ON (user_id, card_id)
+        user_id, card_id, result, COALESCE(failure_count, 0), interval_days, next_review_date,
+        stability, difficulty, scheduler,
+        MIN(attempted_at) OVER (PARTITION BY user_id, card_id), attempted_at
+    FROM user_vocabulary_attempts
+    WHERE (CAST(:user_id AS INTEGER) IS NULL OR user_id = :user_id)
+    ORDER BY user_id, card_id, attempted_at DESC, id DESC
+"""
+
+
+async def backfill_user_card_state(session: AsyncSession, user_id: Optional[int] = None) -> int:
+    """Replace card state rows (all users, or one user) with state derived from the attempt log"""
+    if user_id is None:
+        await session.execute(text("DELETE FROM user_card_state"))
+    else:
+        await session.execute(text("DELETE FROM user_card_state WHERE user_id = :user_id"), {"user_id": user_id})
+    result = await session.execute(text(REBUILD_QUERY), {"user_id": user_id})
+    return result.rowcount
+
+
+async def main():
+    user_id = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    async with AsyncSession(engine) as session:
+        try:
+            target = f"user {user_id}" if user_id is not None else "all users"
+            print(f"Rebuilding user_card_state for {target}...")
+            rows = await backfill_user_card_state(session, user_id)
+            await session.commit()
+            print(f"Successfully rebuilt {rows} card state rows!")
+        except Exception as e:
+            await session.rollback()
+            print(f"Error rebuilding card state: {e}")
+            raise
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
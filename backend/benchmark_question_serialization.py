@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Benchmark the question read path: ORM entities + __dict__ filtering + FastAPI's
+default JSON encoding (the original questions_api implementation) against plain
+row tuples serialized with orjson (the current implementation).
+
+Runs against an in-memory SQLite copy of the questions table so it needs no
+running Postgres. Usage: python benchmark_question_serialization.py [sizes...]
+"""
+
+import json
+import sys
+import time
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, insert
+from sqlalchemy.future import select
+from sqlalchemy.orm import Session
+
+from db import Question
+from questions_api import QUESTION_FIELDS
+from serialization import ORJSONResponse, rows_to_dicts
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+REPEATS = 3
+
+
+def make_question(i: int) -> dict:
+    """Synthetic question with text columns sized like the real bank"""
+    return {
+        "question_id": f"bench{i:08x}",
+        "image": None,
+        "passage": ("The following text is adapted from a novel. " * 12)[:600],
+        "question": "Which choice best states the main purpose of the text?",
+        "choice_a": "To describe a setting in detail",
+        "choice_b": "To introduce a conflict between two characters",
+        "choice_c": "To explain the origins of a tradition",
+        "choice_d": "To compare two different viewpoints",
+        "correct_choice": "ABCD"[i % 4],
+        "rationale_a": "Choice A is the best answer because " + "the text focuses on the setting. " * 8,
+        "rationale_b": "Choice B is incorrect because " + "no conflict is introduced. " * 6,
+        "rationale_c": "Choice C is incorrect because " + "no tradition is discussed. " * 6,
+        "rationale_d": "Choice D is incorrect because " + "only one viewpoint is given. " * 6,
+        "difficulty": ["Easy", "Medium", "Hard"][i % 3],
+        "domain": "Craft and Structure",
+        "skill": "Text Structure and Purpose",
+    }
+
+
+def orm_path(session: Session) -> bytes:
+    """Original implementation: hydrate Question entities, filter __dict__, jsonable_encoder + json"""
+    questions = session.execute(select(Question)).scalars().all()
+    questions_list = [{k: v for k, v in q.__dict__.items() if not k.startswith('_')} for q in questions]
+    payload = {"questions": questions_list, "total": len(questions_list)}
+    body = json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    session.expunge_all()
+    return body
+
+
+def tuple_path(session: Session) -> bytes:
+    """Current implementation: select plain columns, zip with keys, orjson"""
+    result = session.execute(select(*Question.__table__.columns))
+    questions_list = rows_to_dicts(result.keys(), result.all())
+    payload = {"questions": questions_list, "total": len(questions_list)}
+    return ORJSONResponse(payload).body
+
+
+def time_path(fn, session: Session, rows: int) -> float:
+    """Best-of-N rows/sec for one read path"""
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(session)
+        best = min(best, time.perf_counter() - start)
+    return rows / best
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+
+    print("📊 Question serialization benchmark (rows/sec, best of %d)" % REPEATS)
+    print("=" * 60)
+    print(f"{'rows':>10} {'ORM + json':>16} {'tuples + orjson':>18} {'speedup':>9}")
+
+    for size in sizes:
+        engine = create_engine("sqlite://")
+        Question.__table__.create(engine)
+        with engine.begin() as conn:
+            conn.execute(insert(Question), [make_question(i) for i in range(size)])
+
+        with Session(engine) as session:
+            # Both paths must produce the same questions
+            old = json.loads(orm_path(session))["questions"]
+            new = json.loads(tuple_path(session))["questions"]
+            assert sorted(old[0]) == sorted(QUESTION_FIELDS) and old == new, "read paths disagree"
+
+            orm_rate = time_path(orm_path, session, size)
+            tuple_rate = time_path(tuple_path, session, size)
+
+        print(f"{size:>10} {orm_rate:>16,.0f} {tuple_rate:>18,.0f} {tuple_rate / orm_rate:>8.1f}x")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
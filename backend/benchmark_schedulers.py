@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Simulate the spaced repetition schedulers over a synthetic review log.
+
+A synthetic learner studies NEW_PER_DAY new cards a day. Each card has a
+hidden true memory strength, a forgetting curve independent of the
+schedulers' own models, and a latent difficulty. Every simulated day, all
+due cards are graded from that hidden memory and rescheduled in a single
+batch call. Reported per scheduler:
+    reviews/day         workload
+    recall at review    share of reviews the learner got right
+    recall at end       mean true recall probability over every introduced card
+and the batch API's throughput rescheduling a whole deck in one call
+versus one card at a time.
+
+Usage: python benchmark_schedulers.py [cards] [days]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from spaced_repetition import SCHEDULERS, GRADES
+
+NEW_PER_DAY = 20
+SEED = 120
+THROUGHPUT_DECK = 100_000
+THROUGHPUT_SINGLE = 2_000
+
+
+def true_recall(elapsed_days: np.ndarray, memory: np.ndarray) -> np.ndarray:
+    """Hidden forgetting curve: memory is the days until recall falls to 90%"""
+    return np.exp(np.log(0.9) * elapsed_days / memory)
+
+
+def simulate(scheduler, cards: int, days: int, rng: np.random.Generator) -> dict:
+    latent_difficulty = rng.uniform(0, 1, cards)
+    memory = np.full(cards, 0.5)  # days until 90% recall, before the first review
+    stability = np.full(cards, np.nan)
+    difficulty = np.full(cards, np.nan)
+    last_review = np.zeros(cards)
+    due_day = np.full(cards, np.inf)
+    introduced = 0
+    reviews = recalled_reviews = 0
+
+    for day in range(days):
+        new = np.arange(introduced, min(introduced + NEW_PER_DAY, cards))
+        due_day[new] = day
+        last_review[new] = day
+        introduced += len(new)
+
+        due = np.flatnonzero(due_day <= day)
+        if not len(due):
+            continue
+        elapsed = day - last_review[due]
+        seen_before = ~np.isnan(stability[due])
+        p = np.where(seen_before, true_recall(elapsed, memory[due]), 0.6 - 0.4 * latent_difficulty[due])
+        recalled = rng.uniform(0, 1, len(due)) < p
+        grade = np.where(recalled, np.where(p > 0.95, GRADES["easy"], np.where(p < 0.7, GRADES["hard"], GRADES["good"])), GRADES["again"])
+
+        # Hidden memory: grows on recall (more after a harder, spaced recall), shrinks on a lapse
+        growth = 1.3 + 2.5 * (1 - latent_difficulty[due]) * (1.2 - p)
+        memory[due] = np.where(recalled, memory[due] * growth + 1, np.maximum(memory[due] * 0.3, 0.5))
+
+        new_stability, new_difficulty, interval = scheduler.schedule(stability[due], difficulty[due], elapsed, grade)
+        # Retired ladder cards keep NaN stability but must not count as new again
+        stability[due] = np.where(interval == 0, np.inf, new_stability)
+        difficulty[due] = new_difficulty
+        last_review[due] = day
+        due_day[due] = np.where(interval == 0, np.inf, day + interval)
+
+        reviews += len(due)
+        recalled_reviews += int(recalled.sum())
+
+    seen = np.arange(introduced)
+    end_recall = true_recall(days - last_review[seen], memory[seen]).mean()
+    return {
+        "reviews_per_day": reviews / days,
+        "recall_at_review": recalled_reviews / max(reviews, 1),
+        "recall_at_end": end_recall,
+        "retired": int(np.isinf(stability[seen]).sum()),
+    }
+
+
+def throughput(scheduler, rng: np.random.Generator) -> tuple:
+    stability = rng.uniform(1, 60, THROUGHPUT_DECK)
+    difficulty = rng.uniform(1.3, 3, THROUGHPUT_DECK) if scheduler.name == "sm2" else rng.uniform(1, 10, THROUGHPUT_DECK)
+    elapsed = rng.uniform(0, 60, THROUGHPUT_DECK)
+    grade = rng.integers(1, 5, THROUGHPUT_DECK)
+
+    start = time.perf_counter()
+    scheduler.schedule(stability, difficulty, elapsed, grade)
+    batch_rate = THROUGHPUT_DECK / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(THROUGHPUT_SINGLE):
+        scheduler.schedule(stability[i:i + 1], difficulty[i:i + 1], elapsed[i:i + 1], grade[i:i + 1])
+    single_rate = THROUGHPUT_SINGLE / (time.perf_counter() - start)
+    return batch_rate, single_rate
+
+
+def main():
+    cards = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000
+    days = int(sys.argv[2]) if len(sys.argv) > 2 else 365
+
+    print(f"📊 Simulating {cards} cards over {days} days ({NEW_PER_DAY} new cards/day)")
+    print("=" * 72)
+    print(f"{'scheduler':>10} {'reviews/day':>12} {'recall@review':>14} {'recall@end':>11} {'retired':>8}")
+    for name, scheduler in SCHEDULERS.items():
+        result = simulate(scheduler, cards, days, np.random.default_rng(SEED))
+        print(f"{name:>10} {result['reviews_per_day']:>12.1f} {result['recall_at_review']:>14.1%} "
+              f"{result['recall_at_end']:>11.1%} {result['retired']:>8}")
+
+    print(f"\n⚡ Rescheduling throughput (deck of {THROUGHPUT_DECK:,} in one batch vs one card per call)")
+    for name, scheduler in SCHEDULERS.items():
+        batch_rate, single_rate = throughput(scheduler, np.random.default_rng(SEED))
+        print(f"{name:>10}: {batch_rate:>12,.0f} cards/sec batched, {single_rate:>9,.0f} cards/sec one at a time "
+              f"({batch_rate / single_rate:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
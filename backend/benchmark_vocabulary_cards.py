@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark /vocabulary/cards latency as a user's attempt history grows.
+
+Compares the original read path (outer join every attempt, pick the latest in
+Python) with the user_card_state join now used by vocabulary_api.
+Needs the Postgres database from DATABASE_URL with vocabulary cards loaded;
+the synthetic benchmark user and its attempts are removed afterwards.
+
+Usage: python benchmark_vocabulary_cards.py [history sizes...]
+"""
+
+import asyncio
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, delete, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from db import engine, User, VocabularyCard, UserVocabularyAttempt, UserCardState
+from vocabulary_api import fetch_cards_with_state
+from backfill_user_card_state import backfill_user_card_state
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+BENCH_USER_SUB = "benchmark-vocabulary-user"
+REPEATS = 5
+INSERT_CHUNK = 5_000
+
+
+async def legacy_cards(session: AsyncSession, user_id: int) -> int:
+    """Original implementation: every attempt row comes back and is reduced in Python"""
+    result = await session.execute(
+        select(VocabularyCard, UserVocabularyAttempt)
+        .outerjoin(
+            UserVocabularyAttempt,
+            and_(
+                VocabularyCard.id == UserVocabularyAttempt.card_id,
+                UserVocabularyAttempt.user_id == user_id
+            )
+        )
+        .order_by(VocabularyCard.word)
+    )
+    latest = {}
+    for card, attempt in result:
+        if card.id not in latest:
+            latest[card.id] = attempt
+        elif attempt and (not latest[card.id] or attempt.attempted_at > latest[card.id].attempted_at):
+            latest[card.id] = attempt
+    session.expunge_all()
+    return len(latest)
+
+
+async def state_cards(session: AsyncSession, user_id: int) -> int:
+    rows = await fetch_cards_with_state(session, user_id, date.today())
+    return len(rows)
+
+
+async def best_time(fn, session: AsyncSession, user_id: int) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        await fn(session, user_id)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+async def add_attempts(session: AsyncSession, user_id: int, card_ids: list, count: int, start_at: datetime) -> None:
+    for offset in range(0, count, INSERT_CHUNK):
+        rows = []
+        for i in range(offset, min(offset + INSERT_CHUNK, count)):
+            result = random.choice(["again", "easy"])
+            rows.append({
+                "user_id": user_id,
+                "card_id": random.choice(card_ids),
+                "result": result,
+                "time_elapsed_seconds": random.uniform(1, 20),
+                "attempted_at": start_at + timedelta(seconds=i),
+                "interval_days": 1 if result == "again" else 0,
+                "next_review_date": date.today() if result == "again" else None,
+                "failure_count": 1 if result == "again" else 0,
+            })
+        await session.execute(insert(UserVocabularyAttempt), rows)
+    # Attempts are bulk inserted, so derive the card state the way production would see it
+    await backfill_user_card_state(session, user_id)
+    await session.commit()
+
+
+async def main():
+    sizes = sorted(int(arg) for arg in sys.argv[1:]) or DEFAULT_SIZES
+
+    async with AsyncSession(engine) as session:
+        card_ids = (await session.execute(select(VocabularyCard.id))).scalars().all()
+        if not card_ids:
+            print("❌ No vocabulary cards found. Load the deck first (database/load_sat_vocabulary.py).")
+            return
+
+        user = User(sub=BENCH_USER_SUB, name="Benchmark User", email=f"{BENCH_USER_SUB}@example.invalid")
+        session.add(user)
+        await session.flush()
+        user_id = user.id
+        await session.commit()
+
+        print(f"📊 /vocabulary/cards latency over a {len(card_ids)}-card deck (ms, best of {REPEATS})")
+        print("=" * 60)
+        print(f"{'attempts':>10} {'join + Python':>15} {'card state':>12}")
+
+        try:
+            inserted = 0
+            start_at = datetime.utcnow() - timedelta(days=365)
+            for size in sizes:
+                await add_attempts(session, user_id, card_ids, size - inserted, start_at + timedelta(seconds=inserted))
+                inserted = size
+                await session.execute(text("ANALYZE user_vocabulary_attempts"))
+                await session.execute(text("ANALYZE user_card_state"))
+
+                legacy_ms = await best_time(legacy_cards, session, user_id)
+                state_ms = await best_time(state_cards, session, user_id)
+                print(f"{size:>10} {legacy_ms:>15.1f} {state_ms:>12.1f}")
+        finally:
+            await session.rollback()
+            await session.execute(delete(UserCardState).where(UserCardState.user_id == user_id))
+            await session.execute(delete(UserVocabularyAttempt).where(UserVocabularyAttempt.user_id == user_id))
+            await session.execute(delete(User).where(User.id == user_id))
+            await session.commit()
+            print("\n🧹 Benchmark user and attempts removed")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
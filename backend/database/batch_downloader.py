@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Concurrent, rate-limited batch downloader for SAT question pages.
+
+Replaces the one-at-a-time loop in final_sat_parser.process_all_verbal_ids:
+a shared httpx connection pool is used by a fixed number of workers, every
+request (including retries) takes a token from a token bucket, 5xx/429
+responses and timeouts are retried with exponential backoff, and every
+finished question ID is appended to a checkpoint file so an interrupted run
+resumes where it left off.
+
+One run can cover several modules (english: VerbalIDs, math: MathIDs); their
+IDs share the worker pool and each question's JSON is tagged with its section.
+Each module keeps its own checkpoint next to its ID list (<ids file>.done).
+
+Point --base-url (or SAT_QUESTIONS_BASE_URL) at a local stub server to test
+without touching the real site: fake_question_server.py injects 429s, 5xx and
+dropped connections, and check_batch_downloader.py runs this downloader
+against it to check retries, the rate limit and checkpoint resume.
+
+Usage: python batch_downloader.py [--module english] [--module math] [--ids FILE]
+       [--rate 2] [--burst 4] [--concurrency 4] [--retries 4] [--max N]
+       [--base-url URL] [--fresh]
+   or: python final_sat_parser.py abatch [same options]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+import httpx
+
+from final_sat_parser import (
+    BASE_URL, MODULES, default_questions_dir, module_ids_file, question_url,
+    save_question_html, extract_sat_question_data, save_question_json
+)
+
+# (module name, question ID)
+Job = Tuple[str, str]
+
+DEFAULT_RATE = 2.0
+DEFAULT_BURST = 4
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RETRIES = 4
+REQUEST_TIMEOUT = 30.0
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        # Waiters queue on the lock, so tokens are handed out in arrival order
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Checkpoint:
+    """Append-only file of finished question IDs, one per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Set[str] = set()
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                self.done = {line.strip() for line in f if line.strip()}
+        self.file = open(path, 'a')
+
+    def record(self, question_id: str) -> None:
+        self.done.add(question_id)
+        self.file.write(question_id + "\n")
+        self.file.flush()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class PermanentError(Exception):
+    """A response that retrying will not fix (e.g. 404)"""
+
+
+def backoff_delay(attempt: int, response: Optional[httpx.Response] = None) -> float:
+    """Exponential backoff with jitter, honoring a numeric Retry-After header"""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), BACKOFF_MAX_SECONDS)
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.5)
+
+
+async def fetch_page(client: httpx.AsyncClient, bucket: TokenBucket, url: str, retries: int) -> str:
+    """GET a page through the rate limiter, retrying 5xx/429 responses and transport errors"""
+    for attempt in range(retries + 1):
+        await bucket.acquire()
+        response = None
+        try:
+            response = await client.get(url)
+            if response.status_code not in RETRYABLE_STATUS:
+                if response.status_code >= 400:
+                    raise PermanentError(f"HTTP {response.status_code}")
+                return response.text
+            failure = f"HTTP {response.status_code}"
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            failure = f"{type(e).__name__}: {e}"
+
+        if attempt == retries:
+            raise RuntimeError(f"{failure} after {retries + 1} attempts")
+        delay = backoff_delay(attempt, response)
+        print(f"  ↻ {url}: {failure}, retrying in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+
+def save_and_extract(question_id: str, page_html: Optional[str], questions_dir: str, section: str) -> dict:
+    """Store a downloaded page (if any) and extract its question JSON, like process_question"""
+    html_file = os.path.join(questions_dir, f"{question_id}.html")
+    if page_html is not None:
+        html_file = save_question_html(question_id, page_html, questions_dir)
+    extracted_data = extract_sat_question_data(html_file, section)
+    if "error" not in extracted_data:
+        extracted_data['json_file'] = save_question_json(question_id, extracted_data, questions_dir)
+    return extracted_data
+
+
+class BatchDownloader:
+    """Downloads and extracts question IDs from one or more modules with a bounded pool of workers"""
+
+    def __init__(self, base_url: str = BASE_URL, rate: float = DEFAULT_RATE, burst: int = DEFAULT_BURST,
+                 concurrency: int = DEFAULT_CONCURRENCY, retries: int = DEFAULT_RETRIES,
+                 questions_dir: Optional[str] = None):
+        self.base_url = base_url
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self.retries = retries
+        self.questions_dir = questions_dir or default_questions_dir()
+        self.processed = 0
+        self.skipped = 0
+        self.errors = 0
+        self.fetched = 0
+
+    async def process_id(self, client: httpx.AsyncClient, bucket: TokenBucket, module: str, question_id: str) -> None:
+        config = MODULES[module]
+        page_html = None
+        if not os.path.exists(os.path.join(self.questions_dir, f"{question_id}.html")):
+            url = question_url(question_id, self.base_url, config["module_path"])
+            page_html = await fetch_page(client, bucket, url, self.retries)
+            self.fetched += 1
+            if 'Question not found' in page_html:
+                raise PermanentError("Question not found")
+
+        result = await asyncio.to_thread(
+            save_and_extract, question_id, page_html, self.questions_dir, config["section"]
+        )
+        if "error" in result:
+            if "Skipping question:" not in result["error"]:
+                raise PermanentError(result["error"])
+            print(f"  SKIPPED {question_id}: {result['error']}")
+            self.skipped += 1
+        else:
+            self.processed += 1
+
+    async def worker(self, queue: asyncio.Queue, client: httpx.AsyncClient, bucket: TokenBucket,
+                     checkpoints: Dict[str, Checkpoint], total: int) -> None:
+        while True:
+            module, question_id = await queue.get()
+            try:
+                await self.process_id(client, bucket, module, question_id)
+                checkpoints[module].record(question_id)
+            except PermanentError as e:
+                # Nothing to gain from retrying on the next run either
+                print(f"  ERROR {question_id}: {e}")
+                self.errors += 1
+                checkpoints[module].record(question_id)
+            except Exception as e:
+                # Left out of the checkpoint so the next run tries again
+                print(f"  EXCEPTION {question_id}: {e}")
+                self.errors += 1
+            finally:
+                queue.task_done()
+
+            finished = self.processed + self.skipped + self.errors
+            if finished % 100 == 0 or finished == total:
+                print(f"  📋 [{finished}/{total}] {self.processed} processed, {self.skipped} skipped, {self.errors} errors")
+
+    async def run(self, jobs: List[Job], checkpoints: Dict[str, Checkpoint]) -> None:
+        queue: asyncio.Queue = asyncio.Queue()
+        for job in jobs:
+            queue.put_nowait(job)
+
+        bucket = TokenBucket(self.rate, self.burst)
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=REQUEST_TIMEOUT, follow_redirects=True) as client:
+            workers = [
+                asyncio.create_task(self.worker(queue, client, bucket, checkpoints, len(jobs)))
+                for _ in range(min(self.concurrency, len(jobs)))
+            ]
+            try:
+                await queue.join()
+            finally:
+                for task in workers:
+                    task.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+
+
+def load_question_ids(ids_file: str) -> list:
+    with open(ids_file, 'r') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def parse_args(argv: Optional[list] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Concurrent, resumable SAT question downloader")
+    parser.add_argument("--module", action="append", choices=sorted(MODULES), dest="modules",
+                        help="module to ingest; repeat for several (default: all)")
+    parser.add_argument("--ids", default=None, help="override the ID file (single module only)")
+    parser.add_argument("--base-url", default=BASE_URL, help="question server (use a local stub for testing)")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="average requests per second")
+    parser.add_argument("--burst", type=int, default=DEFAULT_BURST, help="token bucket capacity")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="requests in flight")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="retries per request on 5xx/timeouts")
+    parser.add_argument("--questions-dir", default=None, help="output directory (default: ./questions)")
+    parser.add_argument("--max", type=int, default=None, help="process at most N pending questions")
+    parser.add_argument("--fresh", action="store_true", help="ignore the existing checkpoint")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list] = None) -> None:
+    args = parse_args(argv)
+    modules = args.modules or sorted(MODULES)
+    if args.ids and len(modules) != 1:
+        print("❌ --ids needs exactly one --module")
+        return
+
+    checkpoints: Dict[str, Checkpoint] = {}
+    pending: List[Job] = []
+    for module in modules:
+        ids_file = args.ids or module_ids_file(module)
+        if not os.path.exists(ids_file):
+            print(f"❌ {ids_file} file not found!")
+            return
+
+        checkpoint_path = f"{ids_file}.done"
+        if args.fresh and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        checkpoints[module] = Checkpoint(checkpoint_path)
+
+        question_ids = load_question_ids(ids_file)
+        module_pending = [(module, question_id) for question_id in question_ids
+                          if question_id not in checkpoints[module].done]
+        print(f"🚀 {module}: {len(question_ids)} IDs in {os.path.basename(ids_file)}, "
+              f"{len(question_ids) - len(module_pending)} already done, {len(module_pending)} to process")
+        pending.extend(module_pending)
+
+    if args.max:
+        pending = pending[:args.max]
+
+    print(f"   {args.concurrency} workers, {args.rate:g} req/s (burst {args.burst}), {args.retries} retries → {args.base_url}")
+    print("=" * 60)
+
+    downloader = BatchDownloader(
+        base_url=args.base_url, rate=args.rate, burst=args.burst, concurrency=args.concurrency,
+        retries=args.retries, questions_dir=args.questions_dir
+    )
+    start = time.perf_counter()
+    try:
+        if pending:
+            asyncio.run(downloader.run(pending, checkpoints))
+    except KeyboardInterrupt:
+        print("\n⏸️  Interrupted; rerun the same command to resume from the checkpoint")
+    finally:
+        for checkpoint in checkpoints.values():
+            checkpoint.close()
+
+    elapsed = time.perf_counter() - start
+    print("\n" + "=" * 60)
+    print("BATCH PROCESSING COMPLETE!")
+    print(f"Total processed successfully: {downloader.processed}")
+    print(f"Total skipped (images/other): {downloader.skipped}")
+    print(f"Total errors: {downloader.errors}")
+    print(f"Pages downloaded: {downloader.fetched} in {elapsed:.1f}s")
+    if downloader.errors > 0:
+        print(f"\n⚠️  {downloader.errors} errors occurred. Check the output above for details.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark question page extraction over the cached pages in ./questions.
+
+"before" is the original multi-pass regex path (extract_container_div,
+extract_all_css_styles and the old extract_sat_question_data field logic);
+"after" is page_extractor's single scan as used by final_sat_parser now.
+Both must agree on every page: container and CSS byte for byte, question
+fields once the old output's leftover HTML entities are decoded the same way
+(the old path only decoded six entities and never collapsed whitespace in
+stems and answer options).
+
+Usage: python benchmark_page_extraction.py [questions_dir]
+"""
+
+import glob
+import json
+import os
+import re
+import sys
+import time
+
+from final_sat_parser import (
+    default_questions_dir, extract_container_div, extract_all_css_styles, extract_passage_from_html,
+    extract_correct_answer_from_html, extract_answer_rationales, extract_question_data_from_page
+)
+from page_extractor import scan_question_page, fragment_text
+
+REPEATS = 3
+
+
+def legacy_question_data(content: str) -> dict:
+    """The original extract_sat_question_data body, minus the file read and not-found check"""
+    js_match = re.search(r'let question = ({.*?});', content, re.DOTALL)
+    if not js_match:
+        return {"error": "Could not find question data in HTML"}
+    question_data = json.loads(js_match.group(1))
+    content_data = question_data.get('content', {})
+    has_image = 'figure' in content_data.get('stem', '') or 'figure' in content_data.get('stimulus', '')
+    if has_image:
+        return {"error": "Skipping question: Contains images (has_image: true)"}
+    extracted_data = {
+        'question_id': question_data.get('questionId', ''),
+        'section': "Reading and Writing",
+        'domain': question_data.get('primary_class_cd_desc', ''),
+        'skill': question_data.get('skill_desc', ''),
+        'difficulty': question_data.get('difficulty', ''),
+        'has_image': has_image,
+        'passage': extract_passage_from_html(content),
+        'question_text': re.sub(r'<[^>]+>', ' ', content_data.get('stem', '')).strip(),
+        'answer_options': [re.sub(r'<[^>]+>', ' ', opt.get('content', '')).strip() for opt in content_data.get('answerOptions', [])],
+        'correct_answer': extract_correct_answer_from_html(content),
+        'answer_rationales': extract_answer_rationales(content_data.get('rationale', ''))
+    }
+    difficulty_map = {'E': 'Easy', 'M': 'Medium', 'H': 'Hard'}
+    if extracted_data['difficulty'] in difficulty_map:
+        extracted_data['difficulty'] = difficulty_map[extracted_data['difficulty']]
+    return extracted_data
+
+
+def before(content: str) -> tuple:
+    return extract_container_div(content), extract_all_css_styles(content), legacy_question_data(content)
+
+
+def after(content: str) -> tuple:
+    page = scan_question_page(content)
+    return page.container, page.css, extract_question_data_from_page(page)
+
+
+def normalized(value):
+    """Decode entities and collapse whitespace the way the new engine does"""
+    if isinstance(value, str):
+        return fragment_text(value)
+    if isinstance(value, list):
+        return [normalized(item) for item in value]
+    if isinstance(value, dict):
+        return {key: normalized(item) for key, item in value.items()}
+    return value
+
+
+def pages_per_second(fn, pages: list) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for content in pages:
+            fn(content)
+        best = min(best, time.perf_counter() - start)
+    return len(pages) / best
+
+
+def main():
+    questions_dir = sys.argv[1] if len(sys.argv) > 1 else default_questions_dir()
+    files = sorted(glob.glob(os.path.join(questions_dir, "*.html")))
+    cached = []
+    for path in files:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        # Not-found pages have no question to compare
+        if 'Question not found' not in content:
+            cached.append((os.path.basename(path), content))
+    pages = [content for _, content in cached]
+    if not pages:
+        print(f"❌ No cached question pages in {questions_dir}")
+        return
+
+    print(f"📊 Page extraction over {len(pages)} cached pages ({sum(map(len, pages)) / 1e6:.1f} MB, best of {REPEATS})")
+    print("=" * 60)
+
+    mismatches = []
+    entity_fixes = 0
+    for name, content in cached:
+        old_container, old_css, old_data = before(content)
+        new_container, new_css, new_data = after(content)
+        if old_container != new_container or old_css != new_css or normalized(old_data) != new_data:
+            mismatches.append(name)
+        elif old_data != new_data:
+            entity_fixes += 1
+
+    before_rate = pages_per_second(before, pages)
+    after_rate = pages_per_second(after, pages)
+    print(f"{'multi-pass regex':>20}: {before_rate:>8,.0f} pages/sec")
+    print(f"{'single scan':>20}: {after_rate:>8,.0f} pages/sec ({after_rate / before_rate:.1f}x)")
+    print(f"\n✅ {len(pages) - len(mismatches)} pages agree ({entity_fixes} only after decoding leftover entities)")
+    if mismatches:
+        print(f"⚠️  {len(mismatches)} pages differ: {', '.join(mismatches[:10])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Run batch_downloader against fake_question_server.py and check that it
+retries 429/503/dropped connections, stays under its rate limit, and resumes
+from its checkpoint.
+
+The first run allows a single retry, so IDs with two or more injected
+failures give up and stay out of the checkpoint; the second run allows
+enough retries and must fetch exactly those IDs. Over both runs every page
+has to be served once and requested exactly once more than its injected
+failures, and no one-second window may see more requests than the token
+bucket allows.
+
+Usage: python check_batch_downloader.py [questions_dir]
+"""
+
+import glob
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+import batch_downloader
+from batch_downloader import Checkpoint, main as download
+from final_sat_parser import default_questions_dir
+
+PORT = 8091
+RATE = 5.0
+BURST = 2
+IDS_PER_FAULT_COUNT = 2
+MISSING_ID = "00000000"
+
+
+def pick_ids(questions_dir: str, faults: list) -> list:
+    """A few cached IDs for every number of injected failures, plus one the server doesn't know"""
+    from fake_question_server import planned_faults
+    wanted = {count: IDS_PER_FAULT_COUNT for count in range(len(faults) + 1)}
+    question_ids = []
+    for html_file in sorted(glob.glob(os.path.join(questions_dir, "*.html"))):
+        question_id = os.path.splitext(os.path.basename(html_file))[0]
+        count = len(planned_faults(question_id))
+        if wanted.get(count):
+            wanted[count] -= 1
+            question_ids.append(question_id)
+    return question_ids + [MISSING_ID]
+
+
+def start_server(questions_dir: str) -> subprocess.Popen:
+    env = dict(os.environ, FAKE_QUESTIONS_DIR=questions_dir)
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_question_server.py"), str(PORT)],
+        env=env
+    )
+    for _ in range(50):
+        try:
+            httpx.get(f"http://127.0.0.1:{PORT}/stats")
+            return server
+        except httpx.TransportError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError("fake question server did not start")
+
+
+def max_requests_per_second(request_times: list) -> int:
+    return max((sum(1 for t in request_times if start <= t < start + 1.0) for start in request_times), default=0)
+
+
+def main():
+    questions_dir = sys.argv[1] if len(sys.argv) > 1 else default_questions_dir()
+    os.environ.setdefault("FAKE_QUESTIONS_FAULTS", "429,503,drop")
+    from fake_question_server import FAULTS, planned_faults
+
+    question_ids = pick_ids(questions_dir, FAULTS)
+    # Keep exponential backoff short; 429s still wait for the server's Retry-After
+    batch_downloader.BACKOFF_BASE_SECONDS = 0.2
+
+    server = start_server(questions_dir)
+    failures = []
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            ids_file = os.path.join(work_dir, "ids")
+            out_dir = os.path.join(work_dir, "questions")
+            os.makedirs(out_dir)
+            with open(ids_file, "w") as f:
+                f.write("\n".join(question_ids) + "\n")
+
+            common = ["--module", "english", "--ids", ids_file, "--base-url", f"http://127.0.0.1:{PORT}",
+                      "--questions-dir", out_dir, "--rate", str(RATE), "--burst", str(BURST), "--concurrency", "4"]
+
+            print(f"🧪 Run 1: {len(question_ids)} IDs, 1 retry")
+            download(common + ["--retries", "1"])
+            first = httpx.get(f"http://127.0.0.1:{PORT}/stats").json()
+            done_first = set(Checkpoint(f"{ids_file}.done").done)
+            expected_first = {q for q in question_ids if len(planned_faults(q)) <= 1}
+            if done_first != expected_first:
+                failures.append(f"run 1 checkpointed {sorted(done_first)}, expected {sorted(expected_first)}")
+
+            print(f"\n🧪 Run 2: resume, {len(FAULTS)} retries")
+            download(common + ["--retries", str(len(FAULTS))])
+            stats = httpx.get(f"http://127.0.0.1:{PORT}/stats").json()
+            done = set(Checkpoint(f"{ids_file}.done").done)
+            if done != set(question_ids):
+                failures.append(f"checkpoint is missing {sorted(set(question_ids) - done)} after the resumed run")
+
+            for question_id in question_ids:
+                expected_requests = len(planned_faults(question_id)) + 1
+                if stats["requests"].get(question_id) != expected_requests:
+                    failures.append(f"{question_id}: {stats['requests'].get(question_id)} requests, "
+                                    f"expected {expected_requests}")
+                if stats["served"].get(question_id) != 1:
+                    failures.append(f"{question_id}: served {stats['served'].get(question_id)} times, expected once")
+                if question_id != MISSING_ID and not os.path.exists(os.path.join(out_dir, f"{question_id}.html")):
+                    failures.append(f"{question_id}: page was not saved")
+
+            for fault in FAULTS:
+                if not stats["faults"].get(fault):
+                    failures.append(f"no {fault} fault was injected")
+
+            request_times = stats["request_times"]
+            split = len(first["request_times"])
+            allowed = BURST + int(RATE)
+            for run, times in (("run 1", request_times[:split]), ("run 2", request_times[split:])):
+                peak = max_requests_per_second(times)
+                print(f"   {run}: {len(times)} requests, at most {peak} in any second (allowed {allowed})")
+                if peak > allowed:
+                    failures.append(f"{run}: {peak} requests in one second, the bucket allows {allowed}")
+            print(f"   faults injected: {stats['faults']}")
+    finally:
+        server.terminate()
+        server.wait()
+
+    print("\n" + "=" * 60)
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        sys.exit(1)
+    print(f"✅ Retries, rate limit and checkpoint resume behaved as expected for {len(question_ids)} IDs")
+
+
+if __name__ == "__main__":
+    main()
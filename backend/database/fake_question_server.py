@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the question site, for exercising batch_downloader's
+retry, backoff and rate limiting without touching the real server.
+
+Serves /question/<module>/<id> from the cached <id>.html pages in a directory
+(FAKE_QUESTIONS_DIR, default ./questions) and answers unknown IDs with the
+site's "Question not found" page. Before a page is served, each ID first gets
+between 0 and len(FAKE_QUESTIONS_FAULTS) injected failures, chosen from the ID
+so every run sees the same ones: "429" (with Retry-After), "503", or "drop"
+(the connection closes halfway through the body). GET /stats reports what
+was requested and served, for check_batch_downloader.py.
+
+Usage: python fake_question_server.py [port]
+       python batch_downloader.py --base-url http://localhost:8091 --ids IDS --questions-dir OUT
+"""
+
+import logging
+import os
+import sys
+import time
+import zlib
+from collections import Counter
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import HTMLResponse, PlainTextResponse, StreamingResponse
+
+PAGES_DIR = os.getenv("FAKE_QUESTIONS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "questions"))
+FAULTS = [fault for fault in os.getenv("FAKE_QUESTIONS_FAULTS", "429,503,drop").split(",") if fault]
+RETRY_AFTER_SECONDS = os.getenv("FAKE_QUESTIONS_RETRY_AFTER", "1")
+NOT_FOUND_PAGE = "<html><body><h1>Question not found</h1></body></html>"
+
+app = FastAPI()
+
+requests_by_id: Counter = Counter()
+served_by_id: Counter = Counter()
+faults_injected: Counter = Counter()
+request_times: list = []
+
+
+class DroppedConnection(Exception):
+    """Raised mid-body so the server aborts the response"""
+
+
+class HideDroppedConnections(logging.Filter):
+    """Keep the injected drops out of the server's error log"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not (record.exc_info and isinstance(record.exc_info[1], DroppedConnection))
+
+
+@app.on_event("startup")
+async def quiet_dropped_connections():
+    logging.getLogger("uvicorn.error").addFilter(HideDroppedConnections())
+
+
+def planned_faults(question_id: str) -> list:
+    """The failures this ID gets before its page is served, the same on every run"""
+    return FAULTS[:zlib.crc32(question_id.encode()) % (len(FAULTS) + 1)]
+
+
+def dropped_response(page: str) -> StreamingResponse:
+    """Promise the whole page, send half of it, then drop the connection"""
+    body = page.encode()
+
+    async def truncated():
+        yield body[:len(body) // 2]
+        raise DroppedConnection("injected connection drop")
+    return StreamingResponse(truncated(), media_type="text/html", headers={"Content-Length": str(len(body))})
+
+
+@app.get("/question/{module_path}/{question_id}")
+async def question_page(module_path: str, question_id: str):
+    request_times.append(time.monotonic())
+    attempt = requests_by_id[question_id]
+    requests_by_id[question_id] += 1
+
+    page_file = os.path.join(PAGES_DIR, f"{question_id}.html")
+    if os.path.exists(page_file):
+        with open(page_file, "r", encoding="utf-8") as f:
+            page = f.read()
+    else:
+        page = NOT_FOUND_PAGE
+
+    faults = planned_faults(question_id)
+    if attempt < len(faults):
+        fault = faults[attempt]
+        faults_injected[fault] += 1
+        if fault == "drop":
+            return dropped_response(page)
+        headers = {"Retry-After": RETRY_AFTER_SECONDS} if fault == "429" else {}
+        return PlainTextResponse(f"injected {fault}", status_code=int(fault), headers=headers)
+
+    served_by_id[question_id] += 1
+    return HTMLResponse(page)
+
+
+@app.get("/stats")
+async def stats():
+    return {
+        "requests": dict(requests_by_id),
+        "served": dict(served_by_id),
+        "faults": dict(faults_injected),
+        "planned_faults": {question_id: planned_faults(question_id) for question_id in requests_by_id},
+        "request_times": request_times,
+    }
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8091
+    print(f"🧪 Fake question server on http://localhost:{port} (faults: {','.join(FAULTS) or 'none'}, pages: {PAGES_DIR})")
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
@@ -7,6 +7,11 @@ import time
 import random
 from typing import Dict, Optional, List
 
+from page_extractor import QuestionPage, scan_question_page, fragment_text, rationales_from_html
+
+# The regex helpers below are the original multi-pass extractors. Pages now go
+# through page_extractor's single scan; benchmark_page_extraction.py compares the two.
+
 def extract_passage_text(stimulus_content: str) -> str:
     """Extract passage text from stimulus content."""
     if not stimulus_content:
@@ -261,16 +266,69 @@ def create_minimal_html(container_div: str, css_styles: str, question_id: str) -
 </body>
 </html>"""
 
-def download_question_html(question_id: str, base_dir: Optional[str] = None) -> str:
+# Question pages are served per module; overridable so batch runs can target a local stub server
+BASE_URL = os.getenv("SAT_QUESTIONS_BASE_URL", "https://sat-questions.onrender.com")
+MODULE_PATH = "module:english-group"
+
+# Question bank modules: ID list, URL path segment, and the section tag written to each JSON
+MODULES = {
+    "english": {"ids_file": "VerbalIDs", "module_path": "module:english-group", "section": "Reading and Writing"},
+    "math": {"ids_file": "MathIDs", "module_path": "module:math-group", "section": "Math"},
+}
+DEFAULT_SECTION = MODULES["english"]["section"]
+
+def default_questions_dir() -> str:
+    """The /questions/ directory next to this script"""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), '.', 'questions')
+
+def question_url(question_id: str, base_url: str = BASE_URL, module_path: str = MODULE_PATH) -> str:
+    return f"{base_url.rstrip('/')}/question/{module_path}/{question_id}"
+
+def module_ids_file(module: str) -> str:
+    """Path of a module's ID list, next to this script"""
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), MODULES[module]["ids_file"])
+
+def save_question_html(question_id: str, page_html: str, base_dir: Optional[str] = None) -> str:
+    """Extract container div and CSS from a downloaded page and save the minimal version."""
+    if base_dir is None:
+        base_dir = default_questions_dir()
+    os.makedirs(base_dir, exist_ok=True)
+    html_file_path = os.path.join(base_dir, f"{question_id}.html")
+
+    # Extract container div and CSS in one scan
+    page = scan_question_page(page_html)
+    container_div = page.container
+    css_styles = page.css
+    
+    if not container_div:
+        print(f"Warning: Could not find container div for {question_id}")
+        # Save original as fallback
+        with open(html_file_path, 'w', encoding='utf-8') as f:
+            f.write(page_html)
+        return html_file_path
+    
+    # Save CSS file separately - COMMENTED OUT (may need later)
+    # css_file_path = os.path.join(base_dir, f"{question_id}.css")
+    # with open(css_file_path, 'w', encoding='utf-8') as f:
+    #     f.write(css_styles)
+    
+    # Create and save minimal HTML (replace original)
+    minimal_html = create_minimal_html(container_div, css_styles, question_id)
+    with open(html_file_path, 'w', encoding='utf-8') as f:
+        f.write(minimal_html)
+
+    print(f"Minimal HTML saved to: {html_file_path}")
+    return html_file_path
+
+def download_question_html(question_id: str, base_dir: Optional[str] = None, module: str = "english") -> str:
     """Download HTML content for a question ID, extract container div and CSS, save minimal version."""
     if base_dir is None:
         # Default to the /questions/ directory relative to this script
-        base_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.', 'questions')
+        base_dir = default_questions_dir()
     os.makedirs(base_dir, exist_ok=True)
     
     # Paths for different file types
     html_file_path = os.path.join(base_dir, f"{question_id}.html")
-    # css_file_path = os.path.join(base_dir, f"{question_id}.css")  # Commented out - may need later
 
     # Check if HTML file already exists
     if os.path.exists(html_file_path):
@@ -278,46 +336,24 @@ def download_question_html(question_id: str, base_dir: Optional[str] = None) ->
         return html_file_path
 
     print(f"Downloading HTML for question ID: {question_id}")
-    url = f"https://sat-questions.onrender.com/question/module:english-group/{question_id}"
+    url = question_url(question_id, module_path=MODULES[module]["module_path"])
 
     try:
         response = requests.get(url, timeout=30)
         response.raise_for_status()
-
-        # Extract container div and CSS
-        container_div = extract_container_div(response.text)
-        css_styles = extract_all_css_styles(response.text)
-        
-        if not container_div:
-            print(f"Warning: Could not find container div for {question_id}")
-            # Save original as fallback
-            with open(html_file_path, 'w', encoding='utf-8') as f:
-                f.write(response.text)
-            return html_file_path
-        
-        # Save CSS file separately - COMMENTED OUT (may need later)
-        # with open(css_file_path, 'w', encoding='utf-8') as f:
-        #     f.write(css_styles)
-        
-        # Create and save minimal HTML (replace original)
-        minimal_html = create_minimal_html(container_div, css_styles, question_id)
-        with open(html_file_path, 'w', encoding='utf-8') as f:
-            f.write(minimal_html)
-
-        print(f"Minimal HTML saved to: {html_file_path}")
-        # print(f"CSS saved to: {css_file_path}")  # Commented out
-        return html_file_path
+        return save_question_html(question_id, response.text, base_dir)
 
     except requests.RequestException as e:
         print(f"Error downloading HTML: {e}")
         return ""
 
-def extract_sat_question_data(html_file_path: str) -> Dict[str, str]:
+def extract_sat_question_data(html_file_path: str, section: str = DEFAULT_SECTION) -> Dict[str, str]:
     """
     Extract SAT question data from HTML file.
     
     Args:
         html_file_path: Path to the HTML file
+        section: Section tag for the question's module (see MODULES)
         
     Returns:
         Dictionary containing extracted data
@@ -325,20 +361,22 @@ def extract_sat_question_data(html_file_path: str) -> Dict[str, str]:
     
     with open(html_file_path, 'r', encoding='utf-8') as f:
         content = f.read()
-        
-    # If the HTML contains 'Question not found', exit silently
-    if 'Question not found' in content:
-        sys.exit(0)
+
+    return extract_question_data_from_page(scan_question_page(content), section)
+
+def extract_question_data_from_page(page: QuestionPage, section: str = DEFAULT_SECTION) -> Dict[str, str]:
+    """Build the question data dict from a scanned page (see extract_sat_question_data)."""
+    # Missing questions are reported like any other error so batch loops keep going
+    if page.not_found:
+        return {"error": "Question not found"}
     
     # Find the JavaScript question object
-    js_match = re.search(r'let question = ({.*?});', content, re.DOTALL)
-    if not js_match:
+    if page.question_json is None:
         return {"error": "Could not find question data in HTML"}
-    js_data = js_match.group(1)
     
     try:
         # Parse the JavaScript object as JSON
-        question_data = json.loads(js_data)
+        question_data = page.question_data()
         
         # Extract the specific fields you need
         content_data = question_data.get('content', {})
@@ -350,16 +388,16 @@ def extract_sat_question_data(html_file_path: str) -> Dict[str, str]:
         
         extracted_data = {
             'question_id': question_data.get('questionId', ''),
+            'section': section,
             'domain': question_data.get('primary_class_cd_desc', ''),
             'skill': question_data.get('skill_desc', ''),
             'difficulty': question_data.get('difficulty', ''),
             'has_image': has_image,
-            'passage': extract_passage_from_html(content),
-            'question_text': re.sub(r'<[^>]+>', ' ', content_data.get('stem', '')).strip(),
-            'answer_options': [re.sub(r'<[^>]+>', ' ', opt.get('content', '')).strip() for opt in content_data.get('answerOptions', [])],
-            'correct_answer': extract_correct_answer_from_html(content),
-            'answer_rationales': extract_answer_rationales(content_data.get('rationale', ''))
-            # Removed css_styles and html_file fields
+            'passage': page.passage,
+            'question_text': fragment_text(content_data.get('stem', '')),
+            'answer_options': [fragment_text(opt.get('content', '')) for opt in content_data.get('answerOptions', [])],
+            'correct_answer': page.correct_answer,
+            'answer_rationales': rationales_from_html(content_data.get('rationale', ''))
         }
         
         # Clean up difficulty mapping
@@ -374,42 +412,54 @@ def extract_sat_question_data(html_file_path: str) -> Dict[str, str]:
 
 
 
-def process_question(question_id: str) -> Dict[str, str]:
+def process_question(question_id: str, module: str = "english") -> Dict[str, str]:
     """Process a single question ID - download if needed and extract data."""
     
     # Download HTML if it doesn't exist
-    html_file = download_question_html(question_id)
+    html_file = download_question_html(question_id, module=module)
     
     if not html_file:
         return {"error": f"Failed to download HTML for question ID: {question_id}"}
     
     # Extract data
-    extracted_data = extract_sat_question_data(html_file)
+    extracted_data = extract_sat_question_data(html_file, MODULES[module]["section"])
     
     if "error" in extracted_data:
         return extracted_data
     
     # Save to JSON file in /questions/ directory
-    questions_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.', 'questions')
+    extracted_data['json_file'] = save_question_json(question_id, extracted_data)
+    return extracted_data
+
+def save_question_json(question_id: str, extracted_data: Dict, questions_dir: Optional[str] = None) -> str:
+    """Atomically write extracted question data to <questions_dir>/<question_id>.json and return the path."""
+    if questions_dir is None:
+        questions_dir = default_questions_dir()
     os.makedirs(questions_dir, exist_ok=True)
     json_file = os.path.join(questions_dir, f'{question_id}.json')
 
-    with open(json_file, 'w', encoding='utf-8') as f:
+    # Write to a temp file and rename so readers never see a half-written JSON
+    tmp_file = f"{json_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
         json.dump(extracted_data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, json_file)
+    return json_file
 
-    extracted_data['json_file'] = json_file
-    return extracted_data
-
-def process_all_verbal_ids(ids_file: str = "VerbalIDs", start_from: int = 0, max_questions: Optional[int] = None) -> None:
+def process_all_verbal_ids(ids_file: Optional[str] = None, start_from: int = 0, max_questions: Optional[int] = None,
+                           module: str = "english") -> None:
     """
-    Process all question IDs from the VerbalIDs file with safe intervals to avoid getting banned.
+    Process all question IDs from a module's ID file with safe intervals to avoid getting banned.
     
     Args:
-        ids_file: Path to the file containing question IDs (one per line)
+        ids_file: Path to the file containing question IDs (one per line); defaults to the module's file
+        module: Question bank module (key of MODULES)
         start_from: Line number to start from (0-indexed, useful for resuming)
         max_questions: Maximum number of questions to process (None for all)
     """
     
+    if ids_file is None:
+        ids_file = module_ids_file(module)
+
     # Check if the IDs file exists
     if not os.path.exists(ids_file):
         print(f"Error: {ids_file} file not found!")
@@ -445,7 +495,7 @@ def process_all_verbal_ids(ids_file: str = "VerbalIDs", start_from: int = 0, max
         
         try:
             # Process the question
-            result = process_question(question_id)
+            result = process_question(question_id, module)
             
             if "error" in result:
                 if "Skipping question:" in result["error"]:
@@ -490,6 +540,18 @@ def process_all_verbal_ids(ids_file: str = "VerbalIDs", start_from: int = 0, max
         print(f"✅ {processed} questions successfully processed and saved as JSON files.")
 
 def main():
+    # Concurrent, rate-limited and resumable batch mode (see batch_downloader.py)
+    if len(sys.argv) > 1 and sys.argv[1] == "abatch":
+        from batch_downloader import main as batch_main
+        batch_main(sys.argv[2:])
+        return
+
+    # Offline re-extraction of the cached HTML (see reparse_questions.py)
+    if len(sys.argv) > 1 and sys.argv[1] == "reparse":
+        from reparse_questions import main as reparse_main
+        reparse_main(sys.argv[2:])
+        return
+
     # Check if we're running in batch mode
     if len(sys.argv) > 1 and sys.argv[1] == "batch":
         # Parse additional arguments for batch processing
@@ -557,12 +619,7 @@ def main():
         print(f"{key.upper()}: {display_value}")
     
     # Save to JSON file in /questions/ directory
-    questions_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.', 'questions')
-    os.makedirs(questions_dir, exist_ok=True)
-    json_file = os.path.join(questions_dir, f'{question_id}.json')
-
-    with open(json_file, 'w', encoding='utf-8') as f:
-        json.dump(extracted_data, f, indent=2, ensure_ascii=False)
+    json_file = save_question_json(question_id, extracted_data)
 
     print(f"\nData saved to: {json_file}")
     
@@ -0,0 +1,227 @@
+"""
+Single-pass extraction engine for SAT question pages.
+
+One compiled tag tokenizer walks the page once. At the few tags that matter
+it runs an anchored, precompiled match, instead of repeating full-page regex
+passes per field. A scan yields the trimmed question container, the inline
+CSS, the passage, the correct answer and the embedded question JSON.
+fragment_text() turns the HTML fragments inside that JSON (stem, answer
+options, rationales) into clean text with one strip/decode/collapse chain.
+"""
+
+import html
+import json
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Only the tags the scan acts on; <p>, <li>, inline markup etc. never reach the Python loop
+TAG_RE = re.compile(r'<(/?)(div|span|a|script|style|body)(?![a-zA-Z0-9-])([^>]*)>')
+QUESTION_JS_RE = re.compile(r'let question = ({.*?});', re.DOTALL)
+
+# Anchored at a <div class="my-6"> spacer: the passage div that follows it
+PASSAGE_RE = re.compile(r'<div class="my-6"></div>\s*<div[^>]*><p>(.*?)</p></div>', re.DOTALL)
+PASSAGE_ALT_RE = re.compile(r'<div class="my-6"></div>\s*<div[^>]*>(.*?)</div>', re.DOTALL)
+CORRECT_ANSWER_RE = re.compile(r'<span class="font-bold">Correct Answer:\s*</span>\s*<span>([A-D])</span>')
+
+# Page chrome dropped from the container, each anchored at its opening tag
+HEADER_RE = re.compile(r'<div class="bg-orange-600[^>]*>.*?</div>', re.DOTALL)
+BANNER_RE = re.compile(
+    r'<div class="container mx-auto px-2 pb-4">\s*<div class="bg-indigo-100[^>]*>.*?</div>\s*</div>', re.DOTALL
+)
+PAGINATION_RE = re.compile(r'<div class="mt-4 mb-14">.*?</div>\s*</div>', re.DOTALL)
+NAV_LINK_RE = re.compile(r'<a[^>]*href="/question/module[^"]*"[^>]*>.*?</a>', re.DOTALL)
+SR_ONLY_RE = re.compile(r'<div[^>]*class="[^"]*sr-only[^"]*"[^>]*>.*?</div>', re.DOTALL)
+FLEX_RE = re.compile(r'<div[^>]*class="[^"]*flex[^"]*"[^>]*>.*?</div>', re.DOTALL)
+BLANK_LINES_RE = re.compile(r'\n\s*\n\s*\n')
+
+FRAGMENT_TAG_RE = re.compile(r'<[^>]+>')
+ENTITY_RE = re.compile(r'&(#[0-9]+|#[xX][0-9a-fA-F]+|[a-zA-Z][a-zA-Z0-9]*);')
+WHITESPACE_RE = re.compile(r'\s+')
+CHOICE_SPLIT_RE = re.compile(r'(Choice ([A-D]) is (?:the best answer|correct|incorrect))')
+
+# Entities final_sat_parser has always replaced by hand: quotes and spaces become ASCII,
+# dashes stay typographic; everything else is decoded as-is
+PARSER_ENTITIES = {"rsquo": "'", "ldquo": '"', "rdquo": '"', "mdash": "—", "nbsp": " ", "ndash": "–"}
+
+
+def _decode_entity(match: re.Match) -> str:
+    name = match.group(1)
+    if name in PARSER_ENTITIES:
+        return PARSER_ENTITIES[name]
+    return html.unescape(match.group(0))
+
+
+def fragment_text(fragment: str) -> str:
+    """Plain text of an HTML fragment: tags become spaces, entities are decoded, whitespace collapsed"""
+    if not fragment:
+        return ""
+    text = ENTITY_RE.sub(_decode_entity, FRAGMENT_TAG_RE.sub(' ', fragment))
+    return WHITESPACE_RE.sub(' ', text).strip()
+
+
+def rationales_from_html(rationale_html: str) -> Dict[str, str]:
+    """Split a rationale fragment into one entry per "Choice X is ..." section"""
+    sections = CHOICE_SPLIT_RE.split(fragment_text(rationale_html))
+    rationales = {}
+    # split() yields [preamble, header, letter, text, header, letter, text, ...]
+    for i in range(1, len(sections) - 2, 3):
+        header, letter, text = sections[i], sections[i + 1], sections[i + 2]
+        rationales[letter] = (header + text).strip()
+    return rationales
+
+
+class QuestionPage:
+    """Everything the parser needs from one question page, collected in a single scan"""
+
+    __slots__ = ("container", "css", "passage", "correct_answer", "question_json", "not_found")
+
+    def __init__(self, container: str, css: str, passage: str, correct_answer: str,
+                 question_json: Optional[str], not_found: bool):
+        self.container = container
+        self.css = css
+        self.passage = passage
+        self.correct_answer = correct_answer
+        self.question_json = question_json
+        self.not_found = not_found
+
+    def question_data(self) -> Optional[dict]:
+        """The embedded `let question = {...}` object, or None when the page has none"""
+        if self.question_json is None:
+            return None
+        return json.loads(self.question_json)
+
+
+def _removal_end(page: str, start: int, closing: str, name: str, attrs: str) -> Optional[int]:
+    """End offset of a chrome element opening at `start`, or None if this tag is kept"""
+    if closing:
+        return None
+    match = None
+    if name == "div":
+        if attrs.startswith(' class="bg-orange-600'):
+            match = HEADER_RE.match(page, start)
+        elif attrs == ' class="container mx-auto px-2 pb-4"':
+            match = BANNER_RE.match(page, start)
+        elif attrs == ' class="mt-4 mb-14"':
+            match = PAGINATION_RE.match(page, start)
+        elif "sr-only" in attrs:
+            match = SR_ONLY_RE.match(page, start)
+        elif "flex" in attrs:
+            match = FLEX_RE.match(page, start)
+    elif name == "a" and "/question/module" in attrs:
+        match = NAV_LINK_RE.match(page, start)
+    return match.end() if match else None
+
+
+def _kept_text(page: str, start: int, end: int, removed: List[Tuple[int, int]]) -> str:
+    """page[start:end] without the removed spans"""
+    parts = []
+    for removed_start, removed_end in removed:
+        if removed_end <= start or removed_start >= end:
+            continue
+        parts.append(page[start:removed_start])
+        start = removed_end
+    parts.append(page[start:end])
+    return "".join(parts)
+
+
+def scan_question_page(page: str) -> QuestionPage:
+    """Tokenize a question page once and collect every extracted part"""
+    styles = []
+    question_json = None
+    passage = None
+    passage_alt = None
+    correct_answer = ""
+
+    body_start = body_end = None
+    removed: List[Tuple[int, int]] = []
+    skip_until = 0
+    container_start = container_end = None
+    in_container_script = container_script_done = False
+
+    pos = 0
+    while True:
+        match = TAG_RE.search(page, pos)
+        if match is None:
+            break
+        start, pos = match.start(), match.end()
+        closing, name, attrs = match.groups()
+
+        # Raw text elements: take the content and resume at the closing tag
+        if not closing and name in ("style", "script"):
+            close = page.find(f"</{name}", pos)
+            if close == -1:
+                close = len(page)
+            content = page[pos:close]
+            if name == "style":
+                styles.append(content.strip())
+            elif question_json is None and "let question = " in content:
+                js_match = QUESTION_JS_RE.search(content)
+                if js_match:
+                    question_json = js_match.group(1)
+            pos = close
+
+        # Fields searched over the whole page
+        if not closing and name == "div" and attrs == ' class="my-6"':
+            if passage is None:
+                passage_match = PASSAGE_RE.match(page, start)
+                if passage_match:
+                    passage = fragment_text(passage_match.group(1).strip())
+            if passage_alt is None:
+                passage_alt = PASSAGE_ALT_RE.match(page, start)
+        elif not correct_answer and not closing and name == "span" and attrs == ' class="font-bold"':
+            answer_match = CORRECT_ANSWER_RE.match(page, start)
+            if answer_match:
+                correct_answer = answer_match.group(1)
+
+        # Container: the body minus page chrome
+        if name == "body":
+            if not closing and body_start is None:
+                body_start = pos
+            elif closing and body_start is not None and body_end is None:
+                body_end = start
+            continue
+        if body_start is None or body_end is not None or start < skip_until or container_end is not None:
+            continue
+
+        removal_end = _removal_end(page, start, closing, name, attrs)
+        if removal_end is not None:
+            removed.append((start, removal_end))
+            skip_until = removal_end
+            continue
+
+        if container_start is None:
+            if not closing and name == "div" and match.group(0).startswith('<div class="container mx-auto"'):
+                container_start = start
+        elif not container_script_done:
+            if name == "script":
+                if not closing:
+                    in_container_script = True
+                elif in_container_script:
+                    container_script_done = True
+        elif closing and name == "div":
+            container_end = pos
+
+    if passage is None:
+        passage = ""
+        if passage_alt:
+            content = passage_alt.group(1).strip()
+            # Only extract text content, skip if it contains figures/images
+            if '<figure' not in content and '<svg' not in content:
+                passage = fragment_text(content)
+
+    container = ""
+    if body_start is not None and body_end is not None:
+        if container_end is not None:
+            container = BLANK_LINES_RE.sub('\n\n', _kept_text(page, container_start, container_end, removed))
+        else:
+            body = BLANK_LINES_RE.sub('\n\n', _kept_text(page, body_start, body_end, removed)).strip()
+            container = f'<div class="container mx-auto">\n{body}\n</div>'
+
+    return QuestionPage(
+        container=container,
+        css="\n\n".join(styles).strip(),
+        passage=passage,
+        correct_answer=correct_answer,
+        question_json=question_json,
+        not_found='Question not found' in page,
+    )
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Single-file, memory-mapped store for the cached question pages and JSON.
+
+Layout (little endian):
+    header   MAGIC, index offset, index length, entry count   (32 bytes)
+    records  raw file contents, appended back to back
+    index    per entry: offset, length, sha256, key length, key ("<question_id>.html" / ".json")
+
+Writers only ever append records and a fresh index, then repoint the header
+at it, so a crashed append leaves the previous index intact (the tail is
+truncated on the next open). Readers mmap the file once and slice records out
+as zero-copy memoryviews; superseded records stay behind until `compact`.
+
+Usage: python question_pack.py pack     [--dir questions] [--pack questions.pack]
+       python question_pack.py verify   [--dir questions] [--pack questions.pack]
+       python question_pack.py compact  [--pack questions.pack]
+"""
+
+import argparse
+import hashlib
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+MAGIC = b"QPACK001"
+HEADER = struct.Struct("<8sQQQ")
+ENTRY = struct.Struct("<QI32sH")
+KINDS = ("html", "json")
+
+DATABASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_QUESTIONS_DIR = os.path.join(DATABASE_DIR, "questions")
+DEFAULT_PACK_FILE = os.path.join(DATABASE_DIR, "questions.pack")
+
+
+class PackError(Exception):
+    """The file is not a readable question pack"""
+
+
+class PackEntry(NamedTuple):
+    offset: int
+    length: int
+    sha256: bytes
+
+
+def record_key(question_id: str, kind: str) -> str:
+    return f"{question_id}.{kind}"
+
+
+def encode_index(entries: Dict[str, PackEntry]) -> bytes:
+    parts = []
+    for key in sorted(entries):
+        entry = entries[key]
+        encoded_key = key.encode("utf-8")
+        parts.append(ENTRY.pack(entry.offset, entry.length, entry.sha256, len(encoded_key)))
+        parts.append(encoded_key)
+    return b"".join(parts)
+
+
+def decode_index(buffer, offset: int, length: int, count: int) -> Dict[str, PackEntry]:
+    entries = {}
+    position, end = offset, offset + length
+    for _ in range(count):
+        if position + ENTRY.size > end:
+            raise PackError("index is truncated")
+        record_offset, record_length, sha256, key_length = ENTRY.unpack_from(buffer, position)
+        position += ENTRY.size
+        key = bytes(buffer[position:position + key_length]).decode("utf-8")
+        position += key_length
+        entries[key] = PackEntry(record_offset, record_length, sha256)
+    return entries
+
+
+class QuestionPack:
+    """Read-only, memory-mapped view of a pack file.
+
+    view() returns memoryview slices of the mapping; release them (or let them
+    go out of scope) before close().
+    """
+
+    def __init__(self, path: str = DEFAULT_PACK_FILE):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            if os.fstat(self._file.fileno()).st_size < HEADER.size:
+                raise PackError(f"{self.path} is too small to be a question pack")
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        self._view = memoryview(self._mmap)
+        magic, index_offset, index_length, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self.close()
+            raise PackError(f"{self.path} is not a question pack")
+        self.entries = decode_index(self._view, index_offset, index_length, count)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def question_ids(self, kind: str = "json") -> List[str]:
+        suffix = f".{kind}"
+        return sorted(key[:-len(suffix)] for key in self.entries if key.endswith(suffix))
+
+    def entry(self, question_id: str, kind: str) -> Optional[PackEntry]:
+        return self.entries.get(record_key(question_id, kind))
+
+    def view_key(self, key: str) -> memoryview:
+        entry = self.entries[key]
+        return self._view[entry.offset:entry.offset + entry.length]
+
+    def view(self, question_id: str, kind: str) -> memoryview:
+        """Zero-copy slice of one record; raises KeyError if it is not packed"""
+        return self.view_key(record_key(question_id, kind))
+
+    def text(self, question_id: str, kind: str) -> str:
+        return str(self.view(question_id, kind), "utf-8")
+
+
+class PackWriter:
+    """Appends records to a pack (creating it if needed) and publishes them on commit()"""
+
+    def __init__(self, path: str = DEFAULT_PACK_FILE):
+        self.path = Path(path)
+        if not self.path.exists():
+            with open(self.path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, HEADER.size, 0, 0))
+        self._file = open(self.path, "r+b")
+        magic, index_offset, index_length, count = HEADER.unpack(self._file.read(HEADER.size))
+        if magic != MAGIC:
+            self._file.close()
+            raise PackError(f"{self.path} is not a question pack")
+        self._file.seek(index_offset)
+        self.entries = decode_index(self._file.read(index_length), 0, index_length, count)
+        # Anything after the current index is the remains of an append that never committed
+        self._file.truncate(index_offset + index_length)
+        self._file.seek(0, os.SEEK_END)
+        self.added = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.commit()
+        self._file.close()
+
+    def add(self, key: str, data: bytes) -> bool:
+        """Append a record unless the pack already holds identical content; returns True if appended"""
+        sha256 = hashlib.sha256(data).digest()
+        existing = self.entries.get(key)
+        if existing is not None and existing.sha256 == sha256:
+            return False
+        offset = self._file.tell()
+        self._file.write(data)
+        self.entries[key] = PackEntry(offset, len(data), sha256)
+        self.added += 1
+        return True
+
+    def add_question(self, question_id: str, kind: str, data: bytes) -> bool:
+        return self.add(record_key(question_id, kind), data)
+
+    def commit(self) -> None:
+        """Write the new index after the records, then repoint the header at it"""
+        if not self.added:
+            return
+        index = encode_index(self.entries)
+        index_offset = self._file.tell()
+        self._file.write(index)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, index_offset, len(index), len(self.entries)))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.seek(0, os.SEEK_END)
+        self.added = 0
+
+
+def question_files(questions_dir: str) -> Iterator[Path]:
+    for kind in KINDS:
+        yield from sorted(Path(questions_dir).glob(f"*.{kind}"))
+
+
+def pack_directory(questions_dir: str, pack_file: str) -> tuple[int, int]:
+    """Append every new or changed page/JSON file; returns (appended, unchanged)"""
+    appended = unchanged = 0
+    with PackWriter(pack_file) as writer:
+        for path in question_files(questions_dir):
+            if writer.add(path.name, path.read_bytes()):
+                appended += 1
+            else:
+                unchanged += 1
+    return appended, unchanged
+
+
+def verify_pack(questions_dir: Optional[str], pack_file: str) -> List[str]:
+    """Check record checksums and, given a directory, byte-for-byte equality both ways"""
+    problems = []
+    with QuestionPack(pack_file) as pack:
+        for key, entry in pack.entries.items():
+            record = pack.view_key(key)
+            if hashlib.sha256(record).digest() != entry.sha256:
+                problems.append(f"{key}: checksum mismatch")
+            record.release()
+
+        if questions_dir is not None:
+            on_disk = set()
+            for path in question_files(questions_dir):
+                on_disk.add(path.name)
+                if path.name not in pack:
+                    problems.append(f"{path.name}: missing from pack")
+                    continue
+                record = pack.view_key(path.name)
+                if record != path.read_bytes():
+                    problems.append(f"{path.name}: differs from pack")
+                record.release()
+            problems.extend(f"{key}: not in {questions_dir}" for key in sorted(set(pack.entries) - on_disk))
+    return problems
+
+
+def compact_pack(pack_file: str) -> tuple[int, int]:
+    """Rewrite the pack with live records only; returns (bytes before, bytes after)"""
+    before = os.path.getsize(pack_file)
+    tmp_file = f"{pack_file}.tmp"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+    with QuestionPack(pack_file) as pack, PackWriter(tmp_file) as writer:
+        for key in sorted(pack.entries):
+            record = pack.view_key(key)
+            writer.add(key, record)
+            record.release()
+    os.replace(tmp_file, pack_file)
+    return before, os.path.getsize(pack_file)
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Pack, verify and compact the question bank store")
+    parser.add_argument("command", choices=["pack", "verify", "compact"])
+    parser.add_argument("--dir", default=DEFAULT_QUESTIONS_DIR, help="cached questions directory")
+    parser.add_argument("--pack", default=DEFAULT_PACK_FILE, help="pack file")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == "pack":
+        print(f"📦 Packing {args.dir} into {args.pack}...")
+        appended, unchanged = pack_directory(args.dir, args.pack)
+        print(f"✅ {appended} records appended, {unchanged} unchanged "
+              f"({os.path.getsize(args.pack) / 1e6:.1f} MB, {time.perf_counter() - start:.2f}s)")
+    elif args.command == "verify":
+        print(f"🔍 Verifying {args.pack} against {args.dir}...")
+        problems = verify_pack(args.dir, args.pack)
+        if problems:
+            print(f"❌ {len(problems)} problems:")
+            for problem in problems[:20]:
+                print(f"  • {problem}")
+            raise SystemExit(1)
+        print(f"✅ Pack and directory match ({time.perf_counter() - start:.2f}s)")
+    else:
+        before, after = compact_pack(args.pack)
+        print(f"✅ Compacted {args.pack}: {before / 1e6:.1f} MB → {after / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
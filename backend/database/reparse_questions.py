@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Rebuild question JSON from the cached <id>.html pages, without any network access.
+
+Run after changing an extractor: every cached page is re-extracted in a
+process pool, JSON files are rewritten atomically (temp file + rename) only
+when their content changes, and a summary lists which fields changed for how
+many questions. Pages that turn out to be skips (images) or errors are
+reported and their existing JSON, if any, is left alone.
+
+Each page keeps the section of its existing JSON. New pages get the section
+of the module whose ID list (VerbalIDs, MathIDs) names them, as when they
+were downloaded, or else the one implied by the page's domain code; pages
+matching neither are reported as unsectioned and not written.
+
+With --pack, pages and previous JSON come from the question pack
+(question_pack.py) and changed JSON records are appended to it instead.
+
+Usage: python reparse_questions.py [--workers N] [--dry-run] [--questions-dir DIR | --pack [FILE]]
+   or: python final_sat_parser.py reparse [same options]
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+from collections import Counter, defaultdict
+from multiprocessing import Pool
+from typing import Dict, Optional, Tuple
+
+from final_sat_parser import (
+    MODULES, default_questions_dir, module_ids_file, extract_question_data_from_page, save_question_json
+)
+from page_extractor import QuestionPage, scan_question_page
+from question_pack import QuestionPack, PackWriter, DEFAULT_PACK_FILE
+
+CHUNK_SIZE = 16
+EXAMPLES_PER_FIELD = 5
+
+# primary_class_cd on the page -> section, for pages in no module's ID list
+DOMAIN_SECTIONS = {
+    **dict.fromkeys(("INI", "CAS", "EOI", "SEC"), MODULES["english"]["section"]),
+    **dict.fromkeys(("H", "P", "Q", "S"), MODULES["math"]["section"]),
+}
+
+
+def listed_sections() -> Dict[str, str]:
+    """Section of every question ID in the modules' ID lists, as the downloader tags them"""
+    sections = {}
+    for module, config in MODULES.items():
+        ids_file = module_ids_file(module)
+        if not os.path.exists(ids_file):
+            continue
+        with open(ids_file, 'r') as f:
+            for line in f:
+                if line.strip():
+                    sections[line.strip()] = config["section"]
+    return sections
+
+
+def page_section(page: QuestionPage) -> Optional[str]:
+    """Section implied by the page's domain code, or None if it has none we know"""
+    question_data = page.question_data() or {}
+    return DOMAIN_SECTIONS.get(question_data.get("primary_class_cd"))
+
+
+def reparse_content(question_id: str, page_html: str, previous: Optional[dict],
+                    listed_section: Optional[str] = None) -> Tuple[dict, Optional[dict]]:
+    """Re-extract one page; returns a status record and the new data when it should be written"""
+    record = {"question_id": question_id, "status": None, "fields": [], "error": None}
+    try:
+        page = scan_question_page(page_html)
+        # The section came from the module the page was downloaded from; keep it
+        section = (previous or {}).get("section") or listed_section or page_section(page)
+        extracted_data = extract_question_data_from_page(page, section)
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+        return record, None
+
+    if "error" in extracted_data:
+        status = "skipped" if extracted_data["error"].startswith("Skipping question:") else "error"
+        record.update(status=status, error=extracted_data["error"])
+        return record, None
+
+    if section is None:
+        record.update(status="unsectioned", error="Not in any module ID list and no known domain code")
+        return record, None
+
+    if previous == extracted_data:
+        record["status"] = "unchanged"
+        return record, None
+
+    if previous is None:
+        record["status"] = "new"
+    else:
+        record["status"] = "changed"
+        keys = set(previous) | set(extracted_data)
+        record["fields"] = sorted(key for key in keys if previous.get(key) != extracted_data.get(key))
+    return record, extracted_data
+
+
+def reparse_page(html_file: str, listed_section: Optional[str] = None, dry_run: bool = False) -> dict:
+    """Re-extract one cached page file and rewrite its JSON if it changed"""
+    questions_dir, filename = os.path.split(html_file)
+    question_id = filename[:-len(".html")]
+    json_file = os.path.join(questions_dir, f"{question_id}.json")
+    try:
+        with open(html_file, 'r', encoding='utf-8') as f:
+            page_html = f.read()
+        previous = None
+        if os.path.exists(json_file):
+            with open(json_file, 'r', encoding='utf-8') as f:
+                previous = json.load(f)
+    except Exception as e:
+        return {"question_id": question_id, "status": "error", "fields": [], "error": f"{type(e).__name__}: {e}"}
+
+    record, extracted_data = reparse_content(question_id, page_html, previous, listed_section)
+    if extracted_data is not None and not dry_run:
+        save_question_json(question_id, extracted_data, questions_dir)
+    return record
+
+
+def _reparse_task(args: tuple) -> dict:
+    return reparse_page(*args)
+
+
+def reparse_all(questions_dir: str, workers: Optional[int] = None, dry_run: bool = False) -> list:
+    """Re-extract every cached page in questions_dir across a process pool"""
+    html_files = sorted(glob.glob(os.path.join(questions_dir, "*.html")))
+    sections = listed_sections()
+    tasks = [(html_file, sections.get(os.path.basename(html_file)[:-len(".html")]), dry_run) for html_file in html_files]
+    with Pool(processes=workers) as pool:
+        return list(pool.imap_unordered(_reparse_task, tasks, chunksize=CHUNK_SIZE))
+
+
+# Set in each worker process by _open_worker_pack
+_worker_pack: Optional[QuestionPack] = None
+
+
+def _open_worker_pack(pack_file: str) -> None:
+    global _worker_pack
+    _worker_pack = QuestionPack(pack_file)
+
+
+def _reparse_packed_task(args: tuple) -> Tuple[dict, Optional[bytes]]:
+    """Re-extract one packed page; changed JSON comes back serialized for the parent to append"""
+    question_id, listed_section = args
+    try:
+        page_html = _worker_pack.text(question_id, "html")
+        previous = None
+        if _worker_pack.entry(question_id, "json") is not None:
+            previous = json.loads(_worker_pack.text(question_id, "json"))
+    except Exception as e:
+        return {"question_id": question_id, "status": "error", "fields": [], "error": f"{type(e).__name__}: {e}"}, None
+
+    record, extracted_data = reparse_content(question_id, page_html, previous, listed_section)
+    if extracted_data is None:
+        return record, None
+    return record, json.dumps(extracted_data, indent=2, ensure_ascii=False).encode("utf-8")
+
+
+def reparse_pack(pack_file: str, workers: Optional[int] = None, dry_run: bool = False) -> list:
+    """Re-extract every page in a question pack and append changed JSON records to it"""
+    with QuestionPack(pack_file) as pack:
+        question_ids = pack.question_ids("html")
+    sections = listed_sections()
+    tasks = [(question_id, sections.get(question_id)) for question_id in question_ids]
+    records = []
+    with Pool(processes=workers, initializer=_open_worker_pack, initargs=(pack_file,)) as pool:
+        results = pool.imap_unordered(_reparse_packed_task, tasks, chunksize=CHUNK_SIZE)
+        if dry_run:
+            return [record for record, _ in results]
+        with PackWriter(pack_file) as writer:
+            for record, json_bytes in results:
+                if json_bytes is not None:
+                    writer.add_question(record["question_id"], "json", json_bytes)
+                records.append(record)
+    return records
+
+
+def print_summary(records: list, dry_run: bool, elapsed: float) -> None:
+    statuses = Counter(record["status"] for record in records)
+    field_changes = defaultdict(list)
+    for record in records:
+        for field in record["fields"]:
+            field_changes[field].append(record["question_id"])
+
+    print("\n" + "=" * 60)
+    print("REPARSE COMPLETE!" + (" (dry run, nothing written)" if dry_run else ""))
+    print(f"Pages: {len(records)} in {elapsed:.1f}s ({len(records) / max(elapsed, 1e-9):,.0f} pages/sec)")
+    for status in ("unchanged", "changed", "new", "skipped", "unsectioned", "error"):
+        print(f"  {status:>11}: {statuses.get(status, 0)}")
+
+    if field_changes:
+        print("\nChanged fields:")
+        for field, question_ids in sorted(field_changes.items(), key=lambda item: (-len(item[1]), item[0])):
+            examples = ", ".join(sorted(question_ids)[:EXAMPLES_PER_FIELD])
+            more = "..." if len(question_ids) > EXAMPLES_PER_FIELD else ""
+            print(f"  {field:>18}: {len(question_ids):>5} questions ({examples}{more})")
+
+    unsectioned = sorted(record["question_id"] for record in records if record["status"] == "unsectioned")
+    if unsectioned:
+        print(f"\n⚠️  {len(unsectioned)} pages with no known section, not written:")
+        print(f"  {', '.join(unsectioned[:20])}{'...' if len(unsectioned) > 20 else ''}")
+
+    errors = [record for record in records if record["status"] == "error"]
+    if errors:
+        print(f"\n⚠️  {len(errors)} errors:")
+        for record in sorted(errors, key=lambda record: record["question_id"])[:20]:
+            print(f"  {record['question_id']}: {record['error']}")
+
+
+def main(argv: Optional[list] = None) -> None:
+    parser = argparse.ArgumentParser(description="Rebuild question JSON from cached HTML pages")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--dry-run", action="store_true", help="report changes without writing JSON")
+    parser.add_argument("--questions-dir", default=None, help="directory with cached pages (default: ./questions)")
+    parser.add_argument("--pack", nargs="?", const=DEFAULT_PACK_FILE, default=None,
+                        help="read pages from a question pack and append changed JSON to it")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.pack:
+        print(f"🔁 Re-extracting packed pages in {args.pack}...")
+        records = reparse_pack(args.pack, args.workers, args.dry_run)
+    else:
+        questions_dir = args.questions_dir or default_questions_dir()
+        print(f"🔁 Re-extracting cached pages in {questions_dir}...")
+        records = reparse_all(questions_dir, args.workers, args.dry_run)
+    print_summary(records, args.dry_run, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Minimal OpenAI-compatible chat completions server for exercising the tutor
+endpoints without the real API.
+
+Answers every request by echoing the last user message back word by word,
+streamed (stream=true) or whole, after FAKE_OPENAI_DELAY seconds per token.
+
+Usage: python fake_openai_server.py [port]
+       OPENAI_BASE_URL=http://localhost:8090/v1 OPENAI_API_KEY=fake uvicorn main:app
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+TOKEN_DELAY = float(os.getenv("FAKE_OPENAI_DELAY", "0.02"))
+MAX_ECHO_WORDS = 40
+
+app = FastAPI()
+
+
+def fake_tokens(body: dict) -> list:
+    user_messages = [m["content"] for m in body.get("messages", []) if m.get("role") == "user"]
+    words = (user_messages[-1] if user_messages else "").split()[-MAX_ECHO_WORDS:]
+    return ["You asked:"] + [f" {word}" for word in words]
+
+
+def completion_chunk(completion_id: str, model: str, delta: dict, finish_reason=None) -> str:
+    chunk = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "fake")
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    tokens = fake_tokens(body)
+
+    if body.get("stream"):
+        async def stream():
+            yield completion_chunk(completion_id, model, {"role": "assistant", "content": ""})
+            for token in tokens:
+                await asyncio.sleep(TOKEN_DELAY)
+                yield completion_chunk(completion_id, model, {"content": token})
+            yield completion_chunk(completion_id, model, {}, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    await asyncio.sleep(TOKEN_DELAY * len(tokens))
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": "".join(tokens)},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)},
+    }
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8090
+    print(f"🤖 Fake OpenAI server on http://localhost:{port}/v1")
+    uvicorn.run(app, host="127.0.0.1", port=port)
@@ -0,0 +1,150 @@
+"""
+Google ID token verification against Google's published signing keys.
+
+The JWKS is fetched once and kept in-process for as long as Google's
+Cache-Control max-age allows, so a normal login verifies the RS256
+signature locally without leaving the process. A token signed with an
+unknown kid (Google rotated keys) triggers one early refresh, at most
+once per KEY_REFRESH_MIN_INTERVAL_SECONDS. If a refresh fails, keys past
+their max-age are still used rather than failing every login.
+
+The key fetcher is injectable: GoogleKeyCache(fetch_jwks=...) takes any
+async callable returning (jwks_dict, max_age_seconds), so tests can sign
+tokens with a locally generated key set.
+
+GOOGLE_CLIENT_ID is required: without an audience to check, a token Google
+issued to any other app would log in here, so logins are refused instead.
+"""
+
+import asyncio
+import os
+import re
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import httpx
+import jwt
+
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ["accounts.google.com", "https://accounts.google.com"]
+GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
+
+DEFAULT_KEYS_MAX_AGE_SECONDS = 3600
+KEY_REFRESH_MIN_INTERVAL_SECONDS = 60
+CLOCK_SKEW_SECONDS = 30
+
+MAX_AGE_RE = re.compile(r'(?:^|,)\s*max-age\s*=\s*(\d+)', re.IGNORECASE)
+
+JwksFetcher = Callable[[], Awaitable[Tuple[dict, float]]]
+
+
+class GoogleAuthError(Exception):
+    """The credential is not a valid Google ID token for this app"""
+
+
+class GoogleKeysUnavailable(Exception):
+    """Google's signing keys could not be fetched and none are cached"""
+
+
+class GoogleAuthNotConfigured(Exception):
+    """GOOGLE_CLIENT_ID is not set, so no credential can be accepted"""
+
+
+def cache_max_age(cache_control: Optional[str], default: float = DEFAULT_KEYS_MAX_AGE_SECONDS) -> float:
+    """max-age from a Cache-Control header, or the default when absent"""
+    if cache_control:
+        match = MAX_AGE_RE.search(cache_control)
+        if match:
+            return float(match.group(1))
+    return default
+
+
+async def fetch_google_jwks() -> Tuple[dict, float]:
+    async with httpx.AsyncClient(timeout=10) as client:
+        response = await client.get(GOOGLE_CERTS_URL)
+        response.raise_for_status()
+        return response.json(), cache_max_age(response.headers.get("cache-control"))
+
+
+class GoogleKeyCache:
+    """Signing keys by kid, refreshed when Google's max-age runs out or an unknown kid shows up"""
+
+    def __init__(self, fetch_jwks: JwksFetcher = fetch_google_jwks):
+        self.fetch_jwks = fetch_jwks
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._expires_at = 0.0
+        self._fetched_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+        self.fetches = 0
+
+    async def refresh(self) -> None:
+        jwks, max_age = await self.fetch_jwks()
+        keys = {}
+        for key_data in jwks.get("keys", []):
+            if "kid" in key_data:
+                keys[key_data["kid"]] = jwt.PyJWK(key_data, algorithm=key_data.get("alg", "RS256"))
+        now = time.monotonic()
+        self._keys = keys
+        self._fetched_at = now
+        self._expires_at = now + max_age
+        self.fetches += 1
+
+    async def get_key(self, kid: str) -> jwt.PyJWK:
+        now = time.monotonic()
+        if kid in self._keys and now < self._expires_at:
+            return self._keys[kid]
+
+        async with self._lock:
+            # Another request may have refreshed while this one waited
+            now = time.monotonic()
+            expired = now >= self._expires_at
+            unknown_kid = kid not in self._keys
+            recently_fetched = self._fetched_at is not None and now - self._fetched_at < KEY_REFRESH_MIN_INTERVAL_SECONDS
+            if expired or (unknown_kid and not recently_fetched):
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    # Keys past their max-age still beat failing every login while Google is unreachable
+                    if unknown_kid:
+                        raise GoogleKeysUnavailable(f"Could not fetch Google signing keys: {e}") from e
+                    print(f"⚠️  Google signing key refresh failed, using cached keys: {e}")
+                    self._expires_at = now + KEY_REFRESH_MIN_INTERVAL_SECONDS
+
+        key = self._keys.get(kid)
+        if key is None:
+            raise GoogleAuthError(f"Unknown signing key {kid!r}")
+        return key
+
+
+google_keys = GoogleKeyCache()
+
+
+async def verify_google_credential(credential: str, keys: GoogleKeyCache = google_keys,
+                                   audience: Optional[str] = GOOGLE_CLIENT_ID) -> dict:
+    """Verified claims of a Google ID token; raises GoogleAuthError if anything is off.
+
+    The token must be issued for our OAuth client id; raises
+    GoogleAuthNotConfigured when there is none to check against.
+    """
+    if not audience:
+        raise GoogleAuthNotConfigured("GOOGLE_CLIENT_ID is not set; Google sign-in is disabled")
+    try:
+        header = jwt.get_unverified_header(credential)
+    except jwt.InvalidTokenError as e:
+        raise GoogleAuthError(f"Malformed credential: {e}")
+    if "kid" not in header:
+        raise GoogleAuthError("Credential has no key id")
+
+    key = await keys.get_key(header["kid"])
+    try:
+        return jwt.decode(
+            credential,
+            key,
+            algorithms=["RS256"],
+            audience=audience,
+            issuer=GOOGLE_ISSUERS,
+            leeway=CLOCK_SKEW_SECONDS,
+            options={"require": ["aud", "exp", "iat", "iss", "sub"]},
+        )
+    except jwt.InvalidTokenError as e:
+        raise GoogleAuthError(f"Invalid credential: {e}")
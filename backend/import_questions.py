@@ -5,25 +5,106 @@ Handles validation, error recovery, and safe batch processing.
 """
 
 import asyncio
+import hashlib
 import json
 import os
 import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional
 import html
 
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.exc import IntegrityError
 from db import engine, Question
+from question_events import notify_questions_changed
+from database.question_pack import QuestionPack, DEFAULT_PACK_FILE
+
+# Columns produced by map_json_to_question, in COPY order
+QUESTION_COLUMNS = [
+    "question_id", "image", "passage", "question",
+    "choice_a", "choice_b", "choice_c", "choice_d", "correct_choice",
+    "rationale_a", "rationale_b", "rationale_c", "rationale_d",
+    "difficulty", "domain", "skill", "section",
+]
+
+STAGING_TABLE = "questions_staging"
+# file_order lets the upsert keep the last file when two files share a question_id
+STAGING_COLUMNS = QUESTION_COLUMNS + ["file_order"]
+
+# Files per worker task, and parsed chunks allowed to wait for the DB writer
+PARSE_CHUNK_SIZE = 64
+PIPELINE_QUEUE_SIZE = 8
+
+
+class ImportManifest:
+    """Per-file record of what the bulk importer last loaded.
+
+    Maps each JSON filename to its mtime, size, content hash and the
+    question_id it produced. A file whose mtime and size are unchanged is
+    skipped without being opened; one that was only touched is re-hashed but
+    not sent to the database. Files that failed validation are recorded too,
+    with the error under "rejected", so an unchanged bad file is not re-parsed.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.files: Dict[str, Dict] = {}
+        if path.exists():
+            with open(path, 'r', encoding='utf-8') as f:
+                self.files = json.load(f).get("files", {})
+
+    def is_unchanged(self, json_file: Path) -> bool:
+        entry = self.files.get(json_file.name)
+        if not entry:
+            return False
+        stat = json_file.stat()
+        return entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size
+
+    def known_rejects(self, filenames: List[str]) -> List[Dict]:
+        """Reject records for files that failed last time and have not changed since"""
+        return [{"file": name, "error": self.files[name]["rejected"]}
+                for name in filenames if self.files.get(name, {}).get("rejected")]
+
+    def known_hashes(self, filenames: List[str]) -> Dict[str, str]:
+        return {name: self.files[name]["sha256"] for name in filenames if name in self.files}
+
+    def record(self, fingerprints: List[Dict]) -> None:
+        for fingerprint in fingerprints:
+            entry = dict(fingerprint)
+            self.files[entry.pop("file")] = entry
+
+    def forget_missing(self, present: set) -> None:
+        for name in [name for name in self.files if name not in present]:
+            del self.files[name]
+
+    def save(self) -> None:
+        """Write atomically so an interrupted run never leaves a truncated manifest"""
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": 1, "files": self.files}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
 
 class QuestionImporter:
-    def __init__(self, json_dir: str = "database/questions"):
+    def __init__(self, json_dir: str = "database/questions", reject_file: str = "import_rejects.jsonl",
+                 manifest_file: Optional[str] = None, pack_file: Optional[str] = None):
         self.json_dir = Path(json_dir)
+        # Bulk imports read from this question pack instead of json_dir when set
+        self.pack_file = pack_file
+        self.reject_file = Path(reject_file)
+        self.manifest_file = Path(manifest_file) if manifest_file else self.json_dir.parent / "import_manifest.json"
         self.imported_count = 0
+        self.updated_count = 0
         self.skipped_count = 0
         self.error_count = 0
         self.errors = []
+        self.rows_processed = 0
+        self.elapsed_seconds = 0.0
 
     def validate_json_data(self, data: Dict, filename: str) -> Optional[str]:
         """Validate JSON data structure and return error message if invalid."""
@@ -95,6 +176,8 @@ class QuestionImporter:
             "difficulty": data.get("difficulty", "Medium"),  # Default to Medium if missing
             "domain": self.clean_text(data.get("domain", "")),
             "skill": self.clean_text(data.get("skill", "")),
+            # Files written before the math module existed carry no section tag
+            "section": data.get("section") or "Reading and Writing",
         }
 
     async def question_exists(self, session: AsyncSession, question_id: str) -> bool:
@@ -148,8 +231,8 @@ class QuestionImporter:
         """Import questions from JSON files with specified limit."""
         print(f"🚀 Starting import of up to {limit} questions from {self.json_dir}")
         
-        # Find JSON files
-        json_files = list(self.json_dir.glob("*.json"))
+        # Find JSON files, sorted so that a limit always picks the same files
+        json_files = sorted(self.json_dir.glob("*.json"))
         if not json_files:
             print(f"❌ No JSON files found in {self.json_dir}")
             return
@@ -159,6 +242,8 @@ class QuestionImporter:
         print(f"📁 Found {len(json_files)} JSON files to process")
         print("=" * 60)
         
+        start = time.perf_counter()
+        self.rows_processed = len(json_files)
         async with AsyncSession(engine) as session:
             try:
                 # Process files in batches of 10 for better error recovery
@@ -191,19 +276,250 @@ class QuestionImporter:
                             except Exception as e:
                                 await session.rollback()
                                 self.errors.append(f"{json_file.name}: Commit failed - {str(e)}")
+
+                # Let running API servers drop their cached question index and filter options
+                if self.imported_count > 0:
+                    await notify_questions_changed(session)
+                    await session.commit()
                 
             except Exception as e:
                 await session.rollback()
                 print(f"❌ Critical error: {str(e)}")
                 self.errors.append(f"Critical error: {str(e)}")
+        self.elapsed_seconds = time.perf_counter() - start
+
+    def parse_question_file(self, json_file: Path) -> tuple[Optional[tuple], Optional[str]]:
+        """Read, validate and map one file to a row tuple in QUESTION_COLUMNS order.
+
+        Returns (row, None) on success or (None, error message) on failure.
+        """
+        try:
+            raw = json_file.read_bytes()
+        except OSError as e:
+            return None, f"Unreadable file - {str(e)}"
+        return self.parse_question_bytes(raw, json_file.name)
+
+    def parse_question_bytes(self, raw, filename: str) -> tuple[Optional[tuple], Optional[str]]:
+        """Validate and map the raw contents of one question file (see parse_question_file)"""
+        try:
+            # str() rather than .decode() so pack records can be passed as memoryviews
+            data = json.loads(str(raw, 'utf-8'))
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
+            return None, f"Invalid JSON - {str(e)}"
+
+        error = self.validate_json_data(data, filename)
+        if error:
+            return None, error
+
+        question_data = self.map_json_to_question(data)
+        return tuple(question_data[column] for column in QUESTION_COLUMNS), None
+
+    async def copy_rows(self, session: AsyncSession, rows: List[tuple]) -> None:
+        """Stream rows into the staging table with asyncpg's binary COPY"""
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            STAGING_TABLE, records=rows, columns=STAGING_COLUMNS
+        )
+
+    async def upsert_from_staging(self, session: AsyncSession) -> tuple[int, int]:
+        """Merge the staging table into questions; returns (inserted, updated)"""
+        columns = ", ".join(QUESTION_COLUMNS)
+        updatable = [column for column in QUESTION_COLUMNS if column != "question_id"]
+        assignments = ", ".join(f"{column} = EXCLUDED.{column}" for column in updatable)
+        current = ", ".join(f"questions.{column}" for column in updatable)
+        incoming = ", ".join(f"EXCLUDED.{column}" for column in updatable)
+        # ON CONFLICT cannot touch the same row twice in one statement; the last file wins
+        result = await session.execute(text(f"""
+            INSERT INTO questions ({columns})
+            SELECT DISTINCT ON (question_id) {columns} FROM {STAGING_TABLE}
+            ORDER BY question_id, file_order DESC
+            ON CONFLICT (question_id) DO UPDATE SET {assignments}
+            WHERE ({current}) IS DISTINCT FROM ({incoming})
+            RETURNING (xmax = 0) AS inserted
+        """))
+        # Unchanged rows are filtered by the WHERE clause and return nothing
+        flags = result.scalars().all()
+        inserted = sum(1 for flag in flags if flag)
+        return inserted, len(flags) - inserted
+
+    def write_rejects(self, rejects: List[Dict]) -> None:
+        """Replace the reject file with this run's rejects; a clean run removes it"""
+        for reject in rejects:
+            self.errors.append(f"{reject['file']}: {reject['error']}")
+        self.error_count = len(rejects)
+        if not rejects:
+            self.reject_file.unlink(missing_ok=True)
+            return
+        with open(self.reject_file, 'w', encoding='utf-8') as f:
+            for reject in rejects:
+                f.write(json.dumps(reject, ensure_ascii=False) + "\n")
+        print(f"  📝 Rejected rows written to {self.reject_file}")
+
+    async def parse_in_pool(self, pool: ProcessPoolExecutor, chunks: List[List[str]],
+                            queue: asyncio.Queue, max_in_flight: int, manifest: ImportManifest) -> None:
+        """Fan chunks out to worker processes and hand results to the writer in order.
+
+        At most max_in_flight chunks are parsing at once, and queue.put blocks
+        while the writer is behind, so memory stays bounded however many
+        files there are. If a worker fails (or the pool breaks) the exception
+        goes down the queue instead of the end marker, so the writer stops too.
+        """
+        loop = asyncio.get_running_loop()
+        in_flight = deque()
+        offset = 0
+        worker, source = parse_question_chunk, str(self.json_dir)
+        if self.pack_file:
+            worker, source = parse_pack_chunk, self.pack_file
+        try:
+            for chunk in chunks:
+                in_flight.append(loop.run_in_executor(
+                    pool, worker, source, chunk, offset, manifest.known_hashes(chunk)
+                ))
+                offset += len(chunk)
+                if len(in_flight) >= max_in_flight:
+                    await queue.put(await in_flight.popleft())
+            while in_flight:
+                await queue.put(await in_flight.popleft())
+        except Exception as e:
+            for future in in_flight:
+                future.cancel()
+            await queue.put(e)
+            raise
+        await queue.put(None)
+
+    async def write_from_queue(self, queue: asyncio.Queue, manifest: ImportManifest) -> List[Dict]:
+        """Drain parsed chunks into the staging table, then upsert and commit once; returns the rejects.
+
+        The staging table is created with the first row, so a run whose changed
+        files are all rejected never touches the database.
+        """
+        rejects = []
+        fingerprints = []
+        question_ids = set()
+        async with AsyncSession(engine) as session:
+            try:
+                columns = ", ".join(QUESTION_COLUMNS)
+
+                # COPY each chunk as soon as it is parsed, overlapping with parsing of later chunks
+                while (chunk := await queue.get()) is not None:
+                    if isinstance(chunk, Exception):
+                        raise chunk
+                    rows, chunk_rejects, chunk_fingerprints = chunk
+                    rejects.extend(chunk_rejects)
+                    fingerprints.extend(chunk_fingerprints)
+                    # Touched but identical files have a fingerprint and no row
+                    accepted = sum(1 for fingerprint in chunk_fingerprints if not fingerprint.get("rejected"))
+                    self.skipped_count += accepted - len(rows)
+                    if rows:
+                        if not question_ids:
+                            # Typed like questions but without its constraints or id sequence
+                            await session.execute(text(
+                                f"CREATE TEMP TABLE {STAGING_TABLE} ON COMMIT DROP AS "
+                                f"SELECT {columns}, 0 AS file_order FROM questions WITH NO DATA"
+                            ))
+                        await self.copy_rows(session, rows)
+                        question_ids.update(row[0] for row in rows)
+
+                if question_ids:
+                    self.imported_count, self.updated_count = await self.upsert_from_staging(session)
+                    self.skipped_count += len(question_ids) - self.imported_count - self.updated_count
+                    if self.imported_count or self.updated_count:
+                        await notify_questions_changed(session)
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                print(f"❌ Critical error: {str(e)}")
+                self.errors.append(f"Critical error: {str(e)}")
+                raise
+
+        # Only record files once their rows are committed
+        manifest.record(fingerprints)
+        return rejects
+
+    async def bulk_import(self, limit: Optional[int] = None, workers: Optional[int] = None,
+                          full: bool = False) -> None:
+        """Parse new or changed files in a process pool and stream them into one COPY + upsert.
+
+        With full=True the manifest is ignored and every file is re-read.
+        """
+        start = time.perf_counter()
+        source = self.pack_file or self.json_dir
+        manifest = ImportManifest(self.manifest_file)
+        if full:
+            manifest.files = {}
+
+        if self.pack_file:
+            # The pack index already holds each record's sha256, so unchanged records are never read
+            with QuestionPack(self.pack_file) as pack:
+                all_names = [f"{question_id}.json" for question_id in pack.question_ids("json")]
+                json_names = all_names[:limit] if limit else all_names
+                changed_names = [name for name in json_names
+                                 if manifest.files.get(name, {}).get("sha256") != pack.entries[name].sha256.hex()]
+        else:
+            all_files = sorted(self.json_dir.glob("*.json"))
+            all_names = [json_file.name for json_file in all_files]
+            json_files = all_files[:limit] if limit else all_files
+            json_names = [json_file.name for json_file in json_files]
+            changed_names = [json_file.name for json_file in json_files if not manifest.is_unchanged(json_file)]
+
+        if not json_names:
+            print(f"❌ No JSON files found in {source}")
+            self.write_rejects([])
+            return
+        # Unchanged files that were rejected last time are still rejected, without re-parsing them
+        changed = set(changed_names)
+        known_rejects = manifest.known_rejects([name for name in json_names if name not in changed])
+        self.skipped_count = len(json_names) - len(changed_names) - len(known_rejects)
+        self.rows_processed = len(json_names)
+
+        if not changed_names:
+            # Nothing to parse and nothing to send: no process pool, no DB connection
+            self.write_rejects(known_rejects)
+            self.elapsed_seconds = time.perf_counter() - start
+            print(f"✨ All {len(json_names)} files unchanged since the last import ({self.manifest_file})")
+            return
+
+        workers = workers or os.cpu_count() or 1
+        print(f"🚀 Bulk importing {len(changed_names)} new or changed JSON files from {source} "
+              f"({self.skipped_count} unchanged, {workers} workers)")
+        print("=" * 60)
+
+        chunks = [changed_names[i:i + PARSE_CHUNK_SIZE] for i in range(0, len(changed_names), PARSE_CHUNK_SIZE)]
+        queue: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            producer = asyncio.create_task(self.parse_in_pool(pool, chunks, queue, workers * 2, manifest))
+            writer = asyncio.create_task(self.write_from_queue(queue, manifest))
+            await asyncio.wait({producer, writer}, return_when=asyncio.FIRST_EXCEPTION)
+            if writer.done() and writer.exception() is not None:
+                # Nothing will drain the queue any more; stop feeding it
+                producer.cancel()
+            # A failed producer has queued its exception, so the writer rolls back and finishes
+            results = await asyncio.gather(writer, producer, return_exceptions=True)
+            for result in results:
+                if isinstance(result, BaseException) and not isinstance(result, asyncio.CancelledError):
+                    # The manifest is not saved: nothing from this run was committed
+                    raise result
+        self.write_rejects(known_rejects + writer.result())
+
+        if not limit:
+            manifest.forget_missing(set(all_names))
+        manifest.save()
+        self.elapsed_seconds = time.perf_counter() - start
 
     def print_summary(self):
         """Print import summary and errors."""
         print("\n" + "=" * 60)
         print("📊 IMPORT SUMMARY")
         print(f"✅ Successfully imported: {self.imported_count}")
+        if self.updated_count:
+            print(f"🔄 Updated (content changed): {self.updated_count}")
         print(f"⏭️  Skipped (already exists): {self.skipped_count}")
         print(f"❌ Errors: {self.error_count}")
+        if self.elapsed_seconds > 0:
+            print(f"⏱️  {self.rows_processed} files in {self.elapsed_seconds:.2f}s "
+                  f"({self.rows_processed / self.elapsed_seconds:,.0f} rows/sec)")
         
         if self.errors:
             print(f"\n🚨 ERRORS ({len(self.errors)}):")
@@ -215,22 +531,117 @@ class QuestionImporter:
         if self.imported_count > 0:
             print(f"\n🎉 Successfully added {self.imported_count} questions to the database!")
 
+def parse_question_chunk(json_dir: str, filenames: List[str], offset: int,
+                         known_hashes: Dict[str, str]) -> tuple[List[tuple], List[Dict], List[Dict]]:
+    """Worker process entry point: parse, validate and map a chunk of files.
+
+    Returns staging rows (question columns plus file order), reject records and
+    manifest fingerprints. Files whose content hash matches known_hashes were
+    only touched, not changed, so they produce a fingerprint but no row.
+    """
+    importer = QuestionImporter(json_dir)
+    rows, rejects, fingerprints = [], [], []
+    for i, filename in enumerate(filenames):
+        path = importer.json_dir / filename
+        try:
+            stat = path.stat()
+            raw = path.read_bytes()
+        except OSError as e:
+            rejects.append({"file": filename, "error": f"Unreadable file - {str(e)}"})
+            continue
+
+        row, error = importer.parse_question_bytes(raw, filename)
+        sha256 = hashlib.sha256(raw).hexdigest()
+        if error:
+            rejects.append({"file": filename, "error": error})
+            fingerprints.append({
+                "file": filename, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+                "sha256": sha256, "question_id": None, "rejected": error
+            })
+            continue
+
+        fingerprints.append({
+            "file": filename, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size,
+            "sha256": sha256, "question_id": row[0]
+        })
+        if known_hashes.get(filename) != sha256:
+            rows.append(row + (offset + i,))
+    return rows, rejects, fingerprints
+
+# Each worker process maps the pack once and reuses it for every chunk
+_worker_packs: Dict[str, QuestionPack] = {}
+
+def parse_pack_chunk(pack_file: str, filenames: List[str], offset: int,
+                     known_hashes: Dict[str, str]) -> tuple[List[tuple], List[Dict], List[Dict]]:
+    """Worker process entry point for pack imports (see parse_question_chunk).
+
+    Records are parsed straight from the memory-mapped pack, and their
+    fingerprints use the sha256 stored in the pack index.
+    """
+    if pack_file not in _worker_packs:
+        _worker_packs[pack_file] = QuestionPack(pack_file)
+    pack = _worker_packs[pack_file]
+    importer = QuestionImporter()
+    rows, rejects, fingerprints = [], [], []
+    for i, filename in enumerate(filenames):
+        entry = pack.entries[filename]
+        raw = pack.view_key(filename)
+        row, error = importer.parse_question_bytes(raw, filename)
+        raw.release()
+        sha256 = entry.sha256.hex()
+        if error:
+            rejects.append({"file": filename, "error": error})
+            fingerprints.append({
+                "file": filename, "mtime_ns": None, "size": entry.length,
+                "sha256": sha256, "question_id": None, "rejected": error
+            })
+            continue
+
+        fingerprints.append({
+            "file": filename, "mtime_ns": None, "size": entry.length,
+            "sha256": sha256, "question_id": row[0]
+        })
+        if known_hashes.get(filename) != sha256:
+            rows.append(row + (offset + i,))
+    return rows, rejects, fingerprints
+
 async def main():
     """Main import function."""
     # Parse command line arguments
-    limit = 50
-    if len(sys.argv) > 1:
+    args = sys.argv[1:]
+    bulk = bool(args) and args[0] == "bulk"
+    if bulk:
+        args = args[1:]
+    # "bulk full" ignores the import manifest and re-reads every file
+    full = bulk and bool(args) and args[0] == "full"
+    if full:
+        args = args[1:]
+    # "bulk pack" reads database/questions.pack (question_pack.py) instead of the JSON directory
+    pack = bulk and bool(args) and args[0] == "pack"
+    if pack:
+        args = args[1:]
+
+    limit = None if bulk else 50
+    if args:
         try:
-            limit = int(sys.argv[1])
+            limit = int(args[0])
         except ValueError:
-            print("Usage: python import_questions.py [limit]")
+            print("Usage: python import_questions.py [bulk [full] [pack]] [limit]")
             print("Example: python import_questions.py 100")
+            print("Example: python import_questions.py bulk")
+            print("Example: python import_questions.py bulk full")
+            print("Example: python import_questions.py bulk pack")
             return
     
     # Create importer and run
-    importer = QuestionImporter()
-    await importer.import_questions(limit)
-    importer.print_summary()
+    importer = QuestionImporter(pack_file=DEFAULT_PACK_FILE if pack else None)
+    try:
+        if bulk:
+            await importer.bulk_import(limit, full=full)
+        else:
+            await importer.import_questions(limit)
+    finally:
+        importer.print_summary()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,21 +1,24 @@
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import insert, select
+from sqlalchemy import insert
 from pydantic import BaseModel
 from dotenv import load_dotenv
 import os
-import jwt
 import datetime
-import openai
 
-from db import User, SessionLocal, engine, Base, Question
+from db import SessionLocal, Base, Question, get_db, pool_status
 from questions_api import router as questions_router
+from question_index import question_index
+from question_events import question_bank, notify_questions_changed, start_question_listener, stop_question_listener
 from vocabulary_api import router as vocabulary_router
+from user_progress_api import router as progress_router
+from tutor_api import router as tutor_router, tutor
+from auth import issue_session_token, require_session_secret, upsert_google_user, user_id_cache, SESSION_TTL_SECONDS
+from google_auth import verify_google_credential, GoogleAuthError, GoogleAuthNotConfigured, GoogleKeysUnavailable
 
 
 load_dotenv()
-openai.api_key = os.getenv("OPENAI_API_KEY")
 
 app = FastAPI()
 
@@ -28,7 +31,8 @@ app.add_middleware(
     ],
     allow_credentials=True,
     allow_methods=["*"],
-    allow_headers=["*"]
+    allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"]
 )
 
 # --- Include questions API router ---
@@ -37,12 +41,25 @@ app.include_router(questions_router)
 # --- Include vocabulary API router ---
 app.include_router(vocabulary_router)
 
-class DialogRequest(BaseModel):
-    passage: str
-    question: str
-    answer_explanation: str
-    user_message: str
+# --- Include progress API router ---
+app.include_router(progress_router)
+
+# --- Include tutor dialog router ---
+app.include_router(tutor_router)
+
 
+@app.on_event("startup")
+async def load_question_index():
+    require_session_secret()
+    await start_question_listener()
+    async with SessionLocal() as session:
+        await question_index.load(session)
+
+
+@app.on_event("shutdown")
+async def close_question_listener():
+    await stop_question_listener()
+    await tutor.close()
 
 # Model for creating a new SAT question
 class QuestionCreate(BaseModel):
@@ -61,15 +78,18 @@ class QuestionCreate(BaseModel):
     difficulty: str  # Must be one of: Easy, Medium, Hard, Very Hard
     domain: str      # e.g. Craft and Structure
     skill: str       # e.g. Cross-Text Connections
+    section: str = "Reading and Writing"  # or Math
 
 # Endpoint to add a new SAT question
 @app.post("/questions")
-async def create_question(q: QuestionCreate):
+async def create_question(q: QuestionCreate, session: AsyncSession = Depends(get_db)):
     try:
-        async with AsyncSession(engine) as session:
-            stmt = insert(Question).values(**q.dict())
-            await session.execute(stmt)
-            await session.commit()
+        stmt = insert(Question).values(**q.dict())
+        await session.execute(stmt)
+        await notify_questions_changed(session)
+        await session.commit()
+        # Other workers are invalidated by the NOTIFY; don't wait for ours
+        question_bank.bump()
         return {"status": "ok"}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -80,40 +100,25 @@ def read_root():
     return {"Hello": "World"}
 
 
-@app.post("/dialog")
-async def dialog(req: DialogRequest):
-    import openai
-    prompt = (
-        "You are an expert SAT tutor. Use the reading passage, the question, and the official answer explanation to answer the user's follow-up question. "
-        "Be concise, factual, and only answer within the context of the SAT material provided, and SAT in general like Erica Grammar/Reading, Hard SAT questions, Panda, etc. If the user asks something off-topic, irrelevant, or not related to SAT, respond with something helping, determining, motivating to study the SAT. Do not provide generic, evasive, or off-topic responses.\n"
-        f"Reading Passage: {req.passage}\n"
-        f"Question: {req.question}\n"
-        f"Official Answer Explanation: {req.answer_explanation}\n"
-        f"User: {req.user_message}\nAnswer:"
-    )
-    try:
-        response = openai.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "Stick to the context. You are an expert SAT tutor. Use the reading passage, the question, and the official answer explanation to answer the user's follow-up question. Be concise, factual, and only answer within the context of the SAT material provided, and SAT in general like Erica Grammar/Reading, Hard SAT questions, Panda, etc. If the user asks something off-topic, irrelevant, or not related to SAT, respond with something helping, determining, motivating to study the SAT. Do not provide generic, evasive, or off-topic responses.\n"},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=512,
-            temperature=0.2,
-        )
-        answer = response.choices[0].message.content.strip()
-        return {"answer": answer}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+@app.get("/health")
+def health():
+    """Liveness plus connection pool occupancy and checkout wait times for this worker"""
+    return {"status": "ok", "pid": os.getpid(), "db_pool": pool_status()}
+
 
 class GoogleAuthRequest(BaseModel):
     credential: str
 
 @app.post("/auth/google")
-async def auth_google(req: GoogleAuthRequest):
+async def auth_google(req: GoogleAuthRequest, session: AsyncSession = Depends(get_db)):
+    try:
+        payload = await verify_google_credential(req.credential)
+    except GoogleAuthError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    except (GoogleKeysUnavailable, GoogleAuthNotConfigured) as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
     try:
-        # Decode JWT without verification (for demo; in prod, verify with Google certs)
-        payload = jwt.decode(req.credential, options={"verify_signature": False})
         # Extract all available fields
         user_data = {
             "sub": payload.get("sub"),
@@ -126,17 +131,13 @@ async def auth_google(req: GoogleAuthRequest):
             "email_verified": str(payload.get("email_verified")),
             "hd": payload.get("hd"),
         }
-        async with AsyncSession(engine) as session:
-            result = await session.execute(select(User).where(User.sub == user_data["sub"]))
-            user = result.scalar_one_or_none()
-            if user:
-                # Update existing user
-                for k, v in user_data.items():
-                    setattr(user, k, v)
-            else:
-                user = User(**user_data)
-                session.add(user)
-            await session.commit()
-        return {"status": "ok", "user": user_data}
+        user_id, updated = await upsert_google_user(session, user_data)
+        if updated:
+            # The row changed under tokens cached by this worker; start from the new session
+            user_id_cache.invalidate_sub(user_data["sub"])
+        session_token = issue_session_token(user_id, user_data["sub"])
+        return {"status": "ok", "user": user_data, "session_token": session_token, "expires_in": SESSION_TTL_SECONDS}
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=str(e))
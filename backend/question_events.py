@@ -0,0 +1,106 @@
+"""
+Question bank change notifications.
+
+Writers (POST /questions, import_questions.py) call notify_questions_changed()
+inside their transaction; Postgres delivers the NOTIFY on commit to every API
+process listening on the channel, which bumps the in-process question bank
+version. Caches derived from the questions table compare against that version
+to decide when to rebuild.
+
+If the listening connection drops, notifications sent meanwhile are lost, so
+the version is bumped and the listener reconnects in the background (and
+bumps again once it is back). Caches also expire after a TTL as a backstop.
+"""
+
+import asyncio
+import asyncpg
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import DATABASE_URL
+
+QUESTIONS_CHANNEL = "questions_changed"
+LISTENER_RECONNECT_DELAY_SECONDS = 1
+LISTENER_RECONNECT_MAX_DELAY_SECONDS = 30
+
+
+class QuestionBankVersion:
+    """Monotonic counter bumped whenever the questions table changes"""
+
+    def __init__(self):
+        self.version = 0
+
+    def bump(self) -> int:
+        self.version += 1
+        return self.version
+
+
+question_bank = QuestionBankVersion()
+
+_listener_connection: Optional[asyncpg.Connection] = None
+_reconnect_task: Optional[asyncio.Task] = None
+
+
+async def notify_questions_changed(session: AsyncSession) -> None:
+    """Queue a change notification; delivered when the session commits"""
+    await session.execute(text("SELECT pg_notify(:channel, '')"), {"channel": QUESTIONS_CHANNEL})
+
+
+def _on_questions_changed(connection, pid, channel, payload) -> None:
+    question_bank.bump()
+
+
+async def _connect_listener() -> None:
+    global _listener_connection
+    dsn = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+    connection = await asyncpg.connect(dsn)
+    await connection.add_listener(QUESTIONS_CHANNEL, _on_questions_changed)
+    connection.add_termination_listener(_on_listener_terminated)
+    _listener_connection = connection
+
+
+def _on_listener_terminated(connection) -> None:
+    global _listener_connection, _reconnect_task
+    if connection is not _listener_connection:
+        return
+    _listener_connection = None
+    # Changes committed while nobody listens are never delivered; assume there were some
+    question_bank.bump()
+    print("⚠️  Question change listener disconnected, reconnecting...")
+    _reconnect_task = asyncio.get_running_loop().create_task(_reconnect_listener())
+
+
+async def _reconnect_listener() -> None:
+    delay = LISTENER_RECONNECT_DELAY_SECONDS
+    while True:
+        try:
+            await _connect_listener()
+        except Exception as e:
+            print(f"⚠️  Question change listener reconnect failed, retrying in {delay}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, LISTENER_RECONNECT_MAX_DELAY_SECONDS)
+            continue
+        # Anything committed between the drop and now was missed as well
+        question_bank.bump()
+        print("✅ Question change listener reconnected")
+        return
+
+
+async def start_question_listener() -> None:
+    """Open a dedicated connection that LISTENs for question bank changes"""
+    if _listener_connection is not None or _reconnect_task is not None and not _reconnect_task.done():
+        return
+    await _connect_listener()
+
+
+async def stop_question_listener() -> None:
+    global _listener_connection, _reconnect_task
+    if _reconnect_task is not None:
+        _reconnect_task.cancel()
+        _reconnect_task = None
+    if _listener_connection is None:
+        return
+    connection, _listener_connection = _listener_connection, None
+    connection.remove_termination_listener(_on_listener_terminated)
+    await connection.close()
@@ -0,0 +1,97 @@
+import os
+import random
+import time
+from itertools import product
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from db import Question
+from question_events import question_bank
+
+# Safety net in case a change notification is missed (e.g. listener reconnecting)
+QUESTION_INDEX_TTL_SECONDS = float(os.getenv("QUESTION_INDEX_TTL_SECONDS", "300"))
+
+IndexKey = Tuple[Optional[str], Optional[str], Optional[str], Optional[str]]
+
+
+def normalize_filter(value: Optional[str]) -> Optional[str]:
+    """Treat missing values and "Any" the same way: no filter"""
+    if not value or value == "Any":
+        return None
+    return value
+
+
+class QuestionIndex:
+    """In-process index of question ids keyed by (domain, skill, difficulty, section).
+
+    Every question is stored under all 16 wildcard combinations of its key, with
+    None meaning "Any", so a lookup for any filter combination is a single dict
+    access and a random pick is a random.choice over a list.
+    """
+
+    def __init__(self, ttl_seconds: float = QUESTION_INDEX_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._ids_by_key: Dict[IndexKey, List[int]] = {}
+        self._loaded_at: Optional[float] = None
+        self._version: Optional[int] = None
+
+    @property
+    def is_stale(self) -> bool:
+        if self._loaded_at is None or self._version != question_bank.version:
+            return True
+        return time.monotonic() - self._loaded_at > self.ttl_seconds
+
+    @property
+    def total(self) -> int:
+        return len(self._ids_by_key.get((None, None, None, None), []))
+
+    def invalidate(self) -> None:
+        """Force a reload on the next lookup"""
+        self._loaded_at = None
+
+    def _add(self, ids_by_key: Dict[IndexKey, List[int]], question_id: int,
+             domain: Optional[str], skill: Optional[str], difficulty: Optional[str],
+             section: Optional[str]) -> None:
+        # A set collapses duplicate keys for rows that have NULL columns
+        keys = set(product((domain, None), (skill, None), (difficulty, None), (section, None)))
+        for key in keys:
+            ids_by_key.setdefault(key, []).append(question_id)
+
+    async def load(self, session: AsyncSession) -> None:
+        """(Re)build the index from the questions table"""
+        # Capture the version first so a change during the query triggers another reload
+        version = question_bank.version
+        result = await session.execute(
+            select(Question.id, Question.domain, Question.skill, Question.difficulty, Question.section)
+        )
+        ids_by_key: Dict[IndexKey, List[int]] = {}
+        for row in result.all():
+            self._add(ids_by_key, row.id, row.domain, row.skill, row.difficulty, row.section)
+
+        # Swap in one assignment so concurrent readers never see a half-built index
+        self._ids_by_key = ids_by_key
+        self._loaded_at = time.monotonic()
+        self._version = version
+
+    async def ensure_fresh(self, session: AsyncSession) -> None:
+        if self.is_stale:
+            await self.load(session)
+
+    def candidates(self, domain: Optional[str] = None, skill: Optional[str] = None,
+                   difficulty: Optional[str] = None, section: Optional[str] = None) -> List[int]:
+        key = (normalize_filter(domain), normalize_filter(skill), normalize_filter(difficulty),
+               normalize_filter(section))
+        return self._ids_by_key.get(key, [])
+
+    def pick(self, domain: Optional[str] = None, skill: Optional[str] = None,
+             difficulty: Optional[str] = None, section: Optional[str] = None) -> Optional[int]:
+        """Return a random question primary key matching the filters, or None"""
+        ids = self.candidates(domain, skill, difficulty, section)
+        if not ids:
+            return None
+        return random.choice(ids)
+
+
+question_index = QuestionIndex()
@@ -1,127 +1,222 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+import hashlib
+import json
+import time
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import and_, func
+from sqlalchemy import and_
 from typing import Optional
-from db import Question, engine
+from db import Question, get_db
+from question_events import question_bank
+from question_index import QUESTION_INDEX_TTL_SECONDS, question_index
+from serialization import ORJSONResponse, rows_to_dicts
 
 router = APIRouter()
 
-@router.get("/questions")
+# Columns a client may request through ?fields=; "id" is always returned because it is the cursor
+QUESTION_FIELDS = [column.name for column in Question.__table__.columns]
+
+
+def parse_fields(fields: Optional[str]) -> list:
+    """Resolve a comma separated ?fields= value to Question columns"""
+    if not fields:
+        return list(Question.__table__.columns)
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in QUESTION_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    if "id" not in names:
+        names.insert(0, "id")
+    return [Question.__table__.columns[name] for name in names]
+
+
+async def fetch_question_row(session: AsyncSession, question_pk: int) -> Optional[dict]:
+    """Fetch one question by primary key as a plain dict"""
+    result = await session.execute(
+        select(*Question.__table__.columns).where(Question.id == question_pk)
+    )
+    row = result.first()
+    if row is None:
+        return None
+    return dict(zip(QUESTION_FIELDS, row))
+
+
+@router.get("/questions", response_class=ORJSONResponse)
 async def get_questions(
     domain: Optional[str] = Query(None, description="Filter by domain (or 'Any' for all)"),
     skill: Optional[str] = Query(None, description="Filter by skill (or 'Any' for all)"),
     difficulty: Optional[str] = Query(None, description="Filter by difficulty (or 'Any' for all)"),
-    limit: Optional[int] = Query(None, description="Limit number of results")
+    section: Optional[str] = Query(None, description="Filter by section, e.g. Math (or 'Any' for all)"),
+    limit: Optional[int] = Query(None, ge=1, description="Limit number of results (page size)"),
+    cursor: Optional[int] = Query(None, description="Return questions after this id (next_cursor of the previous page)"),
+    fields: Optional[str] = Query(None, description="Comma separated columns to return, e.g. id,skill,difficulty"),
+    session: AsyncSession = Depends(get_db)
 ):
-    async with AsyncSession(engine) as session:
-        # Build query with optional filters
-        query = select(Question)
-        filters = []
+    columns = parse_fields(fields)
+
+    # Build query with optional filters, ordered by id so pages are stable
+    query = select(*columns).order_by(Question.id)
+    filters = []
         
-        # Apply filters only if they're not "Any" or None
-        if domain and domain != "Any":
-            filters.append(Question.domain == domain)
-        if skill and skill != "Any":
-            filters.append(Question.skill == skill)
-        if difficulty and difficulty != "Any":
-            filters.append(Question.difficulty == difficulty)
+    # Apply filters only if they're not "Any" or None
+    if domain and domain != "Any":
+        filters.append(Question.domain == domain)
+    if skill and skill != "Any":
+        filters.append(Question.skill == skill)
+    if difficulty and difficulty != "Any":
+        filters.append(Question.difficulty == difficulty)
+    if section and section != "Any":
+        filters.append(Question.section == section)
+
+    # Keyset pagination: continue after the last id of the previous page
+    if cursor is not None:
+        filters.append(Question.id > cursor)
         
-        # Apply filters if any exist
-        if filters:
-            query = query.where(and_(*filters))
+    # Apply filters if any exist
+    if filters:
+        query = query.where(and_(*filters))
         
-        # Apply limit if specified
-        if limit:
-            query = query.limit(limit)
+    # Apply limit if specified
+    if limit:
+        query = query.limit(limit)
             
-        result = await session.execute(query)
-        questions = result.scalars().all()
-        
-        # Convert to dicts for JSON serialization and filter out SQLAlchemy internal attributes
-        questions_list = [{k: v for k, v in q.__dict__.items() if not k.startswith('_')} for q in questions]
-        return {
-            "questions": questions_list,
-            "total": len(questions_list),
-            "filters_applied": {
-                "domain": domain if domain != "Any" else None,
-                "skill": skill if skill != "Any" else None, 
-                "difficulty": difficulty if difficulty != "Any" else None
-            }
+    # Plain row tuples: no ORM identity map or instance state to build and discard
+    result = await session.execute(query)
+    questions_list = rows_to_dicts(result.keys(), result.all())
+
+    # A full page means there may be more; an empty or short page ends the listing
+    next_cursor = None
+    if limit and len(questions_list) == limit:
+        next_cursor = questions_list[-1]["id"]
+
+    return ORJSONResponse({
+        "questions": questions_list,
+        "total": len(questions_list),
+        "next_cursor": next_cursor,
+        "filters_applied": {
+            "domain": domain if domain != "Any" else None,
+            "skill": skill if skill != "Any" else None, 
+            "difficulty": difficulty if difficulty != "Any" else None,
+            "section": section if section != "Any" else None
         }
+    })
 
-@router.get("/questions/random")
+@router.get("/questions/random", response_class=ORJSONResponse)
 async def get_random_question(
     domain: Optional[str] = Query(None, description="Filter by domain (or 'Any' for all)"),
     skill: Optional[str] = Query(None, description="Filter by skill (or 'Any' for all)"),
-    difficulty: Optional[str] = Query(None, description="Filter by difficulty (or 'Any' for all)")
+    difficulty: Optional[str] = Query(None, description="Filter by difficulty (or 'Any' for all)"),
+    section: Optional[str] = Query(None, description="Filter by section, e.g. Math (or 'Any' for all)"),
+    session: AsyncSession = Depends(get_db)
 ):
-    """Get a single random question, optionally filtered by domain, skill, and/or difficulty"""
-    async with AsyncSession(engine) as session:
-        # Build query with optional filters
-        query = select(Question)
-        filters = []
-        
-        # Apply filters only if they're not "Any" or None
-        if domain and domain != "Any":
-            filters.append(Question.domain == domain)
-        if skill and skill != "Any":
-            filters.append(Question.skill == skill)
-        if difficulty and difficulty != "Any":
-            filters.append(Question.difficulty == difficulty)
-        
-        # Apply filters if any exist
-        if filters:
-            query = query.where(and_(*filters))
-        
-        # Order by random and get one result
-        query = query.order_by(func.random()).limit(1)
-            
-        result = await session.execute(query)
-        question = result.scalar_one_or_none()
+    """Get a single random question, optionally filtered by domain, skill, difficulty and/or section"""
+    await question_index.ensure_fresh(session)
+
+    # O(1) draw from the in-memory index, then a single primary-key fetch
+    question_dict = None
+    question_pk = question_index.pick(domain, skill, difficulty, section)
+    if question_pk is not None:
+        question_dict = await fetch_question_row(session, question_pk)
+        if question_dict is None:
+            # Row vanished since the index was built; rebuild and try once more
+            await question_index.load(session)
+            question_pk = question_index.pick(domain, skill, difficulty, section)
+            if question_pk is not None:
+                question_dict = await fetch_question_row(session, question_pk)
         
-        if not question:
-            raise HTTPException(status_code=404, detail="No questions found matching the specified criteria")
+    if not question_dict:
+        raise HTTPException(status_code=404, detail="No questions found matching the specified criteria")
         
-        # Convert to dict for JSON serialization
-        question_dict = {k: v for k, v in question.__dict__.items() if not k.startswith('_')}
-        return {
-            "question": question_dict,
-            "filters_applied": {
-                "domain": domain if domain != "Any" else None,
-                "skill": skill if skill != "Any" else None,
-                "difficulty": difficulty if difficulty != "Any" else None
-            }
+    return ORJSONResponse({
+        "question": question_dict,
+        "filters_applied": {
+            "domain": domain if domain != "Any" else None,
+            "skill": skill if skill != "Any" else None,
+            "difficulty": difficulty if difficulty != "Any" else None,
+            "section": section if section != "Any" else None
         }
+    })
 
-@router.get("/questions/filter-options")
-async def get_filter_options():
-    """Get available filter options for domains, skills, and difficulties"""
-    async with AsyncSession(engine) as session:
-        # Get unique domains
-        domain_result = await session.execute(select(Question.domain).distinct())
-        domains = [row[0] for row in domain_result.fetchall() if row[0]]
-        
-        # Get unique skills
-        skill_result = await session.execute(select(Question.skill).distinct())
-        skills = [row[0] for row in skill_result.fetchall() if row[0]]
-        
-        # Get unique difficulties
-        difficulty_result = await session.execute(select(Question.difficulty).distinct())
-        difficulties = [row[0] for row in difficulty_result.fetchall() if row[0]]
-        
-        # Build dynamic domain-skill mapping based on actual data
-        domain_skill_mapping = {}
-        for domain in domains:
-            skill_result = await session.execute(
-                select(Question.skill).distinct().where(Question.domain == domain)
-            )
-            domain_skills = [row[0] for row in skill_result.fetchall() if row[0]]
-            domain_skill_mapping[domain] = sorted(domain_skills)
-        
-        return {
+class FilterOptionsCache:
+    """Filter taxonomy cached per question bank version, with a content ETag.
+
+    Like question_index, it also expires after QUESTION_INDEX_TTL_SECONDS in
+    case a change notification was missed.
+    """
+
+    def __init__(self, ttl_seconds: float = QUESTION_INDEX_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.payload: Optional[dict] = None
+        self.etag: Optional[str] = None
+        self._loaded_at: Optional[float] = None
+        self._version: Optional[int] = None
+
+    @property
+    def is_stale(self) -> bool:
+        if self.payload is None or self._version != question_bank.version:
+            return True
+        return time.monotonic() - self._loaded_at > self.ttl_seconds
+
+    async def load(self, session: AsyncSession) -> None:
+        version = question_bank.version
+
+        # One grouped query returns every (domain, skill, difficulty, section) combination in use
+        result = await session.execute(
+            select(Question.domain, Question.skill, Question.difficulty, Question.section)
+            .group_by(Question.domain, Question.skill, Question.difficulty, Question.section)
+        )
+
+        domains, skills, difficulties, sections = set(), set(), set(), set()
+        domain_skills = {}
+        section_domains = {}
+        for domain, skill, difficulty, section in result.all():
+            if section:
+                sections.add(section)
+                section_domains.setdefault(section, set())
+                if domain:
+                    section_domains[section].add(domain)
+            if domain:
+                domains.add(domain)
+                domain_skills.setdefault(domain, set())
+                if skill:
+                    domain_skills[domain].add(skill)
+            if skill:
+                skills.add(skill)
+            if difficulty:
+                difficulties.add(difficulty)
+
+        payload = {
             "domains": sorted(domains),
             "skills": sorted(skills),
             "difficulties": sorted(difficulties),
-            "domain_skill_mapping": domain_skill_mapping
+            "domain_skill_mapping": {domain: sorted(domain_skills[domain]) for domain in sorted(domains)},
+            "sections": sorted(sections),
+            "section_domain_mapping": {section: sorted(section_domains[section]) for section in sorted(sections)}
         }
+        # Content hash rather than version so every worker hands out the same ETag
+        digest = hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+        self.payload = payload
+        self.etag = f'"{digest}"'
+        self._loaded_at = time.monotonic()
+        self._version = version
+
+
+filter_options_cache = FilterOptionsCache()
+
+FILTER_OPTIONS_CACHE_CONTROL = "public, max-age=60, must-revalidate"
+
+
+@router.get("/questions/filter-options")
+async def get_filter_options(request: Request, session: AsyncSession = Depends(get_db)):
+    """Get available filter options for domains, skills, difficulties, and sections"""
+    # The session only checks out a connection if the cache actually reloads
+    if filter_options_cache.is_stale:
+        await filter_options_cache.load(session)
+
+    headers = {"ETag": filter_options_cache.etag, "Cache-Control": FILTER_OPTIONS_CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match", "")
+    if filter_options_cache.etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(content=filter_options_cache.payload, headers=headers)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Rebuild the UserProgress and UserDomainProgress counters from the
+user_question_attempts log.
+
+submit_answer maintains the counters incrementally; run this once after
+deploying that change (after python setup_db.py has created
+user_domain_progress), or whenever the counters are suspected to have drifted.
+Streak columns are left untouched.
+Usage: python reconcile_user_progress.py [user_id]
+"""
+
+import asyncio
+import sys
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, delete, func, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from db import engine, Question, UserQuestionAttempt, UserProgress, UserDomainProgress
+from user_progress_api import DIFFICULTY_COLUMNS
+
+
+def counter_columns():
+    """Aggregate expression for every counter column, computed from the attempt log"""
+    columns = {
+        "total_questions_attempted": func.count(UserQuestionAttempt.id),
+        "total_correct_answers": func.count(UserQuestionAttempt.id).filter(UserQuestionAttempt.is_correct == True),
+    }
+    for value, (attempted_column, correct_column) in DIFFICULTY_COLUMNS.items():
+        columns[attempted_column] = func.count(UserQuestionAttempt.id).filter(Question.difficulty == value)
+        columns[correct_column] = func.count(UserQuestionAttempt.id).filter(
+            and_(Question.difficulty == value, UserQuestionAttempt.is_correct == True)
+        )
+    return columns
+
+
+async def reconcile_user_progress(session: AsyncSession, user_id: Optional[int] = None) -> int:
+    """Overwrite counters for all users (or one user) with a single GROUP BY over the attempts"""
+    columns = counter_columns()
+    aggregate = (
+        select(
+            UserQuestionAttempt.user_id,
+            literal(datetime.utcnow()).label("updated_at"),
+            *[expression.label(name) for name, expression in columns.items()]
+        )
+        .join(Question, UserQuestionAttempt.question_id == Question.question_id)
+        .group_by(UserQuestionAttempt.user_id)
+    )
+    if user_id is not None:
+        aggregate = aggregate.where(UserQuestionAttempt.user_id == user_id)
+
+    names = ["user_id", "updated_at", *columns]
+    stmt = pg_insert(UserProgress).from_select(names, aggregate)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserProgress.user_id],
+        set_={name: getattr(stmt.excluded, name) for name in names if name != "user_id"}
+    )
+    result = await session.execute(stmt)
+    await reconcile_domain_progress(session, user_id)
+    return result.rowcount
+
+
+async def reconcile_domain_progress(session: AsyncSession, user_id: Optional[int] = None) -> int:
+    """Replace (section, domain) counters for all users (or one user) with a GROUP BY over the attempts"""
+    stale = delete(UserDomainProgress)
+    aggregate = (
+        select(
+            UserQuestionAttempt.user_id,
+            Question.section,
+            Question.domain,
+            func.count(UserQuestionAttempt.id),
+            func.count(UserQuestionAttempt.id).filter(UserQuestionAttempt.is_correct == True)
+        )
+        .join(Question, UserQuestionAttempt.question_id == Question.question_id)
+        .where(Question.domain.is_not(None))
+        .group_by(UserQuestionAttempt.user_id, Question.section, Question.domain)
+    )
+    if user_id is not None:
+        stale = stale.where(UserDomainProgress.user_id == user_id)
+        aggregate = aggregate.where(UserQuestionAttempt.user_id == user_id)
+
+    await session.execute(stale)
+    result = await session.execute(
+        pg_insert(UserDomainProgress).from_select(["user_id", "section", "domain", "attempted", "correct"], aggregate)
+    )
+    return result.rowcount
+
+
+async def main():
+    user_id = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    async with AsyncSession(engine) as session:
+        try:
+            target = f"user {user_id}" if user_id is not None else "all users"
+            print(f"Reconciling progress counters for {target}...")
+            rows = await reconcile_user_progress(session, user_id)
+            await session.commit()
+            print(f"Successfully reconciled {rows} progress rows!")
+        except Exception as e:
+            await session.rollback()
+            print(f"Error reconciling progress: {e}")
+            raise
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,23 @@
+from typing import Any, Iterable, List, Sequence
+
+import orjson
+from fastapi.responses import Response
+
+
+# Not fastapi.responses.ORJSONResponse: current FastAPI deprecates it (every
+# instance raises FastAPIDeprecationWarning) in favour of response models, and
+# these endpoints return plain row dicts precisely to skip Pydantic validation.
+# Its extra orjson flags (OPT_NON_STR_KEYS, OPT_SERIALIZE_NUMPY) aren't needed:
+# payloads are str-keyed dicts of question columns (str, int, None).
+class ORJSONResponse(Response):
+    """JSON response rendered with orjson, skipping FastAPI's jsonable_encoder pass"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+def rows_to_dicts(keys: Sequence[str], rows: Iterable[Sequence[Any]]) -> List[dict]:
+    """Zip plain row tuples with their column names, without ORM hydration"""
+    keys = tuple(keys)
+    return [dict(zip(keys, row)) for row in rows]
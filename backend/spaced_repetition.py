@@ -0,0 +1,175 @@
+"""
+Spaced repetition schedulers for vocabulary cards.
+
+Every scheduler works on whole arrays at once. Its input is a batch of
+card states (stability, difficulty, days since the last review) and the
+grades just given. It returns the new stability, difficulty and interval
+in days. A single review is a batch of one, and a whole deck can be
+rescheduled in one call.
+
+State conventions shared by all schedulers:
+    stability   NaN for a card that has never been reviewed
+    difficulty  NaN when unknown (new card, or state written by another scheduler)
+    interval    whole days until the next review; 0 retires the card
+
+Schedulers:
+    ladder  the original fixed [1, 3, 7, 14, 30] day ladder: "again" climbs
+            one rung, any passing grade retires the card (the default)
+    sm2     SuperMemo-2: ease factor as difficulty, last interval as stability
+    fsrs    FSRS-4.5 memory model with its published default weights,
+            scheduling at 90% desired retention
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+
+GRADES = {"again": 1, "hard": 2, "good": 3, "easy": 4}
+DEFAULT_SCHEDULER = "ladder"
+MAX_INTERVAL_DAYS = 36500
+
+ScheduleResult = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def grade_values(results) -> np.ndarray:
+    """Map result strings ("again", "hard", "good", "easy") to grades 1-4"""
+    try:
+        return np.array([GRADES[result] for result in results], dtype=np.int64)
+    except KeyError as e:
+        raise ValueError(f"Unknown result {e.args[0]!r}; expected one of {', '.join(GRADES)}")
+
+
+def _as_arrays(stability, difficulty, elapsed_days, grade):
+    stability = np.asarray(stability, dtype=np.float64)
+    difficulty = np.asarray(difficulty, dtype=np.float64)
+    elapsed_days = np.asarray(elapsed_days, dtype=np.float64)
+    grade = np.asarray(grade, dtype=np.int64)
+    if np.any((grade < 1) | (grade > 4)):
+        raise ValueError("grades must be between 1 (again) and 4 (easy)")
+    return np.broadcast_arrays(stability, difficulty, elapsed_days, grade)
+
+
+def _whole_days(interval: np.ndarray) -> np.ndarray:
+    return np.clip(np.rint(interval), 1, MAX_INTERVAL_DAYS).astype(np.int64)
+
+
+class Scheduler:
+    """Batch scheduler interface; subclasses implement schedule()"""
+
+    name = ""
+
+    def schedule(self, stability, difficulty, elapsed_days, grade) -> ScheduleResult:
+        """Returns (stability, difficulty, interval_days) arrays for a batch of reviews"""
+        raise NotImplementedError
+
+
+class LadderScheduler(Scheduler):
+    """The original fixed ladder; stability holds the current rung in days"""
+
+    name = "ladder"
+    INTERVALS = np.array([1, 3, 7, 14, 30], dtype=np.float64)
+
+    def schedule(self, stability, difficulty, elapsed_days, grade) -> ScheduleResult:
+        stability, difficulty, _, grade = _as_arrays(stability, difficulty, elapsed_days, grade)
+        # First failure starts at the second rung, as calculate_next_review always did
+        current = np.where(np.isnan(stability), self.INTERVALS[0], stability)
+        rung = np.minimum(np.searchsorted(self.INTERVALS, current, side="right"), len(self.INTERVALS) - 1)
+        failed = grade == 1
+        interval = np.where(failed, self.INTERVALS[rung], 0).astype(np.int64)
+        new_stability = np.where(failed, self.INTERVALS[rung], np.nan)
+        return new_stability, np.full(grade.shape, np.nan), interval
+
+
+class SM2Scheduler(Scheduler):
+    """SuperMemo-2 with grades mapped to qualities again=1, hard=3, good=4, easy=5.
+
+    Stability is the previous interval (0 after a lapse), difficulty the ease factor.
+    """
+
+    name = "sm2"
+    INITIAL_EASE = 2.5
+    MIN_EASE = 1.3
+    QUALITY = np.array([0, 1, 3, 4, 5], dtype=np.float64)  # indexed by grade
+
+    def schedule(self, stability, difficulty, elapsed_days, grade) -> ScheduleResult:
+        stability, difficulty, _, grade = _as_arrays(stability, difficulty, elapsed_days, grade)
+        quality = self.QUALITY[grade]
+        ease = np.where(np.isnan(difficulty), self.INITIAL_EASE, difficulty)
+        ease = np.maximum(ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02), self.MIN_EASE)
+
+        previous = np.where(np.isnan(stability), 0.0, stability)
+        passed = quality >= 3
+        # Repetition 1 -> 1 day, repetition 2 -> 6 days, then previous interval x ease
+        interval = np.where(previous < 1, 1.0, np.where(previous < 6, 6.0, previous * ease))
+        interval = np.where(passed, interval, 1.0)
+        interval = _whole_days(interval)
+        new_stability = np.where(passed, interval, 0.0)
+        return new_stability.astype(np.float64), ease, interval
+
+
+class FSRSScheduler(Scheduler):
+    """FSRS-4.5: stability is days until recall probability drops to 90%, difficulty is 1-10"""
+
+    name = "fsrs"
+    WEIGHTS = np.array([
+        0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031, 1.6474,
+        0.1367, 1.0461, 2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755,
+    ])
+    DECAY = -0.5
+    FACTOR = 19 / 81
+
+    def __init__(self, desired_retention: float = 0.9, weights=None):
+        self.desired_retention = desired_retention
+        self.w = np.asarray(weights, dtype=np.float64) if weights is not None else self.WEIGHTS
+
+    def initial_difficulty(self, grade: np.ndarray) -> np.ndarray:
+        return np.clip(self.w[4] - (grade - 3) * self.w[5], 1, 10)
+
+    def retrievability(self, elapsed_days: np.ndarray, stability: np.ndarray) -> np.ndarray:
+        return (1 + self.FACTOR * elapsed_days / stability) ** self.DECAY
+
+    def interval(self, stability: np.ndarray) -> np.ndarray:
+        days = stability / self.FACTOR * (self.desired_retention ** (1 / self.DECAY) - 1)
+        return _whole_days(days)
+
+    def schedule(self, stability, difficulty, elapsed_days, grade) -> ScheduleResult:
+        stability, difficulty, elapsed_days, grade = _as_arrays(stability, difficulty, elapsed_days, grade)
+        w = self.w
+        new_card = np.isnan(stability)
+        difficulty = np.where(np.isnan(difficulty), self.initial_difficulty(np.full(grade.shape, 3)), difficulty)
+
+        # Placeholders keep the math finite for new cards; their results are replaced below
+        safe_stability = np.where(new_card, 1.0, np.maximum(stability, 0.01))
+        r = self.retrievability(np.maximum(elapsed_days, 0), safe_stability)
+
+        next_difficulty = difficulty - w[6] * (grade - 3)
+        next_difficulty = np.clip(w[7] * self.initial_difficulty(np.full(grade.shape, 3)) + (1 - w[7]) * next_difficulty, 1, 10)
+
+        hard_penalty = np.where(grade == 2, w[15], 1.0)
+        easy_bonus = np.where(grade == 4, w[16], 1.0)
+        recalled = safe_stability * (
+            1 + np.exp(w[8]) * (11 - difficulty) * safe_stability ** -w[9]
+            * (np.exp(w[10] * (1 - r)) - 1) * hard_penalty * easy_bonus
+        )
+        forgotten = np.minimum(
+            w[11] * difficulty ** -w[12] * ((safe_stability + 1) ** w[13] - 1) * np.exp(w[14] * (1 - r)),
+            safe_stability,
+        )
+        next_stability = np.where(grade == 1, forgotten, recalled)
+
+        next_stability = np.where(new_card, w[grade - 1], next_stability)
+        next_difficulty = np.where(new_card, self.initial_difficulty(grade), next_difficulty)
+        next_stability = np.clip(next_stability, 0.01, MAX_INTERVAL_DAYS)
+        return next_stability, next_difficulty, self.interval(next_stability)
+
+
+SCHEDULERS: Dict[str, Scheduler] = {
+    scheduler.name: scheduler for scheduler in (LadderScheduler(), SM2Scheduler(), FSRSScheduler())
+}
+
+
+def get_scheduler(name: str) -> Scheduler:
+    try:
+        return SCHEDULERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown scheduler {name!r}; expected one of {', '.join(SCHEDULERS)}")
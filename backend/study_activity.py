@@ -0,0 +1,78 @@
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from db import UserStudySession, UserProgress
+
+
+def study_day(moment: Optional[datetime] = None) -> date:
+    """Study days follow attempted_at, which is stored in UTC"""
+    return (moment or datetime.utcnow()).date()
+
+
+def study_session_upsert(user_id: int, session_date: date, items_attempted: int, time_seconds: float):
+    """Add to the day's UserStudySession row, creating it on the first submission of the day"""
+    stmt = pg_insert(UserStudySession).values(
+        user_id=user_id,
+        session_date=session_date,
+        questions_attempted=items_attempted,
+        total_time_seconds=time_seconds,
+        created_at=datetime.utcnow()
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[UserStudySession.user_id, UserStudySession.session_date],
+        set_={
+            "questions_attempted": func.coalesce(UserStudySession.questions_attempted, 0) + stmt.excluded.questions_attempted,
+            "total_time_seconds": func.coalesce(UserStudySession.total_time_seconds, 0) + stmt.excluded.total_time_seconds
+        }
+    )
+
+
+def streak_upsert(user_id: int, session_date: date):
+    """Advance the streak counters in O(1) from last_study_date.
+
+    Studying again on the same day keeps the streak, studying the day after
+    extends it, and any longer gap restarts it at 1. All SET expressions see
+    the row as it was before the update.
+    """
+    previous_day = session_date - timedelta(days=1)
+    current_streak = case(
+        (UserProgress.last_study_date == session_date, func.coalesce(UserProgress.current_streak_days, 0)),
+        (UserProgress.last_study_date == previous_day, func.coalesce(UserProgress.current_streak_days, 0) + 1),
+        else_=1
+    )
+    stmt = pg_insert(UserProgress).values(
+        user_id=user_id,
+        current_streak_days=1,
+        longest_streak_days=1,
+        last_study_date=session_date,
+        updated_at=datetime.utcnow()
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[UserProgress.user_id],
+        set_={
+            "current_streak_days": current_streak,
+            "longest_streak_days": func.greatest(func.coalesce(UserProgress.longest_streak_days, 0), current_streak),
+            "last_study_date": func.greatest(UserProgress.last_study_date, session_date),
+            "updated_at": stmt.excluded.updated_at
+        }
+    )
+
+
+async def record_study_activity(session: AsyncSession, user_id: int, time_seconds: float,
+                                items_attempted: int = 1, moment: Optional[datetime] = None) -> None:
+    """Roll a submission into the day's study session and the user's streak (caller commits)"""
+    session_date = study_day(moment)
+    await session.execute(study_session_upsert(user_id, session_date, items_attempted, time_seconds))
+    await session.execute(streak_upsert(user_id, session_date))
+
+
+def displayed_streak(progress: UserProgress, today: Optional[date] = None) -> int:
+    """A stored streak only counts while it is still alive (studied today or yesterday)"""
+    today = today or study_day()
+    if not progress.last_study_date or progress.last_study_date < today - timedelta(days=1):
+        return 0
+    return progress.current_streak_days or 0
@@ -0,0 +1,171 @@
+"""
+AI tutor dialog endpoints.
+
+One AsyncOpenAI client per process shares its HTTP connection pool across
+requests, so a tutor call never blocks the event loop. Every call has a
+timeout, and a semaphore caps how many run at once per worker. Requests
+that cannot get a slot within TUTOR_QUEUE_TIMEOUT_SECONDS get a 503
+instead of piling up. /dialog returns the whole answer; /dialog/stream
+sends tokens as server-sent events as soon as the model produces them.
+
+Point OPENAI_BASE_URL at any OpenAI-compatible server (e.g.
+fake_openai_server.py) to run without the real API.
+"""
+
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from openai import AsyncOpenAI
+from pydantic import BaseModel
+
+TUTOR_MODEL = os.getenv("TUTOR_MODEL", "gpt-3.5-turbo")
+TUTOR_TIMEOUT_SECONDS = float(os.getenv("TUTOR_TIMEOUT_SECONDS", "60"))
+TUTOR_MAX_CONCURRENCY = int(os.getenv("TUTOR_MAX_CONCURRENCY", "16"))
+TUTOR_QUEUE_TIMEOUT_SECONDS = float(os.getenv("TUTOR_QUEUE_TIMEOUT_SECONDS", "10"))
+TUTOR_MAX_TOKENS = 512
+TUTOR_TEMPERATURE = 0.2
+
+SYSTEM_PROMPT = "Stick to the context. You are an expert SAT tutor. Use the reading passage, the question, and the official answer explanation to answer the user's follow-up question. Be concise, factual, and only answer within the context of the SAT material provided, and SAT in general like Erica Grammar/Reading, Hard SAT questions, Panda, etc. If the user asks something off-topic, irrelevant, or not related to SAT, respond with something helping, determining, motivating to study the SAT. Do not provide generic, evasive, or off-topic responses.\n"
+
+router = APIRouter(tags=["tutor"])
+
+
+class DialogRequest(BaseModel):
+    passage: str
+    question: str
+    answer_explanation: str
+    user_message: str
+
+
+def build_messages(req: DialogRequest) -> list:
+    prompt = (
+        "You are an expert SAT tutor. Use the reading passage, the question, and the official answer explanation to answer the user's follow-up question. "
+        "Be concise, factual, and only answer within the context of the SAT material provided, and SAT in general like Erica Grammar/Reading, Hard SAT questions, Panda, etc. If the user asks something off-topic, irrelevant, or not related to SAT, respond with something helping, determining, motivating to study the SAT. Do not provide generic, evasive, or off-topic responses.\n"
+        f"Reading Passage: {req.passage}\n"
+        f"Question: {req.question}\n"
+        f"Official Answer Explanation: {req.answer_explanation}\n"
+        f"User: {req.user_message}\nAnswer:"
+    )
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+
+class TutorClient:
+    """Process-wide AsyncOpenAI client plus the concurrency limit for tutor calls"""
+
+    def __init__(self):
+        self._client: Optional[AsyncOpenAI] = None
+        self._slots = asyncio.Semaphore(TUTOR_MAX_CONCURRENCY)
+
+    @property
+    def client(self) -> AsyncOpenAI:
+        # Created on first use so the API key and base URL come from the loaded .env
+        if self._client is None:
+            self._client = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                base_url=os.getenv("OPENAI_BASE_URL") or None,
+                timeout=TUTOR_TIMEOUT_SECONDS,
+                max_retries=1,
+            )
+        return self._client
+
+    async def acquire(self) -> None:
+        """Take one of the concurrency slots, or fail with 503 if none frees up in time"""
+        try:
+            await asyncio.wait_for(self._slots.acquire(), TUTOR_QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Tutor is busy, please try again shortly")
+
+    def release(self) -> None:
+        self._slots.release()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+tutor = TutorClient()
+
+
+def sse_event(data: dict, event: Optional[str] = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@router.post("/dialog")
+async def dialog(req: DialogRequest):
+    """Answer a follow-up question about the current SAT question"""
+    async with tutor.slot():
+        try:
+            response = await tutor.client.chat.completions.create(
+                model=TUTOR_MODEL,
+                messages=build_messages(req),
+                max_tokens=TUTOR_MAX_TOKENS,
+                temperature=TUTOR_TEMPERATURE,
+            )
+            answer = response.choices[0].message.content.strip()
+            return {"answer": answer}
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/dialog/stream")
+async def dialog_stream(req: DialogRequest):
+    """Same as /dialog, streamed as server-sent events.
+
+    Each token arrives as `data: {"delta": "..."}`; the stream ends with
+    `event: done` carrying the full answer, or `event: error` with a detail
+    (and a status of 503 when the tutor is busy).
+    """
+    async def events() -> AsyncIterator[str]:
+        # The slot is taken inside the stream, so the finally below always
+        # releases it: a stream that never starts (early disconnect) holds none
+        try:
+            await tutor.acquire()
+        except HTTPException as e:
+            yield sse_event({"detail": e.detail, "status": e.status_code}, event="error")
+            return
+        parts = []
+        try:
+            stream = await tutor.client.chat.completions.create(
+                model=TUTOR_MODEL,
+                messages=build_messages(req),
+                max_tokens=TUTOR_MAX_TOKENS,
+                temperature=TUTOR_TEMPERATURE,
+                stream=True,
+            )
+            async with stream:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        parts.append(delta)
+                        yield sse_event({"delta": delta})
+            yield sse_event({"answer": "".join(parts).strip()}, event="done")
+        except Exception as e:
+            yield sse_event({"detail": str(e)}, event="error")
+        finally:
+            tutor.release()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,20 +1,63 @@
 from datetime import datetime, date
 from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, case, update, delete
+from sqlalchemy import func, delete, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
-from db import engine, User, Question, UserQuestionAttempt, UserStudySession, UserProgress
-
-# Database dependency
-async def get_db():
-    async with AsyncSession(engine) as session:
-        yield session
+from db import get_db, Question, UserQuestionAttempt, UserStudySession, UserProgress, UserDomainProgress
+from question_index import question_index
+from study_activity import record_study_activity, displayed_streak
+from auth import get_current_user_id
 
 router = APIRouter(prefix="/progress", tags=["progress"])
 
+# Denormalized UserProgress counter columns, as (attempted, correct) pairs
+DIFFICULTY_COLUMNS = {
+    "Easy": ("easy_attempted", "easy_correct"),
+    "Medium": ("medium_attempted", "medium_correct"),
+    "Hard": ("hard_attempted", "hard_correct"),
+}
+
+def progress_delta_upsert(user_id: int, difficulty: Optional[str], attempted_delta: int, correct_delta: int):
+    """INSERT ... ON CONFLICT statement that adds deltas to a user's progress counters.
+
+    Counters are incremented in SQL (col = col + delta), so concurrent
+    submissions for the same user never lose updates.
+    """
+    deltas = {
+        "total_questions_attempted": attempted_delta,
+        "total_correct_answers": correct_delta,
+    }
+    columns = DIFFICULTY_COLUMNS.get(difficulty)
+    if columns:
+        deltas[columns[0]] = attempted_delta
+        deltas[columns[1]] = correct_delta
+
+    stmt = pg_insert(UserProgress).values(user_id=user_id, updated_at=datetime.utcnow(), **deltas)
+    return stmt.on_conflict_do_update(
+        index_elements=[UserProgress.user_id],
+        set_={
+            "updated_at": stmt.excluded.updated_at,
+            **{column: func.coalesce(getattr(UserProgress, column), 0) + delta for column, delta in deltas.items()}
+        }
+    )
+
+def domain_delta_upsert(user_id: int, section: str, domain: str, attempted_delta: int, correct_delta: int):
+    """INSERT ... ON CONFLICT statement that adds deltas to a user's (section, domain) counters"""
+    stmt = pg_insert(UserDomainProgress).values(
+        user_id=user_id, section=section, domain=domain, attempted=attempted_delta, correct=correct_delta
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[UserDomainProgress.user_id, UserDomainProgress.section, UserDomainProgress.domain],
+        set_={
+            "attempted": UserDomainProgress.attempted + attempted_delta,
+            "correct": UserDomainProgress.correct + correct_delta,
+        }
+    )
+
 # Request models
 class SubmitAnswerRequest(BaseModel):
     question_id: str
@@ -34,10 +77,22 @@ class DifficultyBreakdown(BaseModel):
 
 class DomainStats(BaseModel):
     domain: str
+    section: Optional[str] = None  # "Reading and Writing" or "Math"
     attempted: int
     correct: int
     accuracy: float
 
+class RecentAttemptResponse(BaseModel):
+    question_id: str
+    selected_choice: str
+    is_correct: bool
+    time_elapsed: float
+    attempted_at: str  # ISO timestamp
+    question_text: Optional[str]
+    difficulty: Optional[str]
+    domain: Optional[str]
+    skill: Optional[str]
+
 class UserStatsResponse(BaseModel):
     questionsAnswered: int
     totalQuestions: int
@@ -50,35 +105,30 @@ class UserStatsResponse(BaseModel):
 @router.post("/submit-answer", response_model=SubmitAnswerResponse)
 async def submit_answer(
     request: SubmitAnswerRequest,
+    user_id: int = Depends(get_current_user_id),
     db: AsyncSession = Depends(get_db)
 ):
     """Submit a user's answer to a question"""
     try:
-        # For now, use hardcoded user ID (in real app, get from auth)
-        user_sub = "102668604194363784471"
-        
-        user_result = await db.execute(select(User).where(User.sub == user_sub))
-        user = user_result.scalar_one_or_none()
-        
-        if not user:
-            # In a real app, you might create the user here or rely on auth flow
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        question_result = await db.execute(select(Question).where(Question.question_id == request.question_id))
-        if not question_result.scalar_one_or_none():
+        question_result = await db.execute(
+            select(Question.difficulty, Question.section, Question.domain).where(Question.question_id == request.question_id)
+        )
+        question = question_result.one_or_none()
+        if not question:
             raise HTTPException(status_code=404, detail="Question not found")
 
-        # Delete any existing attempt for this user+question
-        await db.execute(
+        # Delete any existing attempt for this user+question, remembering what it counted
+        deleted_result = await db.execute(
             delete(UserQuestionAttempt).where(
-                UserQuestionAttempt.user_id == user.id,
+                UserQuestionAttempt.user_id == user_id,
                 UserQuestionAttempt.question_id == request.question_id
-            )
+            ).returning(UserQuestionAttempt.is_correct)
         )
+        previous_results = deleted_result.scalars().all()
 
         # Create new attempt record
         attempt = UserQuestionAttempt(
-            user_id=user.id,
+            user_id=user_id,
             question_id=request.question_id,
             selected_choice=request.selected_choice,
             is_correct=request.is_correct,
@@ -86,6 +136,18 @@ async def submit_answer(
             attempted_at=datetime.utcnow()
         )
         db.add(attempt)
+
+        # Roll into today's study session and advance the streak
+        await record_study_activity(db, user_id, request.time_elapsed_seconds, moment=attempt.attempted_at)
+
+        # Replace the old attempt's contribution with the new one in the same transaction
+        attempted_delta = 1 - len(previous_results)
+        correct_delta = int(request.is_correct) - sum(1 for is_correct in previous_results if is_correct)
+        await db.execute(progress_delta_upsert(user_id, question.difficulty, attempted_delta, correct_delta))
+        if question.domain and (attempted_delta or correct_delta):
+            await db.execute(domain_delta_upsert(
+                user_id, question.section, question.domain, attempted_delta, correct_delta
+            ))
         
         await db.commit()
         
@@ -99,73 +161,49 @@ async def submit_answer(
         raise HTTPException(status_code=500, detail=f"Failed to submit answer: {str(e)}")
 
 @router.get("/stats", response_model=UserStatsResponse)
-async def get_user_stats(db: AsyncSession = Depends(get_db)):
+async def get_user_stats(user_id: int = Depends(get_current_user_id), db: AsyncSession = Depends(get_db)):
     """Get comprehensive user statistics"""
     try:
-        # For now, use hardcoded user ID
-        user_sub = "102668604194363784471"
-        
-        user_result = await db.execute(select(User).where(User.sub == user_sub))
-        user = user_result.scalar_one_or_none()
+        # Total comes from the in-memory question index; no COUNT over questions
+        await question_index.ensure_fresh(db)
+        total_questions = question_index.total
         
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        
-        total_questions_result = await db.execute(select(func.count(Question.id)))
-        total_questions = total_questions_result.scalar() or 0
-        
-        attempts_result = await db.execute(
-            select(UserQuestionAttempt).where(UserQuestionAttempt.user_id == user.id)
-        )
-        attempts = attempts_result.scalars().all()
+        # Everything else is read from the incrementally maintained counters
+        progress_result = await db.execute(select(UserProgress).where(UserProgress.user_id == user_id))
+        progress = progress_result.scalar_one_or_none() or UserProgress()
         
-        questions_answered = len(attempts)
+        questions_answered = progress.total_questions_attempted or 0
         completion_rate = (questions_answered / total_questions * 100) if total_questions > 0 else 0
         
-        correct_answers = sum(1 for a in attempts if a.is_correct)
+        correct_answers = progress.total_correct_answers or 0
         accuracy = (correct_answers / questions_answered * 100) if questions_answered > 0 else 0
         
-        # This is a simplified streak calculation. A full implementation is more complex.
-        streak_days = 0 # Placeholder
+        # Maintained incrementally on each submission; zero once a day has been missed
+        streak_days = displayed_streak(progress)
 
-        difficulty_result = await db.execute(
-            select(
-                Question.difficulty,
-                func.count(UserQuestionAttempt.id).label('attempted'),
-                func.sum(case((UserQuestionAttempt.is_correct == True, 1), else_=0)).label('correct')
-            )
-            .join(Question, UserQuestionAttempt.question_id == Question.question_id)
-            .where(UserQuestionAttempt.user_id == user.id)
-            .group_by(Question.difficulty)
-        )
-        
-        difficulty_data = {row.difficulty: row.correct or 0 for row in difficulty_result.all()}
         difficulty_breakdown = DifficultyBreakdown(
-            easy=difficulty_data.get('Easy', 0),
-            medium=difficulty_data.get('Medium', 0),
-            hard=difficulty_data.get('Hard', 0)
+            easy=progress.easy_correct or 0,
+            medium=progress.medium_correct or 0,
+            hard=progress.hard_correct or 0
         )
         
+        # One short primary-key range: a row per (section, domain) the user has answered in
         domain_result = await db.execute(
-            select(
-                Question.domain,
-                func.count(UserQuestionAttempt.id).label('attempted'),
-                func.sum(case((UserQuestionAttempt.is_correct == True, 1), else_=0)).label('correct')
-            )
-            .join(Question, UserQuestionAttempt.question_id == Question.question_id)
-            .where(UserQuestionAttempt.user_id == user.id)
-            .group_by(Question.domain)
+            select(UserDomainProgress.section, UserDomainProgress.domain,
+                   UserDomainProgress.attempted, UserDomainProgress.correct)
+            .where(UserDomainProgress.user_id == user_id)
+            .order_by(UserDomainProgress.section, UserDomainProgress.domain)
         )
-        
+
         domain_performance = []
         for row in domain_result.all():
-            if row.domain and row.attempted:
-                accuracy_pct = (row.correct / row.attempted * 100) if row.attempted > 0 else 0
+            if row.attempted:
                 domain_performance.append(DomainStats(
                     domain=row.domain,
+                    section=row.section,
                     attempted=row.attempted,
-                    correct=row.correct or 0,
-                    accuracy=accuracy_pct
+                    correct=row.correct,
+                    accuracy=row.correct / row.attempted * 100
                 ))
         
         return UserStatsResponse(
@@ -180,3 +218,76 @@ async def get_user_stats(db: AsyncSession = Depends(get_db)):
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get user stats: {str(e)}")
+
+
+def encode_attempt_cursor(attempted_at: datetime, attempt_id: int) -> str:
+    return f"{attempted_at.isoformat()}_{attempt_id}"
+
+def decode_attempt_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        attempted_at, attempt_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(attempted_at), int(attempt_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.get("/recent-attempts", response_model=List[RecentAttemptResponse])
+async def get_recent_attempts(
+    response: Response,
+    limit: int = Query(10, ge=1, le=100, description="Page size"),
+    before: Optional[str] = Query(None, description="X-Next-Cursor header value from the previous page"),
+    user_id: int = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the user's most recent attempts, newest first, with question metadata"""
+    # Parse the cursor before the try block so a bad cursor stays a 400
+    cursor = decode_attempt_cursor(before) if before else None
+
+    try:
+        # Range scan on (user_id, attempted_at DESC, id DESC), question columns joined in the same query
+        query = (
+            select(
+                UserQuestionAttempt.id,
+                UserQuestionAttempt.question_id,
+                UserQuestionAttempt.selected_choice,
+                UserQuestionAttempt.is_correct,
+                UserQuestionAttempt.time_elapsed_seconds,
+                UserQuestionAttempt.attempted_at,
+                Question.question,
+                Question.difficulty,
+                Question.domain,
+                Question.skill
+            )
+            .join(Question, UserQuestionAttempt.question_id == Question.question_id)
+            .where(UserQuestionAttempt.user_id == user_id)
+            .order_by(UserQuestionAttempt.attempted_at.desc(), UserQuestionAttempt.id.desc())
+            .limit(limit)
+        )
+        if cursor:
+            # Keyset pagination: strictly older than the last row of the previous page
+            query = query.where(tuple_(UserQuestionAttempt.attempted_at, UserQuestionAttempt.id) < tuple_(*cursor))
+
+        result = await db.execute(query)
+        rows = result.all()
+
+        if len(rows) == limit:
+            response.headers["X-Next-Cursor"] = encode_attempt_cursor(rows[-1].attempted_at, rows[-1].id)
+
+        return [
+            RecentAttemptResponse(
+                question_id=row.question_id,
+                selected_choice=row.selected_choice,
+                is_correct=row.is_correct,
+                time_elapsed=row.time_elapsed_seconds,
+                attempted_at=row.attempted_at.isoformat(),
+                question_text=row.question,
+                difficulty=row.difficulty,
+                domain=row.domain,
+                skill=row.skill
+            )
+            for row in rows
+        ]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get recent attempts: {str(e)}")
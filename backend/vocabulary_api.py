@@ -1,39 +1,119 @@
-from datetime import datetime, date, timedelta
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, status
-from pydantic import BaseModel
+import os
+from collections import Counter
+from datetime import datetime, date, time, timedelta
+from typing import List, Literal, NamedTuple, Optional
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func, and_, desc, or_
+from sqlalchemy import Integer, String, func, and_, any_, bindparam, desc, or_, update, null, exists
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 
-from db import engine, User, VocabularyCard, UserVocabularyAttempt, UserVocabularyProgress
+from db import get_db, User, VocabularyCard, UserVocabularyAttempt, UserVocabularyProgress, UserCardState
+from study_activity import record_study_activity, study_day
+from auth import get_current_user_id, get_optional_user_id
+from spaced_repetition import SCHEDULERS, get_scheduler, grade_values
 
 router = APIRouter(prefix="/vocabulary", tags=["vocabulary"])
 
-# Spaced repetition intervals (in days)
-SPACED_REPETITION_INTERVALS = [1, 3, 7, 14, 30]  # 1 day, 3 days, 1 week, 2 weeks, 1 month
-
-def calculate_next_review(failure_count: int, result: str) -> tuple[int, Optional[date]]:
-    """Calculate next review interval and date based on spaced repetition algorithm"""
-    if result == "easy":
-        # Card is completed, no next review needed
-        return 0, None
-    
-    # Card failed ("again"), calculate next interval
-    if failure_count >= len(SPACED_REPETITION_INTERVALS):
-        # Cap at maximum interval
-        interval_days = SPACED_REPETITION_INTERVALS[-1]
-    else:
-        interval_days = SPACED_REPETITION_INTERVALS[failure_count]
-    
-    next_review_date = date.today() + timedelta(days=interval_days)
-    return interval_days, next_review_date
+NEW_CARDS_PER_DAY = int(os.getenv("VOCAB_NEW_CARDS_PER_DAY", "20"))
+MAX_QUEUE_SIZE = 100
+MAX_BATCH_ATTEMPTS = 200
+
+class CardReview(NamedTuple):
+    """Scheduling outcome of one graded card"""
+    result: str
+    failure_count: int
+    interval_days: int
+    next_review_date: Optional[date]
+    stability: Optional[float]
+    difficulty: Optional[float]
+    scheduler: str
+
+
+class CardState(NamedTuple):
+    """The card state columns review_cards reads"""
+    failure_count: int
+    stability: Optional[float]
+    difficulty: Optional[float]
+    scheduler: Optional[str]
+    last_attempted_at: datetime
+
+
+def review_cards(scheduler_name: str, states: list, results: List[str], reviewed_at: datetime) -> List[CardReview]:
+    """Schedule a batch of graded cards in one call to the user's scheduler.
+
+    states holds each card's current CardState (or a row with the same
+    columns), or None for a new card.
+    """
+    scheduler = get_scheduler(scheduler_name)
+    today = study_day(reviewed_at)
+    stability = np.full(len(states), np.nan)
+    difficulty = np.full(len(states), np.nan)
+    elapsed_days = np.zeros(len(states))
+    for i, state in enumerate(states):
+        if state is None:
+            continue
+        if state.stability is not None:
+            stability[i] = state.stability
+        # Difficulty scales differ between schedulers; only carry over our own
+        if state.difficulty is not None and state.scheduler == scheduler.name:
+            difficulty[i] = state.difficulty
+        elapsed_days[i] = (today - state.last_attempted_at.date()).days
+
+    new_stability, new_difficulty, intervals = scheduler.schedule(
+        stability, difficulty, elapsed_days, grade_values(results)
+    )
+
+    reviews = []
+    for i, (state, result) in enumerate(zip(states, results)):
+        previous_failures = state.failure_count if state is not None else 0
+        interval_days = int(intervals[i])
+        reviews.append(CardReview(
+            result=result,
+            # Consecutive "again"s; any passing grade resets it
+            failure_count=previous_failures + 1 if result == "again" else 0,
+            interval_days=interval_days,
+            next_review_date=today + timedelta(days=interval_days) if interval_days else None,
+            stability=None if np.isnan(new_stability[i]) else float(new_stability[i]),
+            difficulty=None if np.isnan(new_difficulty[i]) else float(new_difficulty[i]),
+            scheduler=scheduler.name,
+        ))
+    return reviews
+
+
+def card_is_due(today: date):
+    """SQL predicate for an attempted card that should be reviewed today"""
+    return or_(
+        UserCardState.next_review_date <= today,
+        # Rows written before review dates were stored
+        and_(UserCardState.result == "again", UserCardState.next_review_date.is_(None))
+    )
+
+
+def card_is_overdue(today: date):
+    """Due predicate the queue serves from a range over (user_id, next_review_date)"""
+    return UserCardState.next_review_date <= today
+
+
+def card_is_retired():
+    """SQL predicate for a card taken out of rotation (a passing grade on the ladder)"""
+    return and_(UserCardState.next_review_date.is_(None), UserCardState.result != "again")
 
 # Request models
 class SubmitVocabularyAttemptRequest(BaseModel):
     card_id: int
-    result: str  # "again" or "easy"
+    result: Literal["again", "hard", "good", "easy"]
     time_elapsed_seconds: float
+    # Client-generated id that makes retries of the same attempt idempotent
+    client_attempt_id: Optional[str] = Field(None, min_length=1, max_length=64)
+
+class SubmitVocabularyAttemptsRequest(BaseModel):
+    attempts: List[SubmitVocabularyAttemptRequest] = Field(..., min_length=1, max_length=MAX_BATCH_ATTEMPTS)
+
+class SchedulerRequest(BaseModel):
+    scheduler: str
 
 # Response models
 class VocabularyCardResponse(BaseModel):
@@ -49,334 +129,459 @@ class VocabularyCardResponse(BaseModel):
     failure_count: int
     is_due_for_review: bool
 
+CARD_COLUMNS = (
+    VocabularyCard.id, VocabularyCard.word, VocabularyCard.definition, VocabularyCard.example,
+    VocabularyCard.difficulty, VocabularyCard.category,
+)
+STATE_COLUMNS = (UserCardState.result, UserCardState.next_review_date, UserCardState.failure_count)
+
+
+async def fetch_cards_with_state(session: AsyncSession, user_id: int, today: date, due_only: bool = False):
+    """Return one row per card with the user's current state for it (None if never attempted)"""
+    query = (
+        select(*CARD_COLUMNS, *STATE_COLUMNS)
+        .outerjoin(
+            UserCardState,
+            and_(
+                UserCardState.card_id == VocabularyCard.id,
+                UserCardState.user_id == user_id
+            )
+        )
+        .order_by(VocabularyCard.word)
+    )
+    if due_only:
+        query = query.where(or_(
+            UserCardState.result.is_(None),  # Never attempted
+            card_is_due(today)
+        ))
+    result = await session.execute(query)
+    return result.all()
+
+
+def upsert_card_states(user_id: int, reviews: list, attempted_at: datetime):
+    """Multi-row INSERT ... ON CONFLICT statement moving each (card_id, review) to its latest attempt.
+
+    A card may appear only once per statement.
+    """
+    stmt = pg_insert(UserCardState).values([
+        dict(
+            user_id=user_id,
+            card_id=card_id,
+            first_attempted_at=attempted_at,
+            last_attempted_at=attempted_at,
+            **review._asdict()
+        )
+        for card_id, review in reviews
+    ])
+    return stmt.on_conflict_do_update(
+        index_elements=[UserCardState.user_id, UserCardState.card_id],
+        set_={
+            **{field: stmt.excluded[field] for field in CardReview._fields},
+            "last_attempted_at": stmt.excluded.last_attempted_at
+        }
+    )
+
+
+class AttemptOutcome(NamedTuple):
+    """What a submitted attempt did to its card; duplicate if the client_attempt_id was seen before"""
+    client_attempt_id: Optional[str]
+    card_id: int
+    next_review_date: Optional[date]
+    failure_count: int
+    interval_days: int
+    duplicate: bool
+
+
+async def apply_attempts(session: AsyncSession, user_id: int,
+                         attempts: List[SubmitVocabularyAttemptRequest]) -> List[AttemptOutcome]:
+    """Grade an ordered list of attempts and write them all in one transaction (caller commits).
+
+    Attempts whose client_attempt_id the user already submitted are not applied
+    again; their stored outcome is returned. Raises 404 if any card is unknown.
+    """
+    attempted_at = datetime.utcnow()
+
+    # Scheduling reads card state and writes it back: hold the user's row until
+    # commit so concurrent submits (two tabs, a retry) apply one after the other.
+    # NO KEY UPDATE still lets foreign-key inserts referencing the user through.
+    scheduler_result = await session.execute(
+        select(User.vocabulary_scheduler).where(User.id == user_id).with_for_update(key_share=True)
+    )
+    scheduler_name = scheduler_result.scalar_one()
+
+    # Outcomes of attempts applied by an earlier try of this request
+    client_ids = list({attempt.client_attempt_id for attempt in attempts if attempt.client_attempt_id})
+    stored = {}
+    if client_ids:
+        stored_result = await session.execute(
+            select(
+                UserVocabularyAttempt.client_attempt_id, UserVocabularyAttempt.card_id,
+                UserVocabularyAttempt.next_review_date, UserVocabularyAttempt.failure_count,
+                UserVocabularyAttempt.interval_days
+            )
+            .where(
+                UserVocabularyAttempt.user_id == user_id,
+                UserVocabularyAttempt.client_attempt_id == any_(
+                    bindparam("client_ids", client_ids, type_=ARRAY(String))
+                )
+            )
+        )
+        stored = {
+            row.client_attempt_id: AttemptOutcome(
+                row.client_attempt_id, row.card_id, row.next_review_date,
+                row.failure_count or 0, row.interval_days or 0, True
+            )
+            for row in stored_result
+        }
+
+    pending, pending_ids = [], set()
+    for attempt in attempts:
+        if attempt.client_attempt_id in stored or attempt.client_attempt_id in pending_ids:
+            continue
+        pending.append(attempt)
+        if attempt.client_attempt_id:
+            pending_ids.add(attempt.client_attempt_id)
+
+    reviews = []
+    if pending:
+        # Card existence and the cards' current state in one query
+        card_ids = sorted({attempt.card_id for attempt in pending})
+        state_result = await session.execute(
+            select(
+                VocabularyCard.id.label("card_id"),
+                UserCardState.failure_count, UserCardState.stability, UserCardState.difficulty,
+                UserCardState.scheduler, UserCardState.last_attempted_at
+            )
+            .outerjoin(UserCardState, and_(
+                UserCardState.user_id == user_id,
+                UserCardState.card_id == VocabularyCard.id
+            ))
+            .where(VocabularyCard.id == any_(bindparam("card_ids", card_ids, type_=ARRAY(Integer))))
+        )
+        rows = state_result.all()
+        missing = set(card_ids) - {row.card_id for row in rows}
+        if missing:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Vocabulary card not found: {', '.join(map(str, sorted(missing)))}"
+            )
+        states = {
+            row.card_id: CardState(
+                row.failure_count, row.stability, row.difficulty, row.scheduler, row.last_attempted_at
+            ) if row.last_attempted_at is not None else None
+            for row in rows
+        }
+
+        # A card graded twice in one batch must see its first grade: the n-th
+        # attempt on each card goes in round n, one scheduler call per round
+        rounds, seen = {}, Counter()
+        for i, attempt in enumerate(pending):
+            rounds.setdefault(seen[attempt.card_id], []).append(i)
+            seen[attempt.card_id] += 1
+        reviews = [None] * len(pending)
+        for indexes in rounds.values():
+            round_reviews = review_cards(
+                scheduler_name,
+                [states[pending[i].card_id] for i in indexes],
+                [pending[i].result for i in indexes],
+                attempted_at
+            )
+            for i, review in zip(indexes, round_reviews):
+                reviews[i] = review
+                states[pending[i].card_id] = CardState(
+                    review.failure_count, review.stability, review.difficulty, review.scheduler, attempted_at
+                )
+
+        # Attempt rows keep the batch order in their ids, which break attempted_at ties
+        inserted = await session.execute(
+            pg_insert(UserVocabularyAttempt).values([
+                dict(
+                    user_id=user_id,
+                    card_id=attempt.card_id,
+                    client_attempt_id=attempt.client_attempt_id,
+                    time_elapsed_seconds=attempt.time_elapsed_seconds,
+                    attempted_at=attempted_at,
+                    **review._asdict()
+                )
+                for attempt, review in zip(pending, reviews)
+            ])
+            .on_conflict_do_nothing(
+                index_elements=[UserVocabularyAttempt.user_id, UserVocabularyAttempt.client_attempt_id]
+            )
+            .returning(UserVocabularyAttempt.id)
+        )
+        if len(inserted.all()) != len(pending):
+            # Only reachable if the user row lock was bypassed; retrying returns their outcome
+            raise HTTPException(status_code=409, detail="Attempts are already being submitted, please retry")
+
+        # Keep the materialized card state in step, one row per card
+        latest = {attempt.card_id: review for attempt, review in zip(pending, reviews)}
+        await session.execute(upsert_card_states(user_id, list(latest.items()), attempted_at))
+
+        # Card reviews count towards the daily study session and streak too
+        await record_study_activity(
+            session, user_id, sum(attempt.time_elapsed_seconds for attempt in pending),
+            items_attempted=len(pending), moment=attempted_at
+        )
+
+    outcomes = {}
+    for attempt, review in zip(pending, reviews):
+        outcome = AttemptOutcome(
+            attempt.client_attempt_id, attempt.card_id, review.next_review_date,
+            review.failure_count, review.interval_days, False
+        )
+        outcomes[id(attempt)] = outcome
+        if attempt.client_attempt_id:
+            stored[attempt.client_attempt_id] = outcome._replace(duplicate=True)
+    return [outcomes.get(id(attempt)) or stored[attempt.client_attempt_id] for attempt in attempts]
+
+
+def build_card_response(row, today: date) -> VocabularyCardResponse:
+    """Build the API response for a card row from fetch_cards_with_state"""
+    if row.result is None:
+        # Never attempted
+        completed, reviewed, is_due = False, False, True
+    elif row.next_review_date is None and row.result != "again":
+        # Retired by the ladder scheduler
+        completed, reviewed, is_due = True, True, False
+    else:
+        # Scheduled, check if due
+        completed, reviewed = False, True
+        is_due = not row.next_review_date or row.next_review_date <= today
+
+    return VocabularyCardResponse(
+        id=row.id,
+        word=row.word,
+        definition=row.definition,
+        example=row.example,
+        difficulty=row.difficulty,
+        category=row.category,
+        completed=completed,
+        reviewed=reviewed,
+        next_review_date=row.next_review_date.isoformat() if row.next_review_date and not completed else None,
+        failure_count=row.failure_count or 0,
+        is_due_for_review=is_due
+    )
+
 @router.get("/due-cards")
-async def get_due_cards():
+async def get_due_cards(user_id: Optional[int] = Depends(get_optional_user_id), session: AsyncSession = Depends(get_db)):
     """Get cards that are due for review today (including new cards)"""
-    async with AsyncSession(engine) as session:
-        try:
-            # For now, use hardcoded user ID
-            user_sub = "102668604194363784471"
-            
-            # Get user
-            user_result = await session.execute(select(User).where(User.sub == user_sub))
-            user = user_result.scalar_one_or_none()
+    try:
+        if user_id is None:
+            return []
             
-            if not user:
-                return []
+        today = study_day()
             
-            today = date.today()
+        # Never-attempted cards plus failed cards whose review date has come
+        rows = await fetch_cards_with_state(session, user_id, today, due_only=True)
+        return [build_card_response(row, today) for row in rows]
             
-            # Get all cards with their latest attempts
-            cards_query = """
-            SELECT 
-                vc.id, vc.word, vc.definition, vc.example, vc.difficulty, vc.category,
-                uva.result, uva.next_review_date, uva.failure_count, uva.attempted_at
-            FROM vocabulary_cards vc
-            LEFT JOIN (
-                SELECT DISTINCT ON (card_id) 
-                    card_id, result, next_review_date, failure_count, attempted_at
-                FROM user_vocabulary_attempts 
-                WHERE user_id = :user_id
-                ORDER BY card_id, attempted_at DESC
-            ) uva ON vc.id = uva.card_id
-            WHERE uva.card_id IS NULL  -- Never attempted
-                OR uva.result = 'again' AND (uva.next_review_date IS NULL OR uva.next_review_date <= :today)
-            ORDER BY vc.word
-            """
-            
-            result = await session.execute(
-                select(VocabularyCard, UserVocabularyAttempt)
-                .outerjoin(
-                    UserVocabularyAttempt,
-                    and_(
-                        VocabularyCard.id == UserVocabularyAttempt.card_id,
-                        UserVocabularyAttempt.user_id == user.id
-                    )
-                )
-                .order_by(VocabularyCard.word)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get due cards: {str(e)}")
+
+async def fetch_review_queue(session: AsyncSession, user_id: int, today: date, size: int, new_per_day: int):
+    """The next `size` cards to study: overdue cards, most overdue first, then new cards.
+
+    Every query is bounded by `size` rather than the deck: overdue cards come
+    from an ordered range scan of ix_user_card_state_user_next_review, new
+    cards from the deck in id order with a NOT EXISTS primary-key probe each,
+    and today's new-card count from ix_user_card_state_user_first_attempted.
+    """
+    overdue_result = await session.execute(
+        select(*CARD_COLUMNS, *STATE_COLUMNS)
+        .join(UserCardState, UserCardState.card_id == VocabularyCard.id)
+        .where(UserCardState.user_id == user_id, card_is_overdue(today))
+        .order_by(UserCardState.next_review_date, UserCardState.card_id)
+        .limit(size)
+    )
+    overdue = overdue_result.all()
+
+    introduced_result = await session.execute(
+        select(func.count()).select_from(UserCardState).where(
+            UserCardState.user_id == user_id,
+            # first_attempted_at is UTC, like study_day()
+            UserCardState.first_attempted_at >= datetime.combine(today, time.min)
+        )
+    )
+    new_remaining = max(new_per_day - introduced_result.scalar_one(), 0)
+
+    new_cards = []
+    new_limit = min(size - len(overdue), new_remaining)
+    if new_limit > 0:
+        seen = exists().where(UserCardState.user_id == user_id, UserCardState.card_id == VocabularyCard.id)
+        new_result = await session.execute(
+            select(
+                *CARD_COLUMNS,
+                *(null().label(column.key) for column in STATE_COLUMNS)
             )
-            
-            # Filter and build response for due cards only
-            due_cards = []
-            for card, attempt in result:
-                if not attempt:
-                    # Never attempted - due for review
-                    due_cards.append(VocabularyCardResponse(
-                        id=card.id,
-                        word=card.word,
-                        definition=card.definition,
-                        example=card.example,
-                        difficulty=card.difficulty,
-                        category=card.category,
-                        completed=False,
-                        reviewed=False,
-                        next_review_date=None,
-                        failure_count=0,
-                        is_due_for_review=True
-                    ))
-                elif attempt.result == "again":
-                    # Check if due for review
-                    if not attempt.next_review_date or attempt.next_review_date <= today:
-                        due_cards.append(VocabularyCardResponse(
-                            id=card.id,
-                            word=card.word,
-                            definition=card.definition,
-                            example=card.example,
-                            difficulty=card.difficulty,
-                            category=card.category,
-                            completed=False,
-                            reviewed=True,
-                            next_review_date=attempt.next_review_date.isoformat() if attempt.next_review_date else None,
-                            failure_count=attempt.failure_count or 0,
-                            is_due_for_review=True
-                        ))
-                # Skip completed cards (result == "easy")
-            
-            return due_cards
-            
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to get due cards: {str(e)}")
+            .where(~seen)
+            .order_by(VocabularyCard.id)
+            .limit(new_limit)
+        )
+        new_cards = new_result.all()
+
+    return overdue, new_cards, new_remaining - len(new_cards)
+
+@router.get("/queue")
+async def get_review_queue(
+    size: int = Query(20, ge=1, le=MAX_QUEUE_SIZE),
+    new_per_day: int = Query(NEW_CARDS_PER_DAY, ge=0),
+    user_id: Optional[int] = Depends(get_optional_user_id),
+    session: AsyncSession = Depends(get_db)
+):
+    """Get the next `size` cards to study: overdue reviews first, then up to new_per_day new cards a day"""
+    try:
+        if user_id is None:
+            return {"cards": [], "overdue": 0, "new": 0, "new_remaining_today": 0}
+
+        today = study_day()
+        overdue, new_cards, new_remaining = await fetch_review_queue(session, user_id, today, size, new_per_day)
+        return {
+            "cards": [build_card_response(row, today) for row in (*overdue, *new_cards)],
+            "overdue": len(overdue),
+            "new": len(new_cards),
+            "new_remaining_today": new_remaining
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get review queue: {str(e)}")
 
 @router.get("/cards")
-async def get_all_cards():
+async def get_all_cards(user_id: Optional[int] = Depends(get_optional_user_id), session: AsyncSession = Depends(get_db)):
     """Get all cards with their status"""
-    async with AsyncSession(engine) as session:
-        try:
-            # For now, use hardcoded user ID
-            user_sub = "102668604194363784471"
-            
-            # Get user
-            user_result = await session.execute(select(User).where(User.sub == user_sub))
-            user = user_result.scalar_one_or_none()
-            
-            if not user:
-                return []
-            
-            today = date.today()
-            
-            # Get all cards with their latest attempts
-            result = await session.execute(
-                select(VocabularyCard, UserVocabularyAttempt)
-                .outerjoin(
-                    UserVocabularyAttempt,
-                    and_(
-                        VocabularyCard.id == UserVocabularyAttempt.card_id,
-                        UserVocabularyAttempt.user_id == user.id
-                    )
-                )
-                .order_by(VocabularyCard.word)
-            )
+    try:
+        if user_id is None:
+            return []
             
-            # Group by card and get latest attempt
-            cards_data = {}
-            for card, attempt in result:
-                card_id = card.id
-                if card_id not in cards_data:
-                    cards_data[card_id] = {
-                        'card': card,
-                        'latest_attempt': None
-                    }
-                
-                # Keep the latest attempt
-                if attempt and (not cards_data[card_id]['latest_attempt'] or 
-                               attempt.attempted_at > cards_data[card_id]['latest_attempt'].attempted_at):
-                    cards_data[card_id]['latest_attempt'] = attempt
+        today = study_day()
             
-            # Build response
-            all_cards = []
-            for card_id, data in cards_data.items():
-                card = data['card']
-                attempt = data['latest_attempt']
-                
-                if not attempt:
-                    # Never attempted
-                    all_cards.append(VocabularyCardResponse(
-                        id=card.id,
-                        word=card.word,
-                        definition=card.definition,
-                        example=card.example,
-                        difficulty=card.difficulty,
-                        category=card.category,
-                        completed=False,
-                        reviewed=False,
-                        next_review_date=None,
-                        failure_count=0,
-                        is_due_for_review=True
-                    ))
-                elif attempt.result == "easy":
-                    # Completed
-                    all_cards.append(VocabularyCardResponse(
-                        id=card.id,
-                        word=card.word,
-                        definition=card.definition,
-                        example=card.example,
-                        difficulty=card.difficulty,
-                        category=card.category,
-                        completed=True,
-                        reviewed=True,
-                        next_review_date=None,
-                        failure_count=attempt.failure_count or 0,
-                        is_due_for_review=False
-                    ))
-                else:
-                    # Failed, check if due
-                    is_due = not attempt.next_review_date or attempt.next_review_date <= today
-                    all_cards.append(VocabularyCardResponse(
-                        id=card.id,
-                        word=card.word,
-                        definition=card.definition,
-                        example=card.example,
-                        difficulty=card.difficulty,
-                        category=card.category,
-                        completed=False,
-                        reviewed=True,
-                        next_review_date=attempt.next_review_date.isoformat() if attempt.next_review_date else None,
-                        failure_count=attempt.failure_count or 0,
-                        is_due_for_review=is_due
-                    ))
+        # Get all cards, each with its current state
+        rows = await fetch_cards_with_state(session, user_id, today)
+        return [build_card_response(row, today) for row in rows]
             
-            return all_cards
-            
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to get cards: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get cards: {str(e)}")
 
 @router.post("/submit-attempt")
-async def submit_vocabulary_attempt(request: SubmitVocabularyAttemptRequest):
+async def submit_vocabulary_attempt(
+    request: SubmitVocabularyAttemptRequest,
+    user_id: int = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_db)
+):
     """Submit a user's attempt on a vocabulary card with spaced repetition"""
-    async with AsyncSession(engine) as session:
-        try:
-            # For now, use hardcoded user ID
-            user_sub = "102668604194363784471"
-            
-            # Get user
-            user_result = await session.execute(select(User).where(User.sub == user_sub))
-            user = user_result.scalar_one_or_none()
-            
-            if not user:
-                raise HTTPException(status_code=404, detail="User not found")
-            
-            # Verify card exists
-            card_result = await session.execute(select(VocabularyCard).where(VocabularyCard.id == request.card_id))
-            card = card_result.scalar_one_or_none()
-            
-            if not card:
-                raise HTTPException(status_code=404, detail="Vocabulary card not found")
-            
-            # Get previous attempt for this card to determine failure count
-            previous_attempt_result = await session.execute(
-                select(UserVocabularyAttempt)
-                .where(and_(
-                    UserVocabularyAttempt.user_id == user.id,
-                    UserVocabularyAttempt.card_id == request.card_id
-                ))
-                .order_by(desc(UserVocabularyAttempt.attempted_at))
-                .limit(1)
-            )
-            previous_attempt = previous_attempt_result.scalar_one_or_none()
-            
-            # Calculate failure count and next review
-            if request.result == "easy":
-                failure_count = 0  # Reset on success
-                interval_days, next_review_date = 0, None
-            else:  # "again"
-                previous_failure_count = previous_attempt.failure_count if previous_attempt else 0
-                failure_count = previous_failure_count + 1
-                interval_days, next_review_date = calculate_next_review(failure_count, request.result)
-            
-            # Create attempt record with spaced repetition data
-            attempt = UserVocabularyAttempt(
-                user_id=user.id,
-                card_id=request.card_id,
-                result=request.result,
-                time_elapsed_seconds=request.time_elapsed_seconds,
-                attempted_at=datetime.utcnow(),
-                interval_days=interval_days,
-                next_review_date=next_review_date,
-                failure_count=failure_count
-            )
-            session.add(attempt)
-            
-            await session.commit()
-            
-            return {
-                "status": "success", 
-                "message": "Vocabulary attempt submitted successfully",
-                "next_review_date": next_review_date.isoformat() if next_review_date else None,
-                "failure_count": failure_count,
-                "interval_days": interval_days
-            }
-            
-        except Exception as e:
-            await session.rollback()
-            raise HTTPException(status_code=500, detail=f"Failed to submit vocabulary attempt: {str(e)}")
+    try:
+        outcome = (await apply_attempts(session, user_id, [request]))[0]
+        await session.commit()
+            
+        return {
+            "status": "success", 
+            "message": "Vocabulary attempt submitted successfully",
+            "next_review_date": outcome.next_review_date.isoformat() if outcome.next_review_date else None,
+            "failure_count": outcome.failure_count,
+            "interval_days": outcome.interval_days
+        }
+            
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to submit vocabulary attempt: {str(e)}")
+
+@router.post("/submit-attempts")
+async def submit_vocabulary_attempts(
+    request: SubmitVocabularyAttemptsRequest,
+    user_id: int = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_db)
+):
+    """Submit a study session's attempts in order, in one transaction; safe to retry with client_attempt_ids"""
+    try:
+        outcomes = await apply_attempts(session, user_id, request.attempts)
+        await session.commit()
+
+        return {
+            "status": "success",
+            "submitted": sum(not outcome.duplicate for outcome in outcomes),
+            "duplicates": sum(outcome.duplicate for outcome in outcomes),
+            "results": [
+                {
+                    "client_attempt_id": outcome.client_attempt_id,
+                    "card_id": outcome.card_id,
+                    "next_review_date": outcome.next_review_date.isoformat() if outcome.next_review_date else None,
+                    "failure_count": outcome.failure_count,
+                    "interval_days": outcome.interval_days,
+                    "duplicate": outcome.duplicate
+                }
+                for outcome in outcomes
+            ]
+        }
+
+    except HTTPException:
+        await session.rollback()
+        raise
+    except Exception as e:
+        await session.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to submit vocabulary attempts: {str(e)}")
 
 @router.get("/stats")
-async def get_vocabulary_stats():
+async def get_vocabulary_stats(user_id: Optional[int] = Depends(get_optional_user_id), session: AsyncSession = Depends(get_db)):
     """Get vocabulary learning statistics"""
-    async with AsyncSession(engine) as session:
-        try:
-            # For now, use hardcoded user ID
-            user_sub = "102668604194363784471"
-            
-            # Get user
-            user_result = await session.execute(select(User).where(User.sub == user_sub))
-            user = user_result.scalar_one_or_none()
-            
-            if not user:
-                return {
-                    "total_cards": 0,
-                    "completed_cards": 0,
-                    "due_today": 0,
-                    "completion_percentage": 0.0
-                }
-            
-            # Get total cards count
-            total_cards_result = await session.execute(select(func.count(VocabularyCard.id)))
-            total_cards = total_cards_result.scalar() or 0
+    try:
+        if user_id is None:
+            return {
+                "total_cards": 0,
+                "completed_cards": 0,
+                "due_today": 0,
+                "completion_percentage": 0.0
+            }
             
-            # Get completed cards (latest result is "easy")
-            completed_query = """
-            SELECT COUNT(DISTINCT card_id)
-            FROM user_vocabulary_attempts uva1
-            WHERE user_id = :user_id
-            AND result = 'easy'
-            AND attempted_at = (
-                SELECT MAX(attempted_at)
-                FROM user_vocabulary_attempts uva2
-                WHERE uva2.user_id = uva1.user_id
-                AND uva2.card_id = uva1.card_id
+        today = study_day()
+
+        # One aggregate over this user's card state rows; cards without a state row are new (and due)
+        total_cards_subquery = select(func.count(VocabularyCard.id)).scalar_subquery()
+        stats_result = await session.execute(
+            select(
+                total_cards_subquery.label("total_cards"),
+                func.count(UserCardState.card_id).label("attempted"),
+                func.count(UserCardState.card_id).filter(card_is_retired()).label("completed"),
+                func.count(UserCardState.card_id).filter(card_is_due(today)).label("due_attempted")
             )
-            """
-            
-            # Get due cards count
-            today = date.today()
-            due_query = """
-            SELECT COUNT(*)
-            FROM vocabulary_cards vc
-            LEFT JOIN (
-                SELECT DISTINCT ON (card_id) 
-                    card_id, result, next_review_date
-                FROM user_vocabulary_attempts 
-                WHERE user_id = :user_id
-                ORDER BY card_id, attempted_at DESC
-            ) uva ON vc.id = uva.card_id
-            WHERE uva.card_id IS NULL  -- Never attempted
-                OR (uva.result = 'again' AND (uva.next_review_date IS NULL OR uva.next_review_date <= :today))
-            """
-            
-            # Use simpler counting approach
-            all_cards = await get_all_cards()
-            completed_count = len([c for c in all_cards if c.completed])
-            due_count = len([c for c in all_cards if c.is_due_for_review])
+            .where(UserCardState.user_id == user_id)
+        )
+        stats = stats_result.one()
+
+        total_cards = stats.total_cards or 0
+        completed_count = stats.completed
+        due_count = (total_cards - stats.attempted) + stats.due_attempted
             
-            completion_percentage = (completed_count / total_cards * 100) if total_cards > 0 else 0.0
+        completion_percentage = (completed_count / total_cards * 100) if total_cards > 0 else 0.0
             
-            return {
-                "total_cards": total_cards,
-                "completed_cards": completed_count,
-                "due_today": due_count,
-                "completion_percentage": completion_percentage
-            }
+        return {
+            "total_cards": total_cards,
+            "completed_cards": completed_count,
+            "due_today": due_count,
+            "completion_percentage": completion_percentage
+        }
             
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to get vocabulary stats: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get vocabulary stats: {str(e)}")
+
+
+@router.get("/scheduler")
+async def get_vocabulary_scheduler(user_id: int = Depends(get_current_user_id), session: AsyncSession = Depends(get_db)):
+    """Get the user's spaced repetition scheduler and the available ones"""
+    result = await session.execute(select(User.vocabulary_scheduler).where(User.id == user_id))
+    return {"scheduler": result.scalar_one(), "available": list(SCHEDULERS)}
+
+@router.put("/scheduler")
+async def set_vocabulary_scheduler(
+    request: SchedulerRequest,
+    user_id: int = Depends(get_current_user_id),
+    session: AsyncSession = Depends(get_db)
+):
+    """Switch the user's spaced repetition scheduler; cards move over at their next review"""
+    if request.scheduler not in SCHEDULERS:
+        raise HTTPException(status_code=400, detail=f"Unknown scheduler; expected one of {', '.join(SCHEDULERS)}")
+    await session.execute(update(User).where(User.id == user_id).values(vocabulary_scheduler=request.scheduler))
+    await session.commit()
+    return {"scheduler": request.scheduler, "available": list(SCHEDULERS)}
@@ -1,5 +1,6 @@
 import { createContext, useContext, useState, useEffect, ReactNode } from "react";
 import { BACKEND_URL } from "../config";
+import { setSessionToken } from "../lib/session";
 
 interface UserProfile {
   name: string;
@@ -35,6 +36,7 @@ export const AuthProvider = ({ children }: { children: ReactNode }) => {
         .then(res => res.ok ? res.json() : null)
         .then(data => {
           if (data && data.user) {
+            setSessionToken(data.session_token);
             setUser({
               name: data.user.name,
               email: data.user.email,
@@ -42,9 +44,13 @@ export const AuthProvider = ({ children }: { children: ReactNode }) => {
             });
           } else {
             localStorage.removeItem("google_credential");
+            setSessionToken(null);
           }
         })
-        .catch(() => localStorage.removeItem("google_credential"));
+        .catch(() => {
+          localStorage.removeItem("google_credential");
+          setSessionToken(null);
+        });
     }
   }, []);
 
@@ -60,6 +66,7 @@ export const AuthProvider = ({ children }: { children: ReactNode }) => {
         });
         if (!res.ok) throw new Error("Failed to store user");
         const data = await res.json();
+        setSessionToken(data.session_token);
         setUser({
           name: data.user.name,
           email: data.user.email,
@@ -76,6 +83,7 @@ export const AuthProvider = ({ children }: { children: ReactNode }) => {
   const handleLogout = () => {
     setUser(null);
     localStorage.removeItem("google_credential");
+    setSessionToken(null);
   };
 
   return (
@@ -0,0 +1,15 @@
+const SESSION_TOKEN_KEY = "session_token";
+
+export const setSessionToken = (token: string | null | undefined) => {
+  if (token) {
+    localStorage.setItem(SESSION_TOKEN_KEY, token);
+  } else {
+    localStorage.removeItem(SESSION_TOKEN_KEY);
+  }
+};
+
+// Authorization header for backend calls; empty until /auth/google has issued a session
+export const authHeaders = (): Record<string, string> => {
+  const token = localStorage.getItem(SESSION_TOKEN_KEY);
+  return token ? { Authorization: `Bearer ${token}` } : {};
+};
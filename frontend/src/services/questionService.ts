@@ -21,6 +21,9 @@ class QuestionService {
     if (filters.difficulty && filters.difficulty !== "Any") {
       params.append("difficulty", filters.difficulty);
     }
+    if (filters.section && filters.section !== "Any") {
+      params.append("section", filters.section);
+    }
     
     return params;
   }
@@ -1,5 +1,6 @@
 import { FilterOptions } from "../types";
 import { BACKEND_URL } from "../config";
+import { authHeaders } from "../lib/session";
 
 export interface QuestionAttempt {
   question_id: string;
@@ -21,6 +22,7 @@ export interface UserStats {
   };
   domainPerformance: Array<{
     domain: string;
+    section?: string;
     attempted: number;
     correct: number;
     accuracy: number;
@@ -36,6 +38,7 @@ export interface RecentAttempt {
   question_text: string | null;
   difficulty: string | null;
   domain: string | null;
+  skill: string | null;
 }
 
 const API_BASE_URL = `${BACKEND_URL}/progress`;
@@ -50,6 +53,7 @@ class UserProgressService {
       method: "POST",
       headers: {
         "Content-Type": "application/json",
+        ...authHeaders(),
       },
       body: JSON.stringify(attempt),
     });
@@ -63,7 +67,7 @@ class UserProgressService {
   }
 
   async getUserStats(): Promise<UserStats> {
-    const response = await fetch(`${API_BASE_URL}/stats`);
+    const response = await fetch(`${API_BASE_URL}/stats`, { headers: authHeaders() });
 
     if (!response.ok) {
       const error = await response.json();
@@ -74,7 +78,7 @@ class UserProgressService {
   }
 
   async getRecentAttempts(limit: number = 10): Promise<RecentAttempt[]> {
-    const response = await fetch(`${API_BASE_URL}/recent-attempts?limit=${limit}`);
+    const response = await fetch(`${API_BASE_URL}/recent-attempts?limit=${limit}`, { headers: authHeaders() });
 
     if (!response.ok) {
       const error = await response.json();
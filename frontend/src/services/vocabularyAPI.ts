@@ -1,4 +1,5 @@
 import { BACKEND_URL } from "@/config";
+import { authHeaders } from "@/lib/session";
 
 // Types for vocabulary API
 export interface VocabularyCard {
@@ -22,10 +23,18 @@ export interface VocabularyStats {
   completion_percentage: number;
 }
 
+export interface ReviewQueue {
+  cards: VocabularyCard[];
+  overdue: number;
+  new: number;
+  new_remaining_today: number;
+}
+
 export interface SubmitAttemptRequest {
   card_id: number;
-  result: "again" | "easy";
+  result: "again" | "hard" | "good" | "easy";
   time_elapsed_seconds: number;
+  client_attempt_id?: string;
 }
 
 export interface SubmitAttemptResponse {
@@ -36,6 +45,22 @@ export interface SubmitAttemptResponse {
   interval_days: number;
 }
 
+export interface AttemptOutcome {
+  client_attempt_id?: string;
+  card_id: number;
+  next_review_date?: string;
+  failure_count: number;
+  interval_days: number;
+  duplicate: boolean;
+}
+
+export interface SubmitAttemptsResponse {
+  status: string;
+  submitted: number;
+  duplicates: number;
+  results: AttemptOutcome[];
+}
+
 class VocabularyAPI {
   private baseUrl: string;
 
@@ -44,7 +69,7 @@ class VocabularyAPI {
   }
 
   async getAllCards(): Promise<VocabularyCard[]> {
-    const response = await fetch(`${this.baseUrl}/cards`);
+    const response = await fetch(`${this.baseUrl}/cards`, { headers: authHeaders() });
     if (!response.ok) {
       throw new Error(`Failed to fetch cards: ${response.statusText}`);
     }
@@ -52,18 +77,27 @@ class VocabularyAPI {
   }
 
   async getDueCards(): Promise<VocabularyCard[]> {
-    const response = await fetch(`${this.baseUrl}/due-cards`);
+    const response = await fetch(`${this.baseUrl}/due-cards`, { headers: authHeaders() });
     if (!response.ok) {
       throw new Error(`Failed to fetch due cards: ${response.statusText}`);
     }
     return response.json();
   }
 
+  async getQueue(size = 20): Promise<ReviewQueue> {
+    const response = await fetch(`${this.baseUrl}/queue?size=${size}`, { headers: authHeaders() });
+    if (!response.ok) {
+      throw new Error(`Failed to fetch review queue: ${response.statusText}`);
+    }
+    return response.json();
+  }
+
   async submitAttempt(request: SubmitAttemptRequest): Promise<SubmitAttemptResponse> {
     const response = await fetch(`${this.baseUrl}/submit-attempt`, {
       method: "POST",
       headers: {
         "Content-Type": "application/json",
+        ...authHeaders(),
       },
       body: JSON.stringify(request),
     });
@@ -74,8 +108,24 @@ class VocabularyAPI {
     return response.json();
   }
 
+  async submitAttempts(attempts: SubmitAttemptRequest[]): Promise<SubmitAttemptsResponse> {
+    const response = await fetch(`${this.baseUrl}/submit-attempts`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        ...authHeaders(),
+      },
+      body: JSON.stringify({ attempts }),
+    });
+
+    if (!response.ok) {
+      throw new Error(`Failed to submit attempts: ${response.statusText}`);
+    }
+    return response.json();
+  }
+
   async getStats(): Promise<VocabularyStats> {
-    const response = await fetch(`${this.baseUrl}/stats`);
+    const response = await fetch(`${this.baseUrl}/stats`, { headers: authHeaders() });
     if (!response.ok) {
       throw new Error(`Failed to fetch stats: ${response.statusText}`);
     }
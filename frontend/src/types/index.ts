@@ -16,12 +16,14 @@ export interface Question {
   difficulty: Difficulty;
   domain: Domain;
   skill: string;
+  section?: string;
 }
 
 export interface FilterOptions {
   domain?: string;
   skill?: string;
   difficulty?: string;
+  section?: string;
 }
 
 export type Difficulty = "Easy" | "Medium" | "Hard" | "Very Hard";
@@ -30,6 +32,7 @@ export type Domain = "Information and Ideas" | "Craft and Structure" | "Expressi
 export interface QuestionResponse {
   questions: Question[];
   total: number;
+  next_cursor: number | null;
   filters_applied: {
     domain: string | null;
     skill: string | null;
@@ -51,4 +54,6 @@ export interface FilterOptionsResponse {
   skills: string[];
   difficulties: string[];
   domain_skill_mapping: Record<string, string[]>;
+  sections?: string[];
+  section_domain_mapping?: Record<string, string[]>;
 }